@@ -0,0 +1,37 @@
+"""add sowing window table
+
+Revision ID: 022_add_sowing_window_table
+Revises: 021_add_weather_cache_table
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022_add_sowing_window_table'
+down_revision = '021_add_weather_cache_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sowing_window',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('variedad_id', sa.Integer(), nullable=False),
+        sa.Column('hemisphere', sa.String(1), nullable=False),
+        sa.Column('meses_siembra_interior', sa.JSON(), nullable=False),
+        sa.Column('meses_siembra_exterior', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['variedad_id'], ['variedades.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('variedad_id', 'hemisphere', name='uq_sowing_window_variedad_hemisphere')
+    )
+    op.create_index('ix_sowing_window_id', 'sowing_window', ['id'])
+    # The table is filled by the scheduler leader (SowingWindowService.rebuild_missing)
+
+
+def downgrade():
+    op.drop_index('ix_sowing_window_id', table_name='sowing_window')
+    op.drop_table('sowing_window')
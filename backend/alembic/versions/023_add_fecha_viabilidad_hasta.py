@@ -0,0 +1,43 @@
+"""add generated fecha_viabilidad_hasta to lotes_semillas
+
+Revision ID: 023_add_fecha_viabilidad_hasta
+Revises: 022_add_sowing_window_table
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '023_add_fecha_viabilidad_hasta'
+down_revision = '022_add_sowing_window_table'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with models.FECHA_VIABILIDAD_HASTA_SQL
+FECHA_VIABILIDAD_HASTA_SQL = (
+    "CAST(COALESCE(CAST(fecha_adquisicion AS date), make_date(anno_produccion, 1, 1))"
+    " + make_interval(years => anos_viabilidad_semilla) AS date)"
+)
+
+
+def upgrade():
+    op.add_column(
+        'lotes_semillas',
+        sa.Column(
+            'fecha_viabilidad_hasta',
+            sa.Date(),
+            sa.Computed(FECHA_VIABILIDAD_HASTA_SQL, persisted=True),
+            nullable=True
+        )
+    )
+    
+    # Range scans for the daily expiry job (all users) and per-user views
+    op.create_index('ix_lotes_semillas_fecha_viabilidad_hasta', 'lotes_semillas', ['fecha_viabilidad_hasta'])
+    op.create_index('ix_lotes_semillas_usuario_viabilidad', 'lotes_semillas', ['usuario_id', 'fecha_viabilidad_hasta'])
+
+
+def downgrade():
+    op.drop_index('ix_lotes_semillas_usuario_viabilidad', table_name='lotes_semillas')
+    op.drop_index('ix_lotes_semillas_fecha_viabilidad_hasta', table_name='lotes_semillas')
+    op.drop_column('lotes_semillas', 'fecha_viabilidad_hasta')
@@ -0,0 +1,42 @@
+"""add scheduler shards table
+
+Revision ID: 025_add_scheduler_shards_table
+Revises: 024_add_notification_outbox_table
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '025_add_scheduler_shards_table'
+down_revision = '024_add_notification_outbox_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduler_shards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(100), nullable=False),
+        sa.Column('run_key', sa.String(50), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('shard_count', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('worker', sa.String(100), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id', 'run_key', 'shard', name='uq_scheduler_shards_job_run_shard')
+    )
+    op.create_index('ix_scheduler_shards_id', 'scheduler_shards', ['id'])
+    op.create_index('ix_scheduler_shards_status', 'scheduler_shards', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_scheduler_shards_status', table_name='scheduler_shards')
+    op.drop_index('ix_scheduler_shards_id', table_name='scheduler_shards')
+    op.drop_table('scheduler_shards')
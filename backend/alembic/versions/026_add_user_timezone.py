@@ -0,0 +1,25 @@
+"""add user timezone
+
+Revision ID: 026_add_user_timezone
+Revises: 025_add_scheduler_shards_table
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '026_add_user_timezone'
+down_revision = '025_add_scheduler_shards_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('timezone', sa.String(64), nullable=True))
+    op.create_index('ix_users_timezone', 'users', ['timezone'])
+
+
+def downgrade():
+    op.drop_index('ix_users_timezone', table_name='users')
+    op.drop_column('users', 'timezone')
@@ -0,0 +1,109 @@
+"""partition notification history by month
+
+Revision ID: 027_partition_notification_history
+Revises: 026_add_user_timezone
+Create Date: 2026-10-19
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '027_partition_notification_history'
+down_revision = '026_add_user_timezone'
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of the current month (NOTIFICATION_HISTORY_MONTHS_AHEAD)
+MONTHS_AHEAD = 3
+
+COLUMNS = "usuario_id, notification_type, title, body, data, sent_at, success, error_message, created_at"
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(month):
+    name = f"notification_history_y{month.year:04d}m{month.month:02d}"
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF notification_history "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    exists = sa.inspect(bind).has_table('notification_history')
+    if exists:
+        op.execute("ALTER TABLE notification_history RENAME TO notification_history_old")
+        op.execute("ALTER SEQUENCE IF EXISTS notification_history_id_seq RENAME TO notification_history_old_id_seq")
+        op.execute("ALTER INDEX IF EXISTS notification_history_pkey RENAME TO notification_history_old_pkey")
+        op.execute("ALTER INDEX IF EXISTS ix_notification_history_id RENAME TO ix_notification_history_old_id")
+
+    op.execute("""
+        CREATE TABLE notification_history (
+            id BIGSERIAL NOT NULL,
+            usuario_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            notification_type VARCHAR(100) NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            body TEXT NOT NULL,
+            data JSON,
+            sent_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            success BOOLEAN,
+            error_message TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, sent_at)
+        ) PARTITION BY RANGE (sent_at)
+    """)
+    op.create_index('ix_notification_history_usuario_sent_at', 'notification_history', ['usuario_id', 'sent_at'])
+
+    # Monthly partitions covering the existing rows and the coming months
+    current = date.today().replace(day=1)
+    first = current
+    if exists:
+        oldest = bind.execute(sa.text("SELECT min(sent_at) FROM notification_history_old")).scalar()
+        if oldest is not None:
+            first = min(first, date(oldest.year, oldest.month, 1))
+    month = first
+    while month <= _add_months(current, MONTHS_AHEAD):
+        _create_partition(month)
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE IF NOT EXISTS notification_history_default PARTITION OF notification_history DEFAULT")
+
+    if exists:
+        op.execute(
+            f"INSERT INTO notification_history ({COLUMNS}) "
+            f"SELECT usuario_id, notification_type, title, body, data, "
+            f"COALESCE(sent_at, created_at, CURRENT_TIMESTAMP), success, error_message, created_at "
+            f"FROM notification_history_old"
+        )
+        op.execute("DROP TABLE notification_history_old")
+
+
+def downgrade():
+    op.execute("ALTER TABLE notification_history RENAME TO notification_history_partitioned")
+    op.execute("""
+        CREATE TABLE notification_history (
+            id SERIAL PRIMARY KEY,
+            usuario_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            notification_type VARCHAR(100) NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            body TEXT NOT NULL,
+            data JSON,
+            sent_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            success BOOLEAN,
+            error_message TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.create_index('ix_notification_history_id', 'notification_history', ['id'])
+    op.execute(
+        f"INSERT INTO notification_history ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM notification_history_partitioned"
+    )
+    # Dropping the parent drops all its partitions
+    op.execute("DROP TABLE notification_history_partitioned")
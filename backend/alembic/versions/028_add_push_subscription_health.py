@@ -0,0 +1,25 @@
+"""add push subscription health columns
+
+Revision ID: 028_add_push_subscription_health
+Revises: 027_partition_notification_history
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '028_add_push_subscription_health'
+down_revision = '027_partition_notification_history'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('push_subscriptions', sa.Column('consecutive_failures', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('push_subscriptions', sa.Column('last_checked_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('push_subscriptions', 'last_checked_at')
+    op.drop_column('push_subscriptions', 'consecutive_failures')
@@ -0,0 +1,24 @@
+"""add keyset pagination index on lotes semillas
+
+Revision ID: 029_add_lotes_keyset_index
+Revises: 028_add_push_subscription_health
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '029_add_lotes_keyset_index'
+down_revision = '028_add_push_subscription_health'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The cursor is (created_at, id): rows without created_at would never be paged
+    op.execute("UPDATE lotes_semillas SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    op.create_index('ix_lotes_semillas_usuario_created_id', 'lotes_semillas', ['usuario_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_lotes_semillas_usuario_created_id', table_name='lotes_semillas')
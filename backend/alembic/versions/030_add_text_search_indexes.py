@@ -0,0 +1,67 @@
+"""add trigram and full-text search indexes
+
+Revision ID: 030_add_text_search_indexes
+Revises: 029_add_lotes_keyset_index
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '030_add_text_search_indexes'
+down_revision = '029_add_lotes_keyset_index'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with models.SEARCH_VECTOR_SQL
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('spanish'::regconfig, lorapp_unaccent("
+    "coalesce(nombre_comercial, '') || ' ' || coalesce(marca, ''))), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, lorapp_unaccent("
+    "coalesce(nombre_comercial, '') || ' ' || coalesce(marca, ''))), 'B')"
+)
+
+# (index, table, column) - GIN trigram indexes on the unaccented text
+TRIGRAM_INDEXES = [
+    ('ix_lotes_semillas_nombre_comercial_trgm', 'lotes_semillas', 'nombre_comercial'),
+    ('ix_lotes_semillas_marca_trgm', 'lotes_semillas', 'marca'),
+    ('ix_plantaciones_nombre_plantacion_trgm', 'plantaciones', 'nombre_plantacion'),
+    ('ix_especies_nombre_comun_trgm', 'especies', 'nombre_comun'),
+    ('ix_variedades_nombre_variedad_trgm', 'variedades', 'nombre_variedad'),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() is only STABLE (it depends on search_path); pinning the
+    # dictionary makes it safe to use in indexes and generated columns
+    op.execute("""
+        CREATE OR REPLACE FUNCTION lorapp_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+
+    for name, table, column in TRIGRAM_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {table} USING gin (lorapp_unaccent({column}) gin_trgm_ops)")
+
+    op.add_column(
+        'lotes_semillas',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_SQL, persisted=True),
+            nullable=True
+        )
+    )
+    op.create_index('ix_lotes_semillas_search_vector', 'lotes_semillas', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_lotes_semillas_search_vector', table_name='lotes_semillas')
+    op.drop_column('lotes_semillas', 'search_vector')
+    for name, table, _ in TRIGRAM_INDEXES:
+        op.drop_index(name, table_name=table)
+    op.execute("DROP FUNCTION IF EXISTS lorapp_unaccent(text)")
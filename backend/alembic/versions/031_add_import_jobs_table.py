@@ -0,0 +1,44 @@
+"""add import jobs table
+
+Revision ID: 031_add_import_jobs_table
+Revises: 030_add_text_search_indexes
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '031_add_import_jobs_table'
+down_revision = '030_add_text_search_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(255), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('processed_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('imported', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_errors', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('errors', sa.JSON(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['usuario_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_import_jobs_id', 'import_jobs', ['id'])
+    op.create_index('ix_import_jobs_usuario_id', 'import_jobs', ['usuario_id'])
+
+
+def downgrade():
+    op.drop_index('ix_import_jobs_usuario_id', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_id', table_name='import_jobs')
+    op.drop_table('import_jobs')
@@ -0,0 +1,30 @@
+"""add inventory versions table
+
+Revision ID: 032_add_inventory_versions_table
+Revises: 031_add_import_jobs_table
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '032_add_inventory_versions_table'
+down_revision = '031_add_import_jobs_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows are created by the first bump; a missing row is version 0
+    op.create_table(
+        'inventory_versions',
+        sa.Column('usuario_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('usuario_id')
+    )
+
+
+def downgrade():
+    op.drop_table('inventory_versions')
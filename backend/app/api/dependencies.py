@@ -48,6 +48,14 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Feed tokens (scope "ics") only grant read access to the ICS feed
+    if payload.get("scope") is not None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token scope",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     # Extract user ID from payload (convert string to int)
     user_id_str: Optional[str] = payload.get("sub")
     if user_id_str is None:
@@ -0,0 +1,145 @@
+"""
+Sparse fieldsets and expansions.
+`fields=` picks the attributes of a response and `expand=` the nested
+relationships to embed (dotted for deeper levels: variedad.especie). The
+same selection builds the loader options of the query, so only the
+requested columns are read and only the expanded relationships joined, and
+a pydantic model restricted to those attributes serializes the rows.
+"""
+
+from fastapi import HTTPException, status
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy.orm import joinedload, load_only
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Type, Union, get_args, get_origin
+
+# Se devuelve siempre, aunque no se pida
+ALWAYS_INCLUDED = frozenset({"id"})
+
+
+class FieldSet(NamedTuple):
+    """Requested attributes and expansions of a response"""
+    fields: FrozenSet[str]
+    expand: FrozenSet[str]
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    """Model of a relationship field (X or Optional[X]), None for plain values"""
+    candidates = get_args(annotation) if get_origin(annotation) is Union else (annotation,)
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def scalar_fields(model: Type[BaseModel]) -> List[str]:
+    """Attributes of a response model that are not nested models"""
+    return [name for name, info in model.model_fields.items() if _nested_model(info.annotation) is None]
+
+
+def expansions(model: Type[BaseModel], prefix: str = "") -> List[str]:
+    """Expandable relationship paths of a response model (variedad, variedad.especie...)"""
+    paths = []
+    for name, info in model.model_fields.items():
+        nested = _nested_model(info.annotation)
+        if nested is not None:
+            paths.append(prefix + name)
+            paths.extend(expansions(nested, f"{prefix}{name}."))
+    return paths
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def parse_fieldset(model: Type[BaseModel], fields: Optional[str], expand: Optional[str]) -> Optional[FieldSet]:
+    """
+    Validate the fields= and expand= query parameters of a response model.
+
+    Args:
+        model: Full response model
+        fields: Comma-separated attributes; all of them when omitted
+        expand: Comma-separated relationships; none when omitted
+
+    Returns:
+        The selection, or None when neither parameter is sent (full response)
+
+    Raises:
+        HTTPException: On unknown fields or expansions
+    """
+    if fields is None and expand is None:
+        return None
+
+    allowed = scalar_fields(model)
+    selected = set(_split(fields)) if fields is not None else set(allowed)
+    expanded = set(_split(expand))
+    unknown = sorted(selected - set(allowed)) + sorted(expanded - set(expansions(model)))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields or expansions: {', '.join(unknown)}"
+        )
+
+    # variedad.especie implica variedad
+    for path in list(expanded):
+        parts = path.split(".")
+        expanded.update(".".join(parts[:depth]) for depth in range(1, len(parts)))
+    return FieldSet(frozenset(selected | ALWAYS_INCLUDED), frozenset(expanded))
+
+
+@lru_cache(maxsize=256)
+def partial_model(
+    model: Type[BaseModel], fields: Optional[FrozenSet[str]], expand: FrozenSet[str]
+) -> Type[BaseModel]:
+    """
+    Build (once per selection) a copy of a response model restricted to a selection.
+
+    Validating an ORM object with it only reads the selected attributes,
+    so deferred columns and lazy relationships are never loaded.
+
+    Args:
+        model: Full response model
+        fields: Attributes to keep (None: all of them)
+        expand: Relationship paths to embed, relative to this model
+
+    Returns:
+        Pydantic model with from_attributes enabled
+    """
+    definitions = {}
+    for name, info in model.model_fields.items():
+        nested = _nested_model(info.annotation)
+        if nested is None:
+            if fields is None or name in fields:
+                definitions[name] = (info.annotation, info)
+        elif name in expand:
+            inner = frozenset(path[len(name) + 1:] for path in expand if path.startswith(f"{name}."))
+            definitions[name] = (Optional[partial_model(nested, None, inner)], None)
+    return create_model(
+        f"{model.__name__}Partial", __config__=ConfigDict(from_attributes=True), **definitions
+    )
+
+
+def load_options(entity, fieldset: FieldSet, required: Iterable[str] = ()) -> list:
+    """
+    Loader options for a selection: load_only of the selected columns and
+    one joinedload chain per expanded relationship.
+
+    Args:
+        entity: Mapped class whose attributes are named like the response fields
+        fieldset: Selection from parse_fieldset
+        required: Columns the endpoint needs besides the selection (e.g. for cursors)
+
+    Returns:
+        Options for Query.options()
+    """
+    options = [load_only(*[getattr(entity, name) for name in sorted(fieldset.fields | set(required))])]
+    # Solo las hojas: cada cadena joinedload ya carga los niveles intermedios
+    leaves = [path for path in fieldset.expand if not any(other.startswith(f"{path}.") for other in fieldset.expand)]
+    for path in sorted(leaves):
+        loader, cls = None, entity
+        for name in path.split("."):
+            attribute = getattr(cls, name)
+            loader = joinedload(attribute) if loader is None else loader.joinedload(attribute)
+            cls = attribute.property.mapper.class_
+        options.append(loader)
+    return options
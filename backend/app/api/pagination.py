@@ -0,0 +1,48 @@
+"""
+Keyset (cursor) pagination helpers.
+Lists are ordered by (created_at DESC, id DESC) and a page continues
+strictly after the last row of the previous one, so the cost of a page
+does not depend on how deep it is (no OFFSET scan).
+"""
+
+from fastapi import HTTPException, status
+from datetime import datetime
+from typing import Tuple
+import base64
+
+# Cabeceras de respuesta de los listados paginados
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Build the opaque cursor pointing after a row.
+
+    Args:
+        created_at: created_at of the last row of the page
+        row_id: id of the last row of the page
+
+    Returns:
+        URL-safe token
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Parse a cursor built by encode_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        ) from e
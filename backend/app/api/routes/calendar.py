@@ -3,18 +3,34 @@ Calendar API routes.
 Provides agricultural calendar views and task management.
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
-from datetime import datetime
+from typing import Dict, Any, List, Optional
+from datetime import date, datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
 
 from app.api.dependencies import get_current_user, get_db
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token
 from app.infrastructure.database.models import User
 from app.application.services.calendar_service import calendar_service
+from app.application.services.ics_feed_service import ics_feed_service
+from app.application.services.timeline_service import (
+    timeline_service, PHASE_GERMINATION, PHASE_TRANSPLANT, PHASE_HARVEST
+)
 
 
 router = APIRouter(prefix="/calendar", tags=["Calendar"])
 
+# Rango máximo de días para /timeline
+MAX_TIMELINE_DAYS = 366
+
+# Scope de los tokens de suscripción al feed ICS
+ICS_TOKEN_SCOPE = "ics"
+ICS_MEDIA_TYPE = "text/calendar; charset=utf-8"
+
 
 @router.get("/test")
 async def test_endpoint():
@@ -156,6 +172,50 @@ async def get_upcoming_transplants(
     return transplants
 
 
+@router.get("/timeline", response_model=Dict[str, Any])
+async def get_timeline(
+    start: Optional[date] = Query(None, description="First day (YYYY-MM-DD), default today"),
+    end: Optional[date] = Query(None, description="Last day (YYYY-MM-DD), default start + 30 days"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the day-by-day timeline of the user's plantaciones.
+
+    - **start**: First day of the range (default: today)
+    - **end**: Last day of the range (default: start + 30 days, max 366 days)
+
+    Returns, for each day with activity, the germination, transplant and
+    harvest phases in progress.
+    """
+    start = start or date.today()
+    end = end or start + timedelta(days=30)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+    if (end - start).days > MAX_TIMELINE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range cannot exceed {MAX_TIMELINE_DAYS} days"
+        )
+
+    timeline = timeline_service.build(current_user.id, db)
+    days = timeline.by_day(start, end)
+
+    summary = {PHASE_GERMINATION: 0, PHASE_TRANSPLANT: 0, PHASE_HARVEST: 0}
+    for event in timeline.between(start, end):
+        summary[event.phase] += 1
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": [
+            {"date": day.isoformat(), "events": [event.to_dict() for event in events]}
+            for day, events in days.items()
+        ],
+        "summary": summary
+    }
+
+
 @router.get("/expiring-seeds", response_model=List[Dict[str, Any]])
 async def get_expiring_seeds(
     days: int = Query(30, ge=1, le=365, description="Days to look ahead"),
@@ -219,3 +279,90 @@ async def get_seed_summary(
         user=current_user,
         db=db
     )
+
+
+@router.get("/feed/token", response_model=Dict[str, Any])
+async def get_ics_feed_token(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a subscription URL for the user's ICS calendar feed.
+
+    Calendar apps cannot send the Authorization header, so the feed URL
+    carries a long-lived token that only grants access to the feed.
+    """
+    token = create_access_token(
+        {"sub": str(current_user.id), "scope": ICS_TOKEN_SCOPE},
+        expires_delta=timedelta(days=settings.ICS_FEED_TOKEN_DAYS)
+    )
+    return {
+        "token": token,
+        "url": str(request.url_for("get_ics_feed", token=token)),
+        "expires_in_days": settings.ICS_FEED_TOKEN_DAYS
+    }
+
+
+def _not_modified(
+    etag: str,
+    last_modified: datetime,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str]
+) -> bool:
+    """Evaluate conditional request headers (If-None-Match wins)"""
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return last_modified <= since
+    return False
+
+
+@router.get("/feed/{token}.ics", name="get_ics_feed")
+async def get_ics_feed(
+    token: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
+    """
+    ICS feed with planting windows, seed expirations and plantation phases.
+
+    Served with ETag/Last-Modified derived from the stored data of the feed
+    (one aggregate query, the same in every worker): conditional polls are
+    answered with 304 before anything else, cached versions are served from
+    memory and fresh feeds are streamed while generated.
+    """
+    payload = decode_access_token(token)
+    if payload is None or payload.get("scope") != ICS_TOKEN_SCOPE:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=404, detail="Feed not found")
+
+    version = await run_in_threadpool(ics_feed_service.current_version, user_id)
+    etag = f'W/"{version.tag}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(version.changed_at, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+    if _not_modified(etag, version.changed_at, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+
+    cached = ics_feed_service.get_cached(user_id, version)
+    if cached is not None:
+        return Response(content=cached.body, media_type=ICS_MEDIA_TYPE, headers=headers)
+
+    return StreamingResponse(
+        ics_feed_service.stream(user_id, version),
+        media_type=ICS_MEDIA_TYPE,
+        headers=headers
+    )
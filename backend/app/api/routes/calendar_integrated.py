@@ -13,6 +13,9 @@ from app.api.dependencies import get_current_user, get_db
 from app.infrastructure.database.models import User
 from app.application.services.lunar_api_service import LunarApiService
 from app.application.services.weather_cache_service import WeatherCacheService
+from app.application.services.columnar_format import (
+    FORMAT_ROWS, FORMAT_COLUMNAR, FORMAT_PATTERN, condition_code, legend, phase_code, rounded, to_columns
+)
 
 router = APIRouter(prefix="/calendar-integrated", tags=["Integrated Calendar"])
 
@@ -21,6 +24,7 @@ router = APIRouter(prefix="/calendar-integrated", tags=["Integrated Calendar"])
 async def get_integrated_month(
     year: int,
     month: int,
+    format: str = Query(FORMAT_ROWS, pattern=FORMAT_PATTERN, description="rows|columnar"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,6 +36,10 @@ async def get_integrated_month(
     - Lunar phases (moon_phase, illumination, moonrise/set)
     - Weather (temp_min/max, precipitation_mm, chance_of_rain, condition)
     - Agricultural info (plantable_seeds count, viabilidad, days_to_harvest)
+    
+    With format=columnar, `days` is replaced by `columns` (one array per
+    field, without rise/set times) and phases/conditions are sent as
+    numeric codes described in `legend`.
     """
     
     # Get user's location
@@ -142,6 +150,26 @@ async def get_integrated_month(
     
     integrated_month["summary"]["total_plantable_seeds"] = plantable_count
     
+    if format == FORMAT_COLUMNAR:
+        days_data = integrated_month.pop("days")
+        integrated_month["format"] = FORMAT_COLUMNAR
+        integrated_month["legend"] = legend("phase", "condition")
+        integrated_month["columns"] = to_columns(days_data, {
+            "date": lambda d: d["date"],
+            "phase": lambda d: phase_code(d["lunar"]["phase"], date.fromisoformat(d["date"])),
+            "illumination": lambda d: rounded(d["lunar"]["illumination"]),
+            "temp_max": lambda d: rounded(d["weather"]["temperature"]["max_c"]),
+            "temp_min": lambda d: rounded(d["weather"]["temperature"]["min_c"]),
+            "temp_avg": lambda d: rounded(d["weather"]["temperature"]["avg_c"]),
+            "precipitation": lambda d: rounded(d["weather"]["precipitation"]["mm"]),
+            "chance_of_rain": lambda d: d["weather"]["precipitation"]["chance_of_rain"],
+            "condition": lambda d: condition_code(d["weather"]["condition"]),
+            "wind_kph": lambda d: rounded(d["weather"]["wind_kph"]),
+            "humidity": lambda d: d["weather"]["humidity"],
+            "uv_index": lambda d: rounded(d["weather"]["uv_index"]),
+            "plantable_seeds": lambda d: d["plantable_seeds"]
+        })
+    
     return integrated_month
 
 
@@ -11,6 +11,9 @@ from calendar import monthrange
 from app.api.dependencies import get_current_user, get_db
 from app.infrastructure.database.models import User
 from app.application.services.lunar_api_service import LunarApiService
+from app.application.services.columnar_format import (
+    FORMAT_ROWS, FORMAT_COLUMNAR, FORMAT_PATTERN, legend, phase_code, rounded, to_columns
+)
 
 router = APIRouter(prefix="/lunar", tags=["Lunar Calendar"])
 
@@ -19,6 +22,7 @@ router = APIRouter(prefix="/lunar", tags=["Lunar Calendar"])
 async def get_lunar_month(
     year: int,
     month: int,
+    format: str = Query(FORMAT_ROWS, pattern=FORMAT_PATTERN, description="rows|columnar"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -27,6 +31,9 @@ async def get_lunar_month(
     Returns day-by-day lunar phases with rise/set times.
     
     Uses user's location if set, otherwise defaults to Vitoria-Gasteiz.
+    
+    With format=columnar, `days` is replaced by `columns` (one array per
+    field) and phases are sent as numeric codes described in `legend`.
     """
     # Get user's location
     location = current_user.location or "Vitoria-Gasteiz,Spain"
@@ -61,16 +68,32 @@ async def get_lunar_month(
                 "sunset": lunar_data.get("sunset")
             })
     
-    return {
+    response = {
         "year": year,
         "month": month,
         "location": location,
         "coordinates": {
             "latitude": latitude,
             "longitude": longitude
-        },
-        "days": lunar_days
+        }
     }
+    
+    if format == FORMAT_COLUMNAR:
+        response["format"] = FORMAT_COLUMNAR
+        response["legend"] = legend("phase")
+        response["columns"] = to_columns(lunar_days, {
+            "date": lambda d: d["date"],
+            "phase": lambda d: phase_code(d["moon_phase"], date.fromisoformat(d["date"])),
+            "illumination": lambda d: rounded(d["illumination"]),
+            "moonrise": lambda d: d["moonrise"],
+            "moonset": lambda d: d["moonset"],
+            "sunrise": lambda d: d["sunrise"],
+            "sunset": lambda d: d["sunset"]
+        })
+        return response
+    
+    response["days"] = lunar_days
+    return response
 
 
 @router.get("/today")
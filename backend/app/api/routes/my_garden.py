@@ -11,6 +11,9 @@ from datetime import datetime, date
 from pydantic import BaseModel, Field
 
 from app.api.dependencies import get_current_user, get_db
+from app.api.serialization import validate_list, json_list_response
+from app.application.services.inventory_version_service import inventory_version_service
+from app.application.services.text_search_service import text_search_service
 from app.infrastructure.database.models import User, Plantacion, LoteSemillas, Variedad, Especie, EstadoPlantacion
 
 
@@ -107,26 +110,21 @@ async def list_garden_plantings(
             pass  # Ignorar filtro inválido
     
     if search:
-        search_filter = f"%{search}%"
+        search_columns = [Plantacion.nombre_plantacion, Especie.nombre_comun, Variedad.nombre_variedad]
         query = query.filter(
-            or_(
-                Plantacion.nombre_plantacion.ilike(search_filter),
-                Especie.nombre_comun.ilike(search_filter),
-                Variedad.nombre_variedad.ilike(search_filter)
-            )
-        )
+            or_(*[text_search_service.contains(column, search) for column in search_columns])
+        ).order_by(text_search_service.similarity(search_columns, search).desc())
     
-    plantings = query.order_by(Plantacion.created_at.desc()).all()
+    rows = query.add_columns(Variedad.nombre_variedad, Especie.nombre_comun)\
+        .order_by(Plantacion.created_at.desc()).all()
     
-    # Construir respuestas con información relacionada
-    results = []
-    for planting in plantings:
-        data = PlantingResponse.from_orm(planting)
-        data.variedad_nombre = planting.lote_semillas.variedad.nombre_variedad if planting.lote_semillas and planting.lote_semillas.variedad else None
-        data.especie_nombre = planting.lote_semillas.variedad.especie.nombre_comun if planting.lote_semillas and planting.lote_semillas.variedad and planting.lote_semillas.variedad.especie else None
-        results.append(data)
+    # Validación en bloque; los nombres relacionados vienen de los JOIN de la consulta
+    results = validate_list(PlantingResponse, [row[0] for row in rows])
+    for data, (_, variedad_nombre, especie_nombre) in zip(results, rows):
+        data.variedad_nombre = variedad_nombre
+        data.especie_nombre = especie_nombre
     
-    return results
+    return json_list_response(PlantingResponse, results, validated=True)
 
 
 @router.post("/", response_model=PlantingResponse, status_code=status.HTTP_201_CREATED)
@@ -165,6 +163,7 @@ async def create_garden_planting(
     )
     
     db.add(new_planting)
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(new_planting)
     
@@ -237,6 +236,7 @@ async def update_garden_planting(
         else:
             setattr(planting, field, value)
     
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(planting)
     
@@ -270,6 +270,7 @@ async def delete_garden_planting(
         )
     
     db.delete(planting)
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     
     return None
@@ -11,6 +11,9 @@ from datetime import datetime, date
 from pydantic import BaseModel, Field
 
 from app.api.dependencies import get_current_user, get_db
+from app.api.serialization import validate_list, json_list_response
+from app.application.services.inventory_version_service import inventory_version_service
+from app.application.services.text_search_service import text_search_service
 from app.infrastructure.database.models import User, Plantacion, LoteSemillas, Variedad, Especie, EstadoPlantacion
 
 
@@ -109,32 +112,26 @@ async def list_seedlings(
             query = query.filter(Plantacion.estado == EstadoPlantacion.GERMINADA)
     
     if search:
-        search_filter = f"%{search}%"
+        search_columns = [Plantacion.nombre_plantacion, Especie.nombre_comun, Variedad.nombre_variedad]
         query = query.filter(
-            or_(
-                Plantacion.nombre_plantacion.ilike(search_filter),
-                Especie.nombre_comun.ilike(search_filter),
-                Variedad.nombre_variedad.ilike(search_filter)
-            )
-        )
+            or_(*[text_search_service.contains(column, search) for column in search_columns])
+        ).order_by(text_search_service.similarity(search_columns, search).desc())
     
-    seedlings = query.order_by(Plantacion.created_at.desc()).all()
+    rows = query.add_columns(Variedad.nombre_variedad, Especie.nombre_comun)\
+        .order_by(Plantacion.created_at.desc()).all()
     
-    # Construir respuestas con información relacionada
-    results = []
-    for seedling in seedlings:
-        data = SeedlingResponse.from_orm(seedling)
-        data.variedad_nombre = seedling.lote_semillas.variedad.nombre_variedad if seedling.lote_semillas and seedling.lote_semillas.variedad else None
-        data.especie_nombre = seedling.lote_semillas.variedad.especie.nombre_comun if seedling.lote_semillas and seedling.lote_semillas.variedad and seedling.lote_semillas.variedad.especie else None
+    # Validación en bloque; los nombres relacionados vienen de los JOIN de la consulta
+    results = validate_list(SeedlingResponse, [row[0] for row in rows])
+    for data, (seedling, variedad_nombre, especie_nombre) in zip(results, rows):
+        data.variedad_nombre = variedad_nombre
+        data.especie_nombre = especie_nombre
         
         # Calcular días desde siembra
         if seedling.fecha_siembra:
             delta = datetime.now() - seedling.fecha_siembra
             data.dias_desde_siembra = delta.days
-        
-        results.append(data)
     
-    return results
+    return json_list_response(SeedlingResponse, results, validated=True)
 
 
 @router.post("/", response_model=SeedlingResponse, status_code=status.HTTP_201_CREATED)
@@ -172,6 +169,7 @@ async def create_seedling(
     )
     
     db.add(new_seedling)
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(new_seedling)
     
@@ -249,6 +247,7 @@ async def update_seedling(
         else:
             setattr(seedling, field, value)
     
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(seedling)
     
@@ -297,6 +296,7 @@ async def transplant_seedling(
     # Cambiar tipo de siembra de "semillero" a "exterior" o "terraza"
     seedling.tipo_siembra = "exterior"
     
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(seedling)
     
@@ -334,6 +334,7 @@ async def delete_seedling(
         )
     
     db.delete(seedling)
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     
     return None
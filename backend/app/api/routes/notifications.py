@@ -41,11 +41,12 @@ async def subscribe_to_push(
     
     if existing:
         # Update existing subscription
-        existing.user_id = current_user.id
+        existing.usuario_id = current_user.id
         existing.expiration_time = subscription_data.expiration_time
         existing.p256dh = subscription_data.keys["p256dh"]
         existing.auth = subscription_data.keys["auth"]
         existing.is_active = True
+        existing.consecutive_failures = 0  # Re-subscribed by the browser: fresh start
         
         db.commit()
         db.refresh(existing)
@@ -54,7 +55,7 @@ async def subscribe_to_push(
     
     # Create new subscription
     new_subscription = PushSubscription(
-        user_id=current_user.id,
+        usuario_id=current_user.id,
         endpoint=subscription_data.endpoint,
         expiration_time=subscription_data.expiration_time,
         p256dh=subscription_data.keys["p256dh"],
@@ -83,7 +84,7 @@ async def unsubscribe_from_push(
     """
     subscription = db.query(PushSubscription).filter(
         PushSubscription.endpoint == endpoint,
-        PushSubscription.user_id == current_user.id
+        PushSubscription.usuario_id == current_user.id
     ).first()
     
     if not subscription:
@@ -111,7 +112,7 @@ async def send_test_notification(
     """
     # Get user's active subscriptions
     subscriptions = db.query(PushSubscription).filter(
-        PushSubscription.user_id == current_user.id,
+        PushSubscription.usuario_id == current_user.id,
         PushSubscription.is_active == True
     ).all()
     
@@ -122,7 +123,7 @@ async def send_test_notification(
         )
     
     # Send test notification
-    result = push_service.send_to_user(
+    result = await push_service.send_to_user(
         subscriptions=subscriptions,
         title="🌱 Lorapp - Prueba de notificación",
         body="Las notificaciones funcionan correctamente ✅",
@@ -158,7 +159,7 @@ async def get_subscriptions(
     Returns list of active and inactive subscriptions.
     """
     subscriptions = db.query(PushSubscription).filter(
-        PushSubscription.user_id == current_user.id
+        PushSubscription.usuario_id == current_user.id
     ).all()
     
     return [PushSubscriptionResponse.from_orm(sub) for sub in subscriptions]
@@ -10,6 +10,7 @@ from typing import List, Optional
 import logging
 
 from app.api.dependencies import get_current_user, get_db
+from app.api.serialization import json_list_response
 from app.infrastructure.database.models import User, Especie, Variedad, SquareFootGardening
 from pydantic import BaseModel, Field
 from datetime import datetime
@@ -203,9 +204,10 @@ async def get_planting_guide(
         if sfg_data:
             data["square_foot_gardening"] = SquareFootGardeningData.model_validate(sfg_data)
         
-        results.append(PlantingGuideResponse(**data))
+        results.append(data)
     
-    return results
+    # Validación de toda la guía en una sola llamada y JSON directo
+    return json_list_response(PlantingGuideResponse, results)
 
 
 @router.get("/guide/{especie_id}", response_model=PlantingGuideResponse)
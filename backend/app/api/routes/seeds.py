@@ -1,24 +1,51 @@
 """
 Lote Semillas management API routes.
-Handles seed lot scanning with OCR, inventory CRUD, and CSV export.
+Handles seed lot scanning with OCR, inventory CRUD, batch updates, exports and CSV import.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Query, Path, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Iterator, List, Optional
+from collections import Counter
+import codecs
 import io
 import csv
 import logging
+import os
+import tempfile
 from datetime import datetime
 
 from app.api.schemas import (
     LoteSemillasCreate, LoteSemillasUpdate, LoteSemillasResponse,
     VariedadUpdate, VariedadResponse, EspecieUpdate, EspecieResponse,
-    OCRResult, MessageResponse
+    LoteBatchUpdateRequest, LoteBatchDeleteRequest, LoteBatchResponse, LoteBatchResult,
+    InventoryFacetsResponse, OCRResult, MessageResponse, ImportJobResponse
 )
 from app.api.dependencies import get_current_user, get_db
-from app.infrastructure.database.models import User, LoteSemillas, Variedad, Especie
+from app.api.fieldsets import FieldSet, parse_fieldset, partial_model, load_options
+from app.api.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.api.serialization import json_list_response, JSON_MEDIA_TYPE
+from app.core.config import settings
+from app.application.services.csv_import_service import csv_import_service, JOB_FAILED
+from app.application.services.csv_validation_service import csv_validation_service
+from app.application.services.inventory_export_service import (
+    inventory_export_service, FORMAT_PATTERN, MEDIA_TYPES, EXTENSIONS
+)
+from app.application.services.inventory_facets_service import (
+    inventory_facets_service, LoteFilters, lote_conditions
+)
+from app.application.services.inventory_version_service import inventory_version_service
+from app.application.services.lote_batch_service import (
+    lote_batch_service, BATCH_UPDATED, BATCH_DELETED, BATCH_NOT_FOUND
+)
+from app.application.services.sowing_window_service import sowing_window_service
+from app.application.services.text_search_service import text_search_service
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import User, LoteSemillas, Variedad, Especie, ImportJob
 from app.infrastructure.ocr.vision_service import ocr_service
 from app.infrastructure.storage.file_service import storage_service
 
@@ -123,66 +150,242 @@ async def create_lote(
     )
     
     db.add(new_lote)
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(new_lote)
     
     return LoteSemillasResponse.from_orm(new_lote)
 
 
-@router.get("", response_model=List[LoteSemillasResponse])
-async def list_lotes(
+# Columnas que necesita el listado aunque no se pidan (cursor de la página siguiente)
+LOTE_CURSOR_FIELDS = ("id", "created_at")
+
+
+def lote_filters(
     estado: Optional[str] = Query(None, description="Filter by estado", pattern="^(activo|agotado|vencido|descartado)$"),
     marca: Optional[str] = Query(None, description="Filter by marca"),
-    search: Optional[str] = Query(None, description="Search in nombre comercial"),
+    especie_id: Optional[int] = Query(None, description="Filter by especie"),
+    lugar_almacenamiento: Optional[str] = Query(None, description="Filter by storage place"),
+    tipo_origen: Optional[str] = Query(None, description="Filter by origin type"),
+    search: Optional[str] = Query(None, description="Search in nombre comercial and marca")
+) -> LoteFilters:
+    return LoteFilters(estado, marca, especie_id, lugar_almacenamiento, tipo_origen, search)
+
+
+def lote_fieldset(
+    fields: Optional[str] = Query(None, description="Comma-separated lote fields to return (id is always included)"),
+    expand: Optional[str] = Query(None, description="Relationships to embed: variedad, variedad.especie")
+) -> Optional[FieldSet]:
+    return parse_fieldset(LoteSemillasResponse, fields, expand)
+
+
+def lote_response_model(fieldset: Optional[FieldSet]):
+    if fieldset is None:
+        return LoteSemillasResponse
+    return partial_model(LoteSemillasResponse, fieldset.fields, fieldset.expand)
+
+
+def lote_list_response(response: Response, lotes: List[LoteSemillas], fieldset: Optional[FieldSet]) -> Response:
+    # Validación en bloque y JSON directo; conserva las cabeceras de paginación
+    return json_list_response(lote_response_model(fieldset), lotes, response)
+
+
+@router.get("", response_model=List[LoteSemillasResponse])
+async def list_lotes(
+    response: Response,
+    filters: LoteFilters = Depends(lote_filters),
+    limit: Optional[int] = Query(None, ge=1, le=settings.SEEDS_PAGE_MAX_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    include_total: bool = Query(False, description="Return the total count in X-Total-Count"),
+    fieldset: Optional[FieldSet] = Depends(lote_fieldset),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get all lotes in the user's inventory with optional filters.
+    Get the lotes in the user's inventory with optional filters, newest first.
     
     - **estado**: Filter by estado (activo, agotado, vencido, descartado)
     - **marca**: Filter by marca
-    - **search**: Search text in nombre comercial
+    - **especie_id** / **lugar_almacenamiento** / **tipo_origen**: Filter by
+      especie, storage place or origin type (values of GET /seeds/facets)
+    - **search**: Accent-insensitive search in nombre comercial and marca
+      (word forms and substrings); unpaginated results are sorted by relevance
+    - **limit** / **cursor**: Keyset pagination. The cursor of the next page is
+      returned in the X-Next-Cursor header (absent on the last page). Without
+      limit nor cursor the whole inventory is returned.
+    - **include_total**: Also count the matching lotes (X-Total-Count)
+    - **fields** / **expand**: Sparse response, e.g.
+      `fields=nombre_comercial,marca,estado,cantidad_restante`. Only these
+      columns are read; relationships are embedded only when expanded. Without
+      both parameters every field is returned with variedad.especie expanded.
     """
+    # Mismos filtros que GET /seeds/facets
     query = db.query(LoteSemillas).filter(
-        LoteSemillas.usuario_id == current_user.id
-    ).options(
-        joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
+        LoteSemillas.usuario_id == current_user.id,
+        *lote_conditions(filters).values()
     )
     
-    # Apply filters
-    if estado:
-        query = query.filter(LoteSemillas.estado == estado)
+    rank = None
+    if filters.search:
+        _, rank = text_search_service.lote_search(filters.search)
     
-    if marca:
-        query = query.filter(LoteSemillas.marca.ilike(f"%{marca}%"))
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(
+            query.with_entities(func.count(LoteSemillas.id)).scalar()
+        )
     
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            LoteSemillas.nombre_comercial.ilike(search_filter)
+    if fieldset is None:
+        query = query.options(
+            joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
+        )
+    else:
+        query = query.options(*load_options(LoteSemillas, fieldset, required=LOTE_CURSOR_FIELDS))
+    
+    if limit is None and cursor is None:
+        # Sin paginar, una búsqueda devuelve primero los resultados más relevantes
+        if rank is not None:
+            query = query.order_by(rank.desc())
+        lotes = query.order_by(LoteSemillas.created_at.desc(), LoteSemillas.id.desc()).all()
+        return lote_list_response(response, lotes, fieldset)
+    
+    query = query.order_by(LoteSemillas.created_at.desc(), LoteSemillas.id.desc())
+    
+    # Keyset: continuar estrictamente después de la última fila de la página anterior
+    if cursor:
+        created_at, lote_id = decode_cursor(cursor)
+        query = query.filter(tuple_(LoteSemillas.created_at, LoteSemillas.id) < (created_at, lote_id))
+    
+    page_size = limit or settings.SEEDS_PAGE_SIZE
+    lotes = query.limit(page_size + 1).all()
+    if len(lotes) > page_size:
+        lotes = lotes[:page_size]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(lotes[-1].created_at, lotes[-1].id)
+    
+    return lote_list_response(response, lotes, fieldset)
+
+
+def _check_batch_ids(ids: List[int]) -> None:
+    if len(ids) > settings.SEEDS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can include at most {settings.SEEDS_BATCH_MAX_SIZE} lotes"
+        )
+    duplicates = sorted(lote_id for lote_id, count in Counter(ids).items() if count > 1)
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Duplicate lote ids in batch: {duplicates}"
         )
+
+
+def _batch_response(ids: List[int], results: dict) -> LoteBatchResponse:
+    not_found = sum(1 for lote_id in ids if results[lote_id] == BATCH_NOT_FOUND)
+    return LoteBatchResponse(
+        succeeded=len(ids) - not_found,
+        not_found=not_found,
+        results=[LoteBatchResult(id=lote_id, status=results[lote_id]) for lote_id in ids]
+    )
+
+
+@router.get("/facets", response_model=InventoryFacetsResponse)
+async def get_lote_facets(
+    filters: LoteFilters = Depends(lote_filters),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Count the lotes per estado, marca, especie, storage place and origin type.
+    
+    Takes the same filters as GET /seeds. Each facet is counted with all the
+    filters except its own, so every chip of a facet keeps its count while
+    one of them is selected; **total** matches every filter. Computed in a
+    single query and cached until the inventory changes.
+    """
+    version = inventory_version_service.get(db, current_user.id)
+    return inventory_facets_service.get(db, current_user.id, filters, version)
+
+
+@router.patch("/batch", response_model=LoteBatchResponse)
+async def update_lotes_batch(
+    batch: LoteBatchUpdateRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Update many lotes in one transaction.
     
-    lotes = query.order_by(LoteSemillas.created_at.desc()).all()
+    Each item carries a lote id and the fields to change (same fields as
+    PUT /seeds/{lote_id}). Lotes that get the same changes are updated by a
+    single statement. Unknown ids or lotes of other users are reported as
+    not_found; the rest of the batch is still applied.
+    """
+    ids = [item.id for item in batch.items]
+    _check_batch_ids(ids)
+    
+    try:
+        results = lote_batch_service.update_many(
+            db, current_user.id,
+            [(item.id, item.dict(exclude_unset=True, exclude={'id'})) for item in batch.items]
+        )
+        if any(result == BATCH_UPDATED for result in results.values()):
+            inventory_version_service.bump(db, current_user.id)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        logger.warning(f"Batch update rejected for user {current_user.id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch rejected: some values are not allowed, no lote was changed"
+        )
     
-    return [LoteSemillasResponse.from_orm(lote) for lote in lotes]
+    return _batch_response(ids, results)
+
+
+@router.delete("/batch", response_model=LoteBatchResponse)
+async def delete_lotes_batch(
+    batch: LoteBatchDeleteRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Delete many lotes in one transaction, with their photos.
+    
+    Unknown ids or lotes of other users are reported as not_found.
+    """
+    _check_batch_ids(batch.ids)
+    
+    results = lote_batch_service.delete_many(db, current_user.id, batch.ids)
+    deleted = [lote_id for lote_id in batch.ids if results[lote_id] == BATCH_DELETED]
+    if deleted:
+        inventory_version_service.bump(db, current_user.id)
+    db.commit()
+    
+    for lote_id in deleted:
+        storage_service.delete_seed_folder(current_user.id, lote_id)
+    
+    return _batch_response(batch.ids, results)
 
 
 @router.get("/{lote_id}", response_model=LoteSemillasResponse)
 async def get_lote(
     lote_id: int,
+    fieldset: Optional[FieldSet] = Depends(lote_fieldset),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get detailed information about a specific lote.
+    
+    Accepts the same **fields** / **expand** parameters as the listing.
     """
+    if fieldset is None:
+        options = [joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)]
+    else:
+        options = load_options(LoteSemillas, fieldset)
     lote = db.query(LoteSemillas).filter(
         LoteSemillas.id == lote_id,
         LoteSemillas.usuario_id == current_user.id
-    ).options(
-        joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-    ).first()
+    ).options(*options).first()
     
     if not lote:
         raise HTTPException(
@@ -190,6 +393,9 @@ async def get_lote(
             detail="Lote not found"
         )
     
+    if fieldset is not None:
+        model = lote_response_model(fieldset)
+        return Response(content=model.model_validate(lote).model_dump_json(), media_type=JSON_MEDIA_TYPE)
     return LoteSemillasResponse.from_orm(lote)
 
 
@@ -221,6 +427,7 @@ async def update_lote(
     for field, value in update_data.items():
         setattr(lote, field, value)
     
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(lote)
     
@@ -478,7 +685,12 @@ async def update_variedad(
     for field, value in update_data.items():
         setattr(variedad, field, value)
 
+    inventory_version_service.bump_catalog(db)
     db.commit()
+    
+    # Recalcular las ventanas de siembra si cambia el calendario de la variedad
+    if {"meses_siembra_interior", "meses_siembra_exterior"} & update_data.keys():
+        sowing_window_service.rebuild(db, [variedad.id])
     db.refresh(variedad)
 
     return VariedadResponse.from_orm(variedad)
@@ -513,6 +725,7 @@ async def update_especie(
     for field, value in update_data.items():
         setattr(especie, field, value)
 
+    inventory_version_service.bump_catalog(db)
     db.commit()
     db.refresh(especie)
 
@@ -546,6 +759,7 @@ async def delete_lote(
     
     # Delete database entry
     db.delete(lote)
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     
     return MessageResponse(message="Lote deleted successfully")
@@ -590,365 +804,276 @@ async def export_lotes_csv(
         )
 
 
+@router.get("/export/{file_format}")
+async def export_lotes_columnar(
+    file_format: str = Path(..., pattern=FORMAT_PATTERN, description="'parquet' or 'arrow' (IPC stream)"),
+    export_type: str = Query("lotes", pattern="^(all|lotes|especies)$", description="Type of export: 'all', 'lotes', 'especies'"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export user's seed data as Parquet or Arrow IPC with typed columns.
+    
+    - **file_format**: 'parquet' (one row group per batch) or 'arrow' (IPC stream)
+    - **export_type**: same data as the CSV export ('all', 'lotes', 'especies')
+    
+    Enums and repetitive texts are dictionary-encoded, dates are dates and
+    timestamps are UTC. The file is streamed batch by batch.
+    """
+    logger.info(f"{file_format} export request from user {current_user.id}, type: {export_type}")
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"lorapp_{export_type}_{timestamp}.{EXTENSIONS[file_format]}"
+    return StreamingResponse(
+        inventory_export_service.stream(export_type, file_format, current_user.id),
+        media_type=MEDIA_TYPES[file_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-cache",
+            "Pragma": "no-cache"
+        }
+    )
+
+
+# Filas leídas por viaje al cursor de servidor y escritas por trozo de la respuesta
+EXPORT_YIELD_PER = 500
+
+LOTES_CSV_HEADER = [
+    'ID', 'Nombre Comercial', 'Especie', 'Variedad', 'Familia Cultivo',
+    'Marca', 'Año Producción', 'Fecha Vencimiento', 'Estado',
+    'Cantidad Estimada', 'Cantidad Restante', 'Lugar Almacenamiento',
+    'Origen', 'Generación', 'Notas', 'Fecha Creación'
+]
+
+ESPECIES_CSV_HEADER = [
+    'ID Especie', 'Nombre Común', 'Nombre Científico', 'Familia Botánica',
+    'Género', 'Tipo Cultivo', 'Descripción',
+    'Variedades (nombres)'
+]
+
+ALL_CSV_HEADER = [
+    'ID Lote', 'Nombre Comercial', 'Marca', 'Año Producción', 'Fecha Vencimiento',
+    'Estado', 'Cantidad Estimada', 'Cantidad Restante', 'Lugar Almacenamiento',
+    'Origen', 'Generación', 'Notas Lote',
+    'ID Variedad', 'Nombre Variedad', 'Tipo Polinización', 'Descripción Variedad',
+    'ID Especie', 'Nombre Común', 'Nombre Científico', 'Familia Botánica',
+    'Días Germinación Min', 'Días Germinación Max',
+    'Temperatura Mínima (°C)', 'Temperatura Máxima (°C)',
+    'Días Hasta Trasplante', 'Días Hasta Cosecha Min', 'Días Hasta Cosecha Max',
+    'Fecha Creación Lote'
+]
+
+
+def stream_csv(header: List[str], rows: Iterator[List[str]]) -> Iterator[bytes]:
+    """
+    Encode CSV rows as UTF-8 chunks (with BOM for Excel) as they are produced.
+    
+    Only one chunk of EXPORT_YIELD_PER rows is held in memory at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    writer.writerow(header)
+    yield codecs.BOM_UTF8 + buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate(0)
+    
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending == EXPORT_YIELD_PER:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode('utf-8')
+
+
+def csv_download(filename_prefix: str, chunks: Iterator[bytes]) -> StreamingResponse:
+    """Wrap a chunk generator in the CSV download response"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"{filename_prefix}_{timestamp}.csv"
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Encoding": "utf-8",
+            "Cache-Control": "no-cache",
+            "Pragma": "no-cache"
+        }
+    )
+
+
+def iter_export_rows(statement, row_builder, label: str) -> Iterator[List[str]]:
+    """
+    Stream query results through a server-side cursor and build CSV rows.
+    
+    Runs in its own session: the response body is produced after the request
+    handler (and its session) is done. Rows that fail to build are logged and
+    skipped; a database error ends the file early (headers are already sent).
+    
+    Args:
+        statement: select() of the ORM entity to export
+        row_builder: Callable turning an ORM object into a list of strings
+        label: Export name for logging
+    """
+    db = SessionLocal()
+    rows_written = 0
+    error_count = 0
+    try:
+        for item in db.scalars(statement.execution_options(yield_per=EXPORT_YIELD_PER)):
+            try:
+                row = row_builder(item)
+            except Exception as row_error:
+                error_count += 1
+                logger.error(f"Error writing {label} row for {item.id}: {str(row_error)}", exc_info=True)
+                continue
+            rows_written += 1
+            yield row
+    except Exception as db_error:
+        logger.error(f"Database error while streaming {label} export: {str(db_error)}", exc_info=True)
+    finally:
+        db.close()
+        logger.info(f"CSV {label} export completed: wrote {rows_written} rows, {error_count} errors")
+
+
+def lote_csv_row(lote: LoteSemillas) -> List[str]:
+    """Row of the 'lotes' export"""
+    variedad = lote.variedad
+    especie = variedad.especie if variedad else None
+    return [
+        str(lote.id or ''),
+        str(lote.nombre_comercial or ''),
+        str(especie.nombre_comun or '') if especie else '',
+        str(variedad.nombre_variedad or '') if variedad else '',
+        str(especie.familia_botanica or '') if especie else '',
+        str(lote.marca or ''),
+        str(lote.anno_produccion or ''),
+        lote.fecha_viabilidad_hasta.strftime('%Y-%m-%d') if lote.fecha_viabilidad_hasta else '',
+        str(lote.estado.value if lote.estado else ''),  # Get enum value
+        str(lote.cantidad_estimada or ''),
+        str(lote.cantidad_restante or ''),
+        str(lote.lugar_almacenamiento or ''),
+        str(lote.origen or ''),  # Origen del lote
+        str(lote.generacion or ''),  # Generación del lote
+        str(lote.notas or ''),
+        lote.created_at.strftime('%Y-%m-%d %H:%M:%S') if lote.created_at else ''
+    ]
+
+
+def especie_csv_row(especie: Especie) -> List[str]:
+    """Row of the 'especies' export"""
+    return [
+        str(especie.id or ''),
+        str(especie.nombre_comun or ''),
+        str(especie.nombre_cientifico or ''),
+        str(especie.familia_botanica or ''),
+        str(especie.genero or ''),
+        str(especie.tipo_cultivo or ''),
+        str(especie.descripcion or ''),
+        ', '.join([v.nombre_variedad for v in especie.variedades if v.nombre_variedad])
+    ]
+
+
+def lote_full_csv_row(lote: LoteSemillas) -> List[str]:
+    """Row of the 'all' export (lote with variety and species data)"""
+    variedad = lote.variedad
+    especie = variedad.especie if variedad else None
+    
+    # Datos de la variedad (incluidos los de cultivo) y de la especie
+    variedad_data = [
+        str(variedad.id or ''),
+        str(variedad.nombre_variedad or ''),
+        str(variedad.tipo_polinizacion or ''),
+        str(variedad.descripcion or ''),
+    ] if variedad else [''] * 4
+    especie_data = [
+        str(especie.id or ''),
+        str(especie.nombre_comun or ''),
+        str(especie.nombre_cientifico or ''),
+        str(especie.familia_botanica or ''),
+    ] if especie else [''] * 4
+    cultivo_data = [
+        str(variedad.dias_germinacion_min or ''),
+        str(variedad.dias_germinacion_max or ''),
+        str(variedad.temperatura_minima_c or ''),
+        str(variedad.temperatura_maxima_c or ''),
+        str(variedad.dias_hasta_trasplante or ''),
+        str(variedad.dias_hasta_cosecha_min or ''),
+        str(variedad.dias_hasta_cosecha_max or ''),
+    ] if variedad else [''] * 7
+    
+    return [
+        str(lote.id or ''),
+        str(lote.nombre_comercial or ''),
+        str(lote.marca or ''),
+        str(lote.anno_produccion or ''),
+        lote.fecha_viabilidad_hasta.strftime('%Y-%m-%d') if lote.fecha_viabilidad_hasta else '',
+        str(lote.estado.value if lote.estado else ''),
+        str(lote.cantidad_estimada or ''),
+        str(lote.cantidad_restante or ''),
+        str(lote.lugar_almacenamiento or ''),
+        str(lote.origen or ''),
+        str(lote.generacion or ''),
+        str(lote.notas or ''),
+        *variedad_data,
+        *especie_data,
+        *cultivo_data,
+        lote.created_at.strftime('%Y-%m-%d %H:%M:%S') if lote.created_at else ''
+    ]
+
+
+def _user_lotes_statement(user_id: int):
+    return select(LoteSemillas).where(
+        LoteSemillas.usuario_id == user_id
+    ).options(
+        joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
+    ).order_by(LoteSemillas.id)
+
+
 async def export_lotes_only_csv(current_user: User, db: Session):
     """
     Export user's seed inventory (lotes) to CSV file with proper UTF-8 encoding.
     
-    Returns a downloadable CSV file with all lote information.
+    Rows are read through a server-side cursor and sent as they are encoded,
+    so memory use does not grow with the inventory size.
     """
-    try:
-        logger.info(f"CSV export request from user {current_user.id}")
-        
-        # Simple query without complex joins to avoid issues
-        try:
-            lotes = db.query(LoteSemillas).filter(
-                LoteSemillas.usuario_id == current_user.id
-            ).all()
-            logger.info(f"Found {len(lotes)} lotes for user {current_user.id}")
-        except Exception as db_error:
-            logger.error(f"Database query error: {str(db_error)}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Database query error: {str(db_error)}"
-            )
-        
-        # Create CSV in memory with UTF-8 encoding
-        try:
-            # Use StringIO for text mode
-            output = io.StringIO()
-            writer = csv.writer(output, quoting=csv.QUOTE_ALL, lineterminator='\n')
-            
-            # Write header with proper Spanish characters - using BOM-safe strings
-            header = [
-                'ID', 'Nombre Comercial', 'Especie', 'Variedad', 'Familia Cultivo',
-                'Marca', 'Año Producción', 'Fecha Vencimiento', 'Estado',
-                'Cantidad Estimada', 'Cantidad Restante', 'Lugar Almacenamiento',
-                'Origen', 'Generación', 'Notas', 'Fecha Creación'
-            ]
-            writer.writerow(header)
-            logger.info(f"Wrote CSV header: {header}")
-            
-            # Write data rows
-            rows_written = 0
-            error_count = 0
-            
-            for lote in lotes:
-                try:
-                    # Get related data safely
-                    especie_nombre = ''
-                    familia_cultivo = ''
-                    variedad_nombre = ''
-                    
-                    # Try to access variedad data
-                    if lote.variedad:
-                        try:
-                            variedad_nombre = lote.variedad.nombre_variedad or ''
-                        except Exception as e:
-                            logger.warning(f"Error accessing variedad for lote {lote.id}: {e}")
-                        
-                        # Try to access especie data through variedad
-                        if lote.variedad.especie:
-                            try:
-                                especie_nombre = lote.variedad.especie.nombre_comun or ''
-                                familia_cultivo = lote.variedad.especie.familia_botanica or ''
-                            except Exception as e:
-                                logger.warning(f"Error accessing especie for lote {lote.id}: {e}")
-                    
-                    # Prepare row data - everything as string to avoid encoding issues
-                    row_data = [
-                        str(lote.id or ''),
-                        str(lote.nombre_comercial or ''),
-                        especie_nombre,
-                        variedad_nombre,
-                        familia_cultivo,
-                        str(lote.marca or ''),
-                        str(lote.anno_produccion or ''),
-                        (datetime.now() + timedelta(days=365 * (lote.anos_viabilidad_semilla or 1))).strftime('%Y-%m-%d') if lote.anos_viabilidad_semilla else '',
-                        str(lote.estado.value if lote.estado else ''),  # Get enum value
-                        str(lote.cantidad_estimada or ''),
-                        str(lote.cantidad_restante or ''),
-                        str(lote.lugar_almacenamiento or ''),
-                        str(lote.origen or ''),  # Origen del lote
-                        str(lote.generacion or ''),  # Generación del lote
-                        str(lote.notas or ''),
-                        lote.created_at.strftime('%Y-%m-%d %H:%M:%S') if lote.created_at else ''
-                    ]
-                    
-                    writer.writerow(row_data)
-                    rows_written += 1
-                    
-                    if rows_written % 10 == 0:
-                        logger.debug(f"Wrote {rows_written} rows so far")
-                    
-                except Exception as row_error:
-                    error_count += 1
-                    logger.error(f"Error writing row for lote {lote.id}: {str(row_error)}", exc_info=True)
-                    continue
-            
-            logger.info(f"CSV export completed: wrote {rows_written} rows, {error_count} errors")
-            
-            # Get CSV content
-            output.seek(0)
-            csv_content = output.getvalue()
-            output.close()
-            
-            logger.info(f"CSV content length: {len(csv_content)} chars")
-            
-            if rows_written == 0:
-                logger.warning("CSV export produced no data rows")
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"lorapp_lotes_{timestamp}.csv"
-            
-            # Convert to UTF-8 bytes with BOM for proper encoding in Excel
-            csv_bytes = csv_content.encode('utf-8-sig')
-            logger.info(f"CSV bytes prepared: {len(csv_bytes)} bytes")
-            
-            # Return as bytes with proper encoding headers
-            def generate():
-                yield csv_bytes
-            
-            return StreamingResponse(
-                generate(),
-                media_type="text/csv; charset=utf-8",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"',
-                    "Content-Encoding": "utf-8",
-                    "Cache-Control": "no-cache",
-                    "Pragma": "no-cache"
-                }
-            )
-        except Exception as csv_error:
-            logger.error(f"CSV creation error: {str(csv_error)}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error creating CSV: {str(csv_error)}"
-            )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error in export_lotes_only_csv: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error exporting CSV: {str(e)}"
-        )
+    logger.info(f"CSV export request from user {current_user.id}")
+    rows = iter_export_rows(_user_lotes_statement(current_user.id), lote_csv_row, "lotes")
+    return csv_download("lorapp_lotes", stream_csv(LOTES_CSV_HEADER, rows))
 
 
 async def export_especies_csv(current_user: User, db: Session):
     """
-    Export species catalog to CSV file.
+    Export species catalog to CSV file (streamed).
     """
-    try:
-        logger.info(f"CSV especies export request from user {current_user.id}")
-        
-        # Get all species with their varieties
-        especies = db.query(Especie).options(joinedload(Especie.variedades)).all()
-        logger.info(f"Found {len(especies)} species")
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output, quoting=csv.QUOTE_ALL, lineterminator='\n')
-        
-        # Write header
-        header = [
-            'ID Especie', 'Nombre Común', 'Nombre Científico', 'Familia Botánica',
-            'Género', 'Tipo Cultivo', 'Descripción',
-            'Variedades (nombres)'
-        ]
-        writer.writerow(header)
-        
-        # Write data rows
-        for especie in especies:
-            variedades_nombres = ', '.join([v.nombre_variedad for v in especie.variedades if v.nombre_variedad])
-            
-            row_data = [
-                str(especie.id or ''),
-                str(especie.nombre_comun or ''),
-                str(especie.nombre_cientifico or ''),
-                str(especie.familia_botanica or ''),
-                str(especie.genero or ''),
-                str(especie.tipo_cultivo or ''),
-                str(especie.descripcion or ''),
-                variedades_nombres
-            ]
-            writer.writerow(row_data)
-        
-        # Get CSV content
-        output.seek(0)
-        csv_content = output.getvalue()
-        output.close()
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"lorapp_especies_{timestamp}.csv"
-        
-        # Convert to UTF-8 bytes with BOM
-        csv_bytes = csv_content.encode('utf-8-sig')
-        
-        def generate():
-            yield csv_bytes
-        
-        return StreamingResponse(
-            generate(),
-            media_type="text/csv; charset=utf-8",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Encoding": "utf-8",
-                "Cache-Control": "no-cache",
-                "Pragma": "no-cache"
-            }
-        )
-    except Exception as e:
-        logger.error(f"Error in export_especies_csv: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error exporting especies CSV: {str(e)}"
-        )
+    logger.info(f"CSV especies export request from user {current_user.id}")
+    
+    # selectinload carga las variedades de cada bloque de yield_per en una consulta
+    statement = select(Especie).options(selectinload(Especie.variedades)).order_by(Especie.id)
+    rows = iter_export_rows(statement, especie_csv_row, "especies")
+    return csv_download("lorapp_especies", stream_csv(ESPECIES_CSV_HEADER, rows))
 
 
 async def export_all_csv(current_user: User, db: Session):
     """
-    Export complete data (lotes with full species and variety information) to CSV.
+    Export complete data (lotes with full species and variety information) to CSV (streamed).
     """
-    try:
-        logger.info(f"CSV complete export request from user {current_user.id}")
-        
-        # Get all lotes for the user with full joins
-        lotes = db.query(LoteSemillas).filter(
-            LoteSemillas.usuario_id == current_user.id
-        ).options(
-            joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-        ).all()
-        
-        logger.info(f"Found {len(lotes)} lotes for complete export")
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output, quoting=csv.QUOTE_ALL, lineterminator='\n')
-        
-        # Write comprehensive header
-        header = [
-            'ID Lote', 'Nombre Comercial', 'Marca', 'Año Producción', 'Fecha Vencimiento',
-            'Estado', 'Cantidad Estimada', 'Cantidad Restante', 'Lugar Almacenamiento',
-            'Origen', 'Generación', 'Notas Lote',
-            'ID Variedad', 'Nombre Variedad', 'Tipo Polinización', 'Descripción Variedad',
-            'ID Especie', 'Nombre Común', 'Nombre Científico', 'Familia Botánica',
-            'Días Germinación Min', 'Días Germinación Max',
-            'Temperatura Mínima (°C)', 'Temperatura Máxima (°C)',
-            'Días Hasta Trasplante', 'Días Hasta Cosecha Min', 'Días Hasta Cosecha Max',
-            'Fecha Creación Lote'
-        ]
-        writer.writerow(header)
-        
-        # Write data rows
-        for lote in lotes:
-            # Get variedad data
-            variedad_id = ''
-            variedad_nombre = ''
-            tipo_origen = ''
-            variedad_desc = ''
-            
-            # Get especie data
-            especie_id = ''
-            especie_nombre = ''
-            especie_cientifica = ''
-            familia = ''
-            dias_germ_min = ''
-            dias_germ_max = ''
-            temp_germ_min = ''
-            temp_germ_max = ''
-            dias_trasplante = ''
-            dias_cosecha_min = ''
-            dias_cosecha_max = ''
-            
-            if lote.variedad:
-                variedad_id = str(lote.variedad.id or '')
-                variedad_nombre = str(lote.variedad.nombre_variedad or '')
-                tipo_origen = str(lote.variedad.tipo_polinizacion or '')
-                variedad_desc = str(lote.variedad.descripcion or '')
-                
-                # Datos de cultivo de la variedad
-                dias_germ_min = str(lote.variedad.dias_germinacion_min or '')
-                dias_germ_max = str(lote.variedad.dias_germinacion_max or '')
-                temp_germ_min = str(lote.variedad.temperatura_minima_c or '')
-                temp_germ_max = str(lote.variedad.temperatura_maxima_c or '')
-                dias_trasplante = str(lote.variedad.dias_hasta_trasplante or '')
-                dias_cosecha_min = str(lote.variedad.dias_hasta_cosecha_min or '')
-                dias_cosecha_max = str(lote.variedad.dias_hasta_cosecha_max or '')
-                
-                if lote.variedad.especie:
-                    especie_id = str(lote.variedad.especie.id or '')
-                    especie_nombre = str(lote.variedad.especie.nombre_comun or '')
-                    especie_cientifica = str(lote.variedad.especie.nombre_cientifico or '')
-                    familia = str(lote.variedad.especie.familia_botanica or '')
-            
-            row_data = [
-                str(lote.id or ''),
-                str(lote.nombre_comercial or ''),
-                str(lote.marca or ''),
-                str(lote.anno_produccion or ''),
-                (datetime.now() + timedelta(days=365 * (lote.anos_viabilidad_semilla or 1))).strftime('%Y-%m-%d') if lote.anos_viabilidad_semilla else '',
-                str(lote.estado.value if lote.estado else ''),
-                str(lote.cantidad_estimada or ''),
-                str(lote.cantidad_restante or ''),
-                str(lote.lugar_almacenamiento or ''),
-                str(lote.origen or ''),
-                str(lote.generacion or ''),
-                str(lote.notas or ''),
-                variedad_id,
-                variedad_nombre,
-                tipo_origen,
-                variedad_desc,
-                especie_id,
-                especie_nombre,
-                especie_cientifica,
-                familia,
-                dias_germ_min,
-                dias_germ_max,
-                temp_germ_min,
-                temp_germ_max,
-                dias_trasplante,
-                dias_cosecha_min,
-                dias_cosecha_max,
-                lote.created_at.strftime('%Y-%m-%d %H:%M:%S') if lote.created_at else ''
-            ]
-            writer.writerow(row_data)
-        
-        # Get CSV content
-        output.seek(0)
-        csv_content = output.getvalue()
-        output.close()
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"lorapp_completo_{timestamp}.csv"
-        
-        # Convert to UTF-8 bytes with BOM
-        csv_bytes = csv_content.encode('utf-8-sig')
-        
-        def generate():
-            yield csv_bytes
-        
-        return StreamingResponse(
-            generate(),
-            media_type="text/csv; charset=utf-8",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Encoding": "utf-8",
-                "Cache-Control": "no-cache",
-                "Pragma": "no-cache"
-            }
-        )
-    except Exception as e:
-        logger.error(f"Error in export_all_csv: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error exporting complete CSV: {str(e)}"
-        )
+    logger.info(f"CSV complete export request from user {current_user.id}")
+    rows = iter_export_rows(_user_lotes_statement(current_user.id), lote_full_csv_row, "complete")
+    return csv_download("lorapp_completo", stream_csv(ALL_CSV_HEADER, rows))
+
+
+# Tamaño de los trozos al copiar la subida a disco
+UPLOAD_CHUNK_BYTES = 1024 * 1024
 
 
 @router.post("/import/csv")
 async def import_csv(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    background: bool = Query(False, description="Run as a background job and return its id"),
+    dry_run: bool = Query(False, description="Only validate the file and report every problem"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -959,214 +1084,83 @@ async def import_csv(
     Valores vacíos se guardan como NULL en la BDD.
     
     Requiere columnas: ID_Variedad, Nombre Comercial
+    
+    - **background**: if true, responds 202 with the import job right away;
+      follow it on GET /seeds/import/jobs/{job_id}. Otherwise waits for the
+      import and returns its summary.
+    - **dry_run**: validate the whole file without importing anything and
+      return the problems grouped by column
     """
-    try:
-        logger.info(f"CSV import request from user {current_user.id}")
-        
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El archivo debe ser un CSV"
-            )
-        
-        # Read file content
-        content = await file.read()
-        content_str = content.decode('utf-8-sig')  # Handle BOM
-        
-        # Parse CSV
-        csv_file = io.StringIO(content_str)
-        reader = csv.DictReader(csv_file)
-        
-        if not reader.fieldnames:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CSV vacío o sin columnas"
-            )
-        
-        imported_count = 0
-        error_rows = []
-        
-        # Mapeo entre nombres de columnas CSV y atributos del modelo
-        # Acepta múltiples variantes de nombres
-        field_mapping = {
-            'ID_Variedad': 'variedad_id',
-            'ID': 'variedad_id',  # Variante corta
-            'Nombre Comercial': 'nombre_comercial',
-            'Nombre comercial': 'nombre_comercial',
-            'Marca': 'marca',
-            'Número de Lote': 'numero_lote',
-            'Numero Lote': 'numero_lote',
-            'Cantidad Estimada': 'cantidad_estimada',
-            'Cantidad estimada': 'cantidad_estimada',
-            'Año Producción': 'anno_produccion',
-            'Año producción': 'anno_produccion',
-            'Año Recolección': 'anno_recoleccion',
-            'Año recolección': 'anno_recoleccion',
-            'Lugar Almacenamiento': 'lugar_almacenamiento',
-            'Lugar almacenamiento': 'lugar_almacenamiento',
-            'Temperatura Almacenamiento (°C)': 'temperatura_almacenamiento_c',
-            'Temperatura almacenamiento': 'temperatura_almacenamiento_c',
-            'Humedad Relativa (%)': 'humedad_relativa',
-            'Humedad relativa': 'humedad_relativa',
-            'Humedad': 'humedad_relativa',
-            'Estado': 'estado',
-            'Cantidad Restante': 'cantidad_restante',
-            'Cantidad restante': 'cantidad_restante',
-            'Origen': 'origen',
-            'Tipo Origen': 'tipo_origen',
-            'Tipo origen': 'tipo_origen',
-            'Generación': 'generacion',
-            'Generacion': 'generacion',
-            'Notas': 'notas',
-        }
-        
-        # Encontrar variantes de columnas en el CSV
-        actual_to_standard = {}
-        for csv_col in reader.fieldnames:
-            if csv_col in field_mapping:
-                actual_to_standard[csv_col] = field_mapping[csv_col]
-        
-        # Validar que tenemos al menos las columnas requeridas
-        has_variedad_id = any(field_mapping.get(col) == 'variedad_id' for col in actual_to_standard.keys())
-        has_nombre = any(field_mapping.get(col) == 'nombre_comercial' for col in actual_to_standard.keys())
-        
-        if not has_variedad_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CSV debe incluir columna 'ID' o 'ID_Variedad'"
-            )
-        
-        if not has_nombre:
+    logger.info(f"CSV import request from user {current_user.id}")
+    
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo debe ser un CSV"
+        )
+    
+    # Copiar la subida a un fichero temporal por trozos (nunca entera en memoria)
+    with tempfile.NamedTemporaryFile(prefix="lorapp_import_", suffix=".csv", delete=False) as tmp:
+        path = tmp.name
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            tmp.write(chunk)
+    
+    error = csv_import_service.header_error(path)
+    if error:
+        os.remove(path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+    
+    if dry_run:
+        try:
+            return await run_in_threadpool(csv_validation_service.validate, db, path)
+        except (ValueError, UnicodeDecodeError) as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CSV debe incluir columna 'Nombre Comercial'"
+                detail=f"CSV inválido: {str(e)}"
             )
-        
-        logger.info(f"Columnas detectadas: {list(actual_to_standard.keys())}")
-        
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                # Obtener variedad_id y nombre_comercial
-                variedad_id_str = ''
-                nombre_comercial = ''
-                
-                for csv_col, model_field in actual_to_standard.items():
-                    if model_field == 'variedad_id':
-                        variedad_id_str = row.get(csv_col, '').strip()
-                    elif model_field == 'nombre_comercial':
-                        nombre_comercial = row.get(csv_col, '').strip()
-                
-                if not variedad_id_str:
-                    error_rows.append({
-                        'fila': row_num,
-                        'nombre': nombre_comercial or '(S/N)',
-                        'error': 'Falta ID o ID_Variedad'
-                    })
-                    continue
-                
-                if not nombre_comercial:
-                    error_rows.append({
-                        'fila': row_num,
-                        'nombre': f'ID:{variedad_id_str}',
-                        'error': 'Falta Nombre Comercial'
-                    })
-                    continue
-                
-                # Validar y convertir variedad_id
-                try:
-                    variedad_id = int(variedad_id_str)
-                except ValueError:
-                    error_rows.append({
-                        'fila': row_num,
-                        'nombre': nombre_comercial,
-                        'error': f'ID_Variedad inválido: "{variedad_id_str}"'
-                    })
-                    continue
-                
-                # Validar que la variedad existe
-                variedad = db.query(Variedad).filter(Variedad.id == variedad_id).first()
-                if not variedad:
-                    error_rows.append({
-                        'fila': row_num,
-                        'nombre': nombre_comercial,
-                        'error': f'Variedad ID {variedad_id} no encontrada'
-                    })
-                    continue
-                
-                # Construir el lote
-                lote_data = {
-                    'usuario_id': current_user.id,
-                    'variedad_id': variedad_id,
-                    'nombre_comercial': nombre_comercial
-                }
-                
-                # Procesar campos opcionales
-                for csv_col, model_field in actual_to_standard.items():
-                    if model_field not in ['variedad_id', 'nombre_comercial']:
-                        value = row.get(csv_col, '').strip() if row.get(csv_col) else None
-                        
-                        # Conversión de tipos
-                        try:
-                            if model_field in ['cantidad_estimada', 'anno_produccion', 
-                                             'anno_recoleccion', 'cantidad_restante']:
-                                lote_data[model_field] = int(value) if value else None
-                            
-                            elif model_field in ['temperatura_almacenamiento_c', 'humedad_relativa']:
-                                lote_data[model_field] = float(value) if value else None
-                            
-                            else:
-                                # Campos de texto
-                                lote_data[model_field] = value
-                        
-                        except ValueError as conv_err:
-                            error_rows.append({
-                                'fila': row_num,
-                                'nombre': nombre_comercial,
-                                'error': f'Campo "{csv_col}" tiene valor inválido: "{value}"'
-                            })
-                            continue
-                
-                # Crear y guardar el lote
-                try:
-                    nuevo_lote = LoteSemillas(**lote_data)
-                    db.add(nuevo_lote)
-                    db.commit()
-                    imported_count += 1
-                    logger.info(f"✓ Lote importado: {nombre_comercial} (variedad_id={variedad_id})")
-                    
-                except Exception as db_error:
-                    db.rollback()
-                    error_rows.append({
-                        'fila': row_num,
-                        'nombre': nombre_comercial,
-                        'error': f'Error BD: {str(db_error)[:100]}'
-                    })
-                    continue
-                
-            except Exception as row_error:
-                logger.error(f"Error fila {row_num}: {str(row_error)}")
-                error_rows.append({
-                    'fila': row_num,
-                    'nombre': '(error)',
-                    'error': f'Error inesperado: {str(row_error)[:100]}'
-                })
-                continue
-        
-        return {
-            "success": len(error_rows) == 0,
-            "message": f"Importación completada: {imported_count} importados, {len(error_rows)} errores",
-            "imported": imported_count,
-            "errors": error_rows,
-            "total_errors": len(error_rows)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error in import_csv: {str(e)}", exc_info=True)
+        finally:
+            os.remove(path)
+    
+    job = csv_import_service.create_job(db, current_user.id, file.filename)
+    
+    if background:
+        background_tasks.add_task(csv_import_service.run, job.id, path)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=ImportJobResponse.from_orm(job).model_dump(mode="json")
+        )
+    
+    await run_in_threadpool(csv_import_service.run, job.id, path)
+    db.refresh(job)
+    if job.status == JOB_FAILED:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error importando CSV: {str(e)}"
+            detail=job.message
         )
+    return csv_import_service.summary(job)
 
 
+@router.get("/import/jobs/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Progress and per-row errors of a CSV import job.
+    """
+    job = db.query(ImportJob).filter(
+        ImportJob.id == job_id,
+        ImportJob.usuario_id == current_user.id
+    ).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    return ImportJobResponse.from_orm(job)
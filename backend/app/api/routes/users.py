@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.api.schemas import UserUpdate, UserResponse, MessageResponse
 from app.api.dependencies import get_current_user, get_db
+from app.application.services.inventory_version_service import inventory_version_service
 from app.infrastructure.database.models import User
 
 
@@ -39,6 +40,7 @@ async def update_profile(
     - **location**: Address or place name
     - **latitude/longitude**: GPS coordinates for agricultural calendar
     - **climate_zone**: Climate zone for planting recommendations
+    - **timezone**: IANA time zone used for notification delivery times
     - **language**: Preferred language (es/eu)
     - **notifications_enabled**: Enable/disable notifications
     
@@ -50,6 +52,7 @@ async def update_profile(
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
+    inventory_version_service.bump(db, current_user.id)
     db.commit()
     db.refresh(current_user)
     
@@ -4,8 +4,13 @@ Provides data validation, serialization, and documentation for all API endpoints
 """
 
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Union
+from datetime import datetime, date
+from zoneinfo import available_timezones
+
+
+# IANA time zones accepted for user profiles (read once from tzdata)
+VALID_TIMEZONES = frozenset(available_timezones())
 
 
 # ============ User Schemas ============
@@ -44,8 +49,16 @@ class UserUpdate(BaseModel):
     latitude: Optional[float] = Field(None, ge=-90, le=90)
     longitude: Optional[float] = Field(None, ge=-180, le=180)
     climate_zone: Optional[str] = None
+    timezone: Optional[str] = Field(None, max_length=64, description="IANA time zone, e.g. 'Europe/Madrid'")
     language: Optional[str] = Field(None, pattern="^(es|eu)$")
     notifications_enabled: Optional[bool] = None
+    
+    @validator('timezone')
+    @classmethod
+    def validate_timezone(cls, v):
+        if v is not None and v not in VALID_TIMEZONES:
+            raise ValueError("Unknown time zone")
+        return v
 
 
 class UserResponse(UserBase):
@@ -55,6 +68,7 @@ class UserResponse(UserBase):
     latitude: Optional[float]
     longitude: Optional[float]
     climate_zone: Optional[str]
+    timezone: Optional[str] = None
     notifications_enabled: bool
     created_at: datetime
     
@@ -238,6 +252,42 @@ class LoteSemillasUpdate(BaseModel):
     notas: Optional[str] = None
 
 
+class LoteBatchUpdateItem(LoteSemillasUpdate):
+    """Partial update of one lote within a batch"""
+    id: int
+    
+    @validator('estado')
+    @classmethod
+    def validate_estado(cls, v):
+        # Omitirlo deja el estado como está; null no es un estado válido
+        if v is None:
+            raise ValueError("estado cannot be null")
+        return v
+
+
+class LoteBatchUpdateRequest(BaseModel):
+    """Schema for updating many lotes at once"""
+    items: List[LoteBatchUpdateItem] = Field(..., min_length=1)
+
+
+class LoteBatchDeleteRequest(BaseModel):
+    """Schema for deleting many lotes at once"""
+    ids: List[int] = Field(..., min_length=1)
+
+
+class LoteBatchResult(BaseModel):
+    """Outcome for one lote of a batch"""
+    id: int
+    status: str  # updated / unchanged / deleted / not_found
+
+
+class LoteBatchResponse(BaseModel):
+    """Response schema for batch mutations, results in request order"""
+    succeeded: int
+    not_found: int
+    results: List[LoteBatchResult]
+
+
 class LoteSemillasResponse(LoteSemillasBase):
     """Response schema for lote semillas"""
     id: int
@@ -245,6 +295,7 @@ class LoteSemillasResponse(LoteSemillasBase):
     variedad_id: int
     fecha_adquisicion: Optional[datetime]
     anos_viabilidad_semilla: Optional[int]
+    fecha_viabilidad_hasta: Optional[date] = None
     lugar_almacenamiento: Optional[str]
     temperatura_almacenamiento_c: Optional[float]
     humedad_relativa: Optional[float]
@@ -260,6 +311,19 @@ class LoteSemillasResponse(LoteSemillasBase):
         from_attributes = True
 
 
+class FacetBucket(BaseModel):
+    """Number of lotes with one value of a facet"""
+    value: Optional[Union[int, str]] = None  # None: lotes without a value
+    label: Optional[str] = None
+    count: int
+
+
+class InventoryFacetsResponse(BaseModel):
+    """Facet counts of the inventory for the applied filters"""
+    total: int
+    facets: Dict[str, List[FacetBucket]]  # estado, marca, especie, lugar_almacenamiento, tipo_origen
+
+
 # ============ Plantacion Schemas ============
 
 class PlantacionBase(BaseModel):
@@ -368,6 +432,34 @@ class MonthlyCalendar(BaseModel):
     tasks: List[CalendarTask]
 
 
+# ============ Import Schemas ============
+
+class ImportRowError(BaseModel):
+    """Error of one CSV row"""
+    fila: int
+    nombre: str
+    error: str
+
+
+class ImportJobResponse(BaseModel):
+    """Schema for the status of a CSV import job"""
+    id: int
+    status: str  # pending / running / completed / failed
+    filename: Optional[str] = None
+    total_rows: Optional[int] = None
+    processed_rows: int = 0
+    imported: int = 0
+    total_errors: int = 0
+    errors: List[ImportRowError] = []
+    message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 # ============ Generic Response Schemas ============
 
 class MessageResponse(BaseModel):
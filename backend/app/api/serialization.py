@@ -0,0 +1,62 @@
+"""
+Fast-path JSON serialization of list responses.
+Returning a list of models makes FastAPI validate it again against the
+response_model and encode it with jsonable_encoder + json.dumps. These
+helpers validate the whole list once (pydantic-core, from attributes) and
+encode it straight to JSON bytes in the same Rust core; the Response is
+returned as is, so the route's response_model only documents the shape.
+"""
+
+from fastapi import Response
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter
+from typing import Any, Iterable, List, Optional, Type
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@lru_cache(maxsize=256)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Validator/serializer of List[model], built once per model"""
+    return TypeAdapter(List[model])
+
+
+def validate_list(model: Type[BaseModel], items: Iterable[Any]) -> List[BaseModel]:
+    """
+    Validate ORM objects, dicts or models as a list of `model` in one call.
+
+    Args:
+        model: Response model (with from_attributes)
+        items: Rows to validate
+
+    Returns:
+        Validated models, in order
+    """
+    return list_adapter(model).validate_python(list(items), from_attributes=True)
+
+
+def json_list_response(
+    model: Type[BaseModel],
+    items: Iterable[Any],
+    response: Optional[Response] = None,
+    validated: bool = False
+) -> Response:
+    """
+    Build the JSON response of a list route.
+
+    Args:
+        model: Response model of each item
+        items: Rows to return (ORM objects, dicts or models)
+        response: Response injected in the route, whose headers are kept
+        validated: Items are already instances of `model` (from validate_list)
+
+    Returns:
+        Response with the encoded list
+    """
+    adapter = list_adapter(model)
+    values = items if validated else adapter.validate_python(list(items), from_attributes=True)
+    return Response(
+        content=adapter.dump_json(values),
+        media_type=JSON_MEDIA_TYPE,
+        headers=dict(response.headers) if response is not None else None
+    )
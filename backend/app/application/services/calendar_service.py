@@ -4,23 +4,136 @@ Calculates optimal planting dates, transplant times, and harvest dates
 based on crop rules, climate zones, user location, and lunar phases.
 """
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from calendar import monthrange
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
 
 from app.infrastructure.database.models import (
-    LoteSemillas, Variedad, Especie, Plantacion, CropRule, User, EstadoLoteSemillas
+    LoteSemillas, Variedad, Especie, Plantacion, CropRule, User, SowingWindow,
+    EstadoLoteSemillas, EstadoPlantacion
 )
 from app.application.services.lunar_calendar import lunar_calendar
 from app.application.services.geolocation_service import GeolocationService
 
 
+# ============================================================================
+# PROJECTION ROWS
+# ============================================================================
+# The calendar only reads a handful of columns from lotes, variedades and
+# especies. Selecting them explicitly into slotted rows avoids hydrating full
+# ORM objects (identity map, JSON `fotos`, Text `descripcion`/`notas`, ...).
+
+@dataclass(frozen=True, slots=True)
+class LoteCalendarRow:
+    """Columns of a lote (with its variedad and especie) used by the calendar"""
+    lote_id: int
+    nombre_comercial: str
+    estado: Optional[EstadoLoteSemillas]
+    cantidad_estimada: Optional[int]
+    cantidad_restante: Optional[int]
+    fecha_viabilidad_hasta: Optional[date]
+    variedad_nombre: str
+    meses_siembra_interior: Optional[List[int]]
+    meses_siembra_exterior: Optional[List[int]]
+    dias_germinacion_min: Optional[int]
+    dias_germinacion_max: Optional[int]
+    especie_nombre: Optional[str]
+    # Meses precalculados (sowing_window); None si no hay ventana para la zona
+    ventana_meses_interior: Optional[List[int]]
+    ventana_meses_exterior: Optional[List[int]]
+
+    @property
+    def fecha_vencimiento(self) -> Optional[date]:
+        """Same as LoteSemillas.fecha_vencimiento"""
+        return self.fecha_viabilidad_hasta
+
+
+LOTE_CALENDAR_COLUMNS = (
+    LoteSemillas.id,
+    LoteSemillas.nombre_comercial,
+    LoteSemillas.estado,
+    LoteSemillas.cantidad_estimada,
+    LoteSemillas.cantidad_restante,
+    LoteSemillas.fecha_viabilidad_hasta,
+    Variedad.nombre_variedad,
+    Variedad.meses_siembra_interior,
+    Variedad.meses_siembra_exterior,
+    Variedad.dias_germinacion_min,
+    Variedad.dias_germinacion_max,
+    Especie.nombre_comun,
+    SowingWindow.meses_siembra_interior,
+    SowingWindow.meses_siembra_exterior,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class PlantacionCalendarRow:
+    """Columns of a plantacion (with its variedad and especie) used by the calendar"""
+    plantacion_id: int
+    nombre_plantacion: str
+    estado: Optional[EstadoPlantacion]
+    fecha_siembra: datetime
+    fecha_cosecha_estimada: Optional[datetime]
+    variedad_nombre: str
+    dias_hasta_trasplante: Optional[int]
+    especie_nombre: Optional[str]
+    fecha_germinacion: Optional[datetime]
+    fecha_trasplante: Optional[datetime]
+    dias_germinacion_min: Optional[int]
+    dias_germinacion_max: Optional[int]
+    dias_hasta_cosecha_min: Optional[int]
+    dias_hasta_cosecha_max: Optional[int]
+
+
+PLANTACION_CALENDAR_COLUMNS = (
+    Plantacion.id,
+    Plantacion.nombre_plantacion,
+    Plantacion.estado,
+    Plantacion.fecha_siembra,
+    Plantacion.fecha_cosecha_estimada,
+    Variedad.nombre_variedad,
+    Variedad.dias_hasta_trasplante,
+    Especie.nombre_comun,
+    Plantacion.fecha_germinacion,
+    Plantacion.fecha_trasplante,
+    Variedad.dias_germinacion_min,
+    Variedad.dias_germinacion_max,
+    Variedad.dias_hasta_cosecha_min,
+    Variedad.dias_hasta_cosecha_max,
+)
+
+
 class CalendarService:
     """
     Service for generating agricultural calendar based on lotes and climate data.
     """
     
+    @staticmethod
+    def window_months(
+        base_months: List[int],
+        hemisphere: str
+    ) -> List[int]:
+        """
+        Compute the sowing months of a window.
+        
+        Args:
+            base_months: Original months (assuming Northern hemisphere temperate)
+            hemisphere: Hemisphere of the window
+            
+        Returns:
+            Adjusted months for the window
+        """
+        if not base_months:
+            return []
+        
+        # Could add more sophisticated climate adjustments here
+        # For now, only the hemisphere changes the months (so windows are
+        # keyed by hemisphere only)
+        return GeolocationService.shift_months_for_hemisphere(base_months, hemisphere)
+    
     @staticmethod
     def adjust_planting_months(
         base_months: List[int],
@@ -33,23 +146,111 @@ class CalendarService:
         Args:
             base_months: Original months (assuming Northern hemisphere temperate)
             user_latitude: User's latitude
-            user_climate_zone: User's climate zone
+            user_climate_zone: User's climate zone (not used yet)
             
         Returns:
             Adjusted months for user's location
         """
-        if not base_months:
-            return []
+        hemisphere = GeolocationService.hemisphere_for(user_latitude)
+        return CalendarService.window_months(base_months, hemisphere)
+    
+    @staticmethod
+    def planting_months(lote: LoteCalendarRow, user: User) -> Tuple[List[int], List[int]]:
+        """
+        Get the indoor and outdoor planting months of a lote for the user's location.
         
-        # If we have user location, adjust the months
-        if user_latitude is not None and user_latitude < 0:
-            # Southern hemisphere - shift months by 6
-            adjusted = [(m + 6 - 1) % 12 + 1 for m in base_months]
-            return sorted(adjusted)
+        Uses the precomputed sowing window loaded with the lote and falls back
+        to computing the months when the window has not been built yet.
         
-        # Could add more sophisticated climate adjustments here
-        # For now, return base months (works for Northern hemisphere temperate)
-        return base_months
+        Args:
+            lote: Lote calendar projection
+            user: User object
+            
+        Returns:
+            Tuple (indoor months, outdoor months)
+        """
+        if lote.ventana_meses_interior is not None and lote.ventana_meses_exterior is not None:
+            return lote.ventana_meses_interior, lote.ventana_meses_exterior
+        return (
+            CalendarService.adjust_planting_months(
+                lote.meses_siembra_interior or [], user.latitude, user.climate_zone
+            ),
+            CalendarService.adjust_planting_months(
+                lote.meses_siembra_exterior or [], user.latitude, user.climate_zone
+            )
+        )
+    
+    @staticmethod
+    def load_lote_rows(
+        user_id: int,
+        db: Session,
+        active_only: bool = True,
+        user_latitude: Optional[float] = None
+    ) -> List[LoteCalendarRow]:
+        """
+        Load the calendar projection of a user's lotes in a single query.
+        
+        The sowing window of each variedad for the user's location is
+        joined in the same query.
+        
+        Args:
+            user_id: Owner of the lotes
+            db: Database session
+            active_only: Only include lotes in estado ACTIVO
+            user_latitude: User's latitude (selects the window hemisphere)
+            
+        Returns:
+            List of LoteCalendarRow
+        """
+        hemisphere = GeolocationService.hemisphere_for(user_latitude)
+        
+        query = db.query(*LOTE_CALENDAR_COLUMNS).join(
+            Variedad, LoteSemillas.variedad_id == Variedad.id
+        ).outerjoin(
+            Especie, Variedad.especie_id == Especie.id
+        ).outerjoin(
+            SowingWindow, and_(
+                SowingWindow.variedad_id == Variedad.id,
+                SowingWindow.hemisphere == hemisphere
+            )
+        ).filter(
+            LoteSemillas.usuario_id == user_id
+        )
+        
+        if active_only:
+            query = query.filter(LoteSemillas.estado == EstadoLoteSemillas.ACTIVO)
+        
+        return [LoteCalendarRow(*row) for row in query]
+    
+    @staticmethod
+    def load_plantacion_rows(
+        user_id: int,
+        estados: List[EstadoPlantacion],
+        db: Session
+    ) -> List[PlantacionCalendarRow]:
+        """
+        Load the calendar projection of a user's plantaciones in a single query.
+        
+        Args:
+            user_id: Owner of the plantaciones
+            estados: Plantacion estados to include
+            db: Database session
+            
+        Returns:
+            List of PlantacionCalendarRow
+        """
+        query = db.query(*PLANTACION_CALENDAR_COLUMNS).join(
+            LoteSemillas, Plantacion.lote_semillas_id == LoteSemillas.id
+        ).join(
+            Variedad, LoteSemillas.variedad_id == Variedad.id
+        ).outerjoin(
+            Especie, Variedad.especie_id == Especie.id
+        ).filter(
+            Plantacion.usuario_id == user_id,
+            Plantacion.estado.in_(estados)
+        )
+        
+        return [PlantacionCalendarRow(*row) for row in query]
     
     def get_monthly_tasks(
         self,
@@ -78,79 +279,75 @@ class CalendarService:
         }
         
         # Get user's lotes with variedad and especie data
-        lotes = db.query(LoteSemillas).filter(
-            LoteSemillas.usuario_id == user.id,
-            LoteSemillas.estado == EstadoLoteSemillas.ACTIVO
-        ).options(
-            joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-        ).all()
+        lotes = self.load_lote_rows(user.id, db, user_latitude=user.latitude)
         
         for lote in lotes:
-            especie = lote.variedad.especie
-            variedad = lote.variedad
-            
             # Adjust planting months based on user's location
-            meses_interior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_interior or [],
-                user.latitude,
-                user.climate_zone
-            )
-            meses_exterior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_exterior or [],
-                user.latitude,
-                user.climate_zone
-            )
+            meses_interior_ajustados, meses_exterior_ajustados = self.planting_months(lote, user)
+            meses_totales = sorted(set(meses_interior_ajustados + meses_exterior_ajustados))
             
             # Check if this month is good for indoor planting
             if month in meses_interior_ajustados:
-                meses_totales = sorted(set(meses_interior_ajustados + meses_exterior_ajustados))
                 tasks["planting"].append({
-                    "lote_id": lote.id,
+                    "lote_id": lote.lote_id,
                     "seed_name": lote.nombre_comercial,
-                    "especie": especie.nombre_comun,
-                    "variety": variedad.nombre_variedad,
+                    "especie": lote.especie_nombre,
+                    "variety": lote.variedad_nombre,
                     "type": "indoor",
                     "planting_months": meses_totales,
                     "planting_months_total": len(meses_totales),
-                    "description": f"Siembra interior de {especie.nombre_comun} - {variedad.nombre_variedad}"
+                    "description": f"Siembra interior de {lote.especie_nombre} - {lote.variedad_nombre}"
                 })
             
             # Check if this month is good for outdoor planting
             if month in meses_exterior_ajustados:
-                meses_totales = sorted(set(meses_interior_ajustados + meses_exterior_ajustados))
                 tasks["planting"].append({
-                    "lote_id": lote.id,
+                    "lote_id": lote.lote_id,
                     "seed_name": lote.nombre_comercial,
-                    "especie": especie.nombre_comun,
-                    "variety": variedad.nombre_variedad,
+                    "especie": lote.especie_nombre,
+                    "variety": lote.variedad_nombre,
                     "type": "outdoor",
                     "planting_months": meses_totales,
                     "planting_months_total": len(meses_totales),
-                    "description": f"Siembra exterior de {especie.nombre_comun} - {variedad.nombre_variedad}"
+                    "description": f"Siembra exterior de {lote.especie_nombre} - {lote.variedad_nombre}"
                 })
+            
+            # Check for expiration reminders (30 days before)
+            fecha_vencimiento = lote.fecha_vencimiento
+            if fecha_vencimiento:
+                warning_date = fecha_vencimiento - timedelta(days=30)
+                if warning_date.month == month and warning_date.year == year:
+                    tasks["reminders"].append({
+                        "lote_id": lote.lote_id,
+                        "seed_name": lote.nombre_comercial,
+                        "variety": lote.variedad_nombre,
+                        "type": "expiration_warning",
+                        "description": f"{lote.nombre_comercial} caduca el {fecha_vencimiento.strftime('%d/%m/%Y')}",
+                        "expiration_date": fecha_vencimiento.isoformat()
+                    })
         
         # Get user's plantaciones
-        plantaciones = db.query(Plantacion).filter(
-            Plantacion.usuario_id == user.id,
-            Plantacion.estado.in_(["sembrada", "germinada", "trasplantada", "crecimiento"])
-        ).options(
-            joinedload(Plantacion.lote_semillas).joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-        ).all()
+        plantaciones = self.load_plantacion_rows(
+            user.id,
+            [
+                EstadoPlantacion.SEMBRADA,
+                EstadoPlantacion.GERMINADA,
+                EstadoPlantacion.TRASPLANTADA,
+                EstadoPlantacion.CRECIMIENTO
+            ],
+            db
+        )
         
         for plantacion in plantaciones:
-            lote = plantacion.lote_semillas
-            variedad = lote.variedad
-            especie = variedad.especie
-            
             # Check for transplanting tasks
-            if plantacion.estado == "germinada" and variedad.dias_hasta_trasplante:
-                transplant_date = plantacion.fecha_siembra + timedelta(days=variedad.dias_hasta_trasplante)
+            if plantacion.estado == EstadoPlantacion.GERMINADA and plantacion.dias_hasta_trasplante:
+                transplant_date = plantacion.fecha_siembra + timedelta(days=plantacion.dias_hasta_trasplante)
                 if transplant_date.month == month and transplant_date.year == year:
                     tasks["transplanting"].append({
-                        "plantacion_id": plantacion.id,
+                        "plantacion_id": plantacion.plantacion_id,
                         "seed_name": plantacion.nombre_plantacion,
-                        "variety": variedad.nombre_variedad,
-                        "date": transplant_date.isoformat() if transplant_date else None,
+                        "variety": plantacion.variedad_nombre,
+                        "date": transplant_date.isoformat(),
                         "description": f"Trasplante de {plantacion.nombre_plantacion}"
                     })
             
@@ -158,29 +355,14 @@ class CalendarService:
             if plantacion.fecha_cosecha_estimada:
                 harvest_date = plantacion.fecha_cosecha_estimada
                 if harvest_date.month == month and harvest_date.year == year:
-                    lote_variedad = plantacion.lote_semillas.variedad if plantacion.lote_semillas else None
                     tasks["harvesting"].append({
-                        "plantacion_id": plantacion.id,
+                        "plantacion_id": plantacion.plantacion_id,
                         "seed_name": plantacion.nombre_plantacion,
-                        "variety": lote_variedad.nombre_variedad if lote_variedad else None,
-                        "date": harvest_date.isoformat() if harvest_date else None,
+                        "variety": plantacion.variedad_nombre,
+                        "date": harvest_date.isoformat(),
                         "description": f"Cosecha de {plantacion.nombre_plantacion}"
                     })
         
-        # Check for expiration reminders (30 days before)
-        for lote in lotes:
-            if lote.fecha_vencimiento:
-                warning_date = lote.fecha_vencimiento - timedelta(days=30)
-                if warning_date.month == month and warning_date.year == year:
-                    tasks["reminders"].append({
-                        "lote_id": lote.id,
-                        "seed_name": lote.nombre_comercial,
-                        "variety": lote.variedad.nombre_variedad if lote.variedad else None,
-                        "type": "expiration_warning",
-                        "description": f"{lote.nombre_comercial} caduca el {lote.fecha_vencimiento.strftime('%d/%m/%Y')}",
-                        "expiration_date": lote.fecha_vencimiento.isoformat() if lote.fecha_vencimiento else None
-                    })
-        
         return tasks
 
     def get_seed_planting_summary(
@@ -193,38 +375,19 @@ class CalendarService:
 
         Returns list of seed lots with planting months adjusted for the user.
         """
-        lotes = db.query(LoteSemillas).filter(
-            LoteSemillas.usuario_id == user.id,
-            LoteSemillas.estado == EstadoLoteSemillas.ACTIVO
-        ).options(
-            joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-        ).all()
+        lotes = self.load_lote_rows(user.id, db, user_latitude=user.latitude)
 
         summary = []
         for lote in lotes:
-            variedad = lote.variedad
-            if not variedad:
-                continue
-            especie = variedad.especie
-
-            meses_interior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_interior or [],
-                user.latitude,
-                user.climate_zone
-            )
-            meses_exterior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_exterior or [],
-                user.latitude,
-                user.climate_zone
-            )
+            meses_interior_ajustados, meses_exterior_ajustados = self.planting_months(lote, user)
 
             meses_totales = sorted(set(meses_interior_ajustados + meses_exterior_ajustados))
 
             summary.append({
-                "lote_id": lote.id,
+                "lote_id": lote.lote_id,
                 "seed_name": lote.nombre_comercial,
-                "especie": especie.nombre_comun if especie else None,
-                "variety": variedad.nombre_variedad,
+                "especie": lote.especie_nombre,
+                "variety": lote.variedad_nombre,
                 "estado": lote.estado,
                 "cantidad_disponible": lote.cantidad_restante or lote.cantidad_estimada or 0,
                 "planting_months_indoor": meses_interior_ajustados,
@@ -305,36 +468,12 @@ class CalendarService:
         if mode not in {"all", "indoor", "outdoor"}:
             mode = "all"
 
-        lotes_query = db.query(LoteSemillas).filter(
-            LoteSemillas.usuario_id == user.id
-        ).options(
-            joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-        )
-
-        if pending_only:
-            lotes_query = lotes_query.filter(
-                LoteSemillas.estado == EstadoLoteSemillas.ACTIVO
-            )
-
-        lotes = lotes_query.all()
+        lotes = self.load_lote_rows(user.id, db, active_only=pending_only, user_latitude=user.latitude)
 
         counts = {month: 0 for month in range(1, 13)}
 
         for lote in lotes:
-            variedad = lote.variedad
-            if not variedad:
-                continue
-
-            meses_interior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_interior or [],
-                user.latitude,
-                user.climate_zone
-            )
-            meses_exterior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_exterior or [],
-                user.latitude,
-                user.climate_zone
-            )
+            meses_interior_ajustados, meses_exterior_ajustados = self.planting_months(lote, user)
 
             if mode == "indoor":
                 meses = set(meses_interior_ajustados)
@@ -352,7 +491,8 @@ class CalendarService:
     def get_current_month_recommendations(
         self,
         user: User,
-        db: Session
+        db: Session,
+        today: Optional[date] = None
     ) -> List[Dict[str, Any]]:
         """
         Get planting recommendations for the current month.
@@ -361,37 +501,20 @@ class CalendarService:
         Args:
             user: User object
             db: Database session
+            today: Local date of the user (default: server date)
             
         Returns:
             List of lotes that can be planted this month
         """
-        now = datetime.now()
-        current_month = now.month
+        current_month = (today or date.today()).month
         
-        lotes = db.query(LoteSemillas).filter(
-            LoteSemillas.usuario_id == user.id,
-            LoteSemillas.estado == EstadoLoteSemillas.ACTIVO
-        ).options(
-            joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-        ).all()
+        lotes = self.load_lote_rows(user.id, db, user_latitude=user.latitude)
         
         recommendations = []
         
         for lote in lotes:
-            variedad = lote.variedad
-            especie = variedad.especie
-            
             # Adjust planting months based on user's location
-            meses_interior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_interior or [],
-                user.latitude,
-                user.climate_zone
-            )
-            meses_exterior_ajustados = self.adjust_planting_months(
-                variedad.meses_siembra_exterior or [],
-                user.latitude,
-                user.climate_zone
-            )
+            meses_interior_ajustados, meses_exterior_ajustados = self.planting_months(lote, user)
             
             can_plant_indoor = current_month in meses_interior_ajustados
             can_plant_outdoor = current_month in meses_exterior_ajustados
@@ -399,23 +522,23 @@ class CalendarService:
             if can_plant_indoor or can_plant_outdoor:
                 # Calculate average germination days for display
                 germination_days = None
-                if variedad.dias_germinacion_min and variedad.dias_germinacion_max:
-                    germination_days = (variedad.dias_germinacion_min + variedad.dias_germinacion_max) // 2
-                elif variedad.dias_germinacion_min:
-                    germination_days = variedad.dias_germinacion_min
-                elif variedad.dias_germinacion_max:
-                    germination_days = variedad.dias_germinacion_max
+                if lote.dias_germinacion_min and lote.dias_germinacion_max:
+                    germination_days = (lote.dias_germinacion_min + lote.dias_germinacion_max) // 2
+                elif lote.dias_germinacion_min:
+                    germination_days = lote.dias_germinacion_min
+                elif lote.dias_germinacion_max:
+                    germination_days = lote.dias_germinacion_max
                     
                 recommendations.append({
-                    "lote_id": lote.id,
+                    "lote_id": lote.lote_id,
                     "seed_name": lote.nombre_comercial,
-                    "especie": especie.nombre_comun,
-                    "variety": variedad.nombre_variedad,
+                    "especie": lote.especie_nombre,
+                    "variety": lote.variedad_nombre,
                     "can_plant_indoor": can_plant_indoor,
                     "can_plant_outdoor": can_plant_outdoor,
                     "germination_days": germination_days,
-                    "germination_days_min": variedad.dias_germinacion_min,
-                    "germination_days_max": variedad.dias_germinacion_max,
+                    "germination_days_min": lote.dias_germinacion_min,
+                    "germination_days_max": lote.dias_germinacion_max,
                     "cantidad_disponible": lote.cantidad_restante or lote.cantidad_estimada or 0
                 })
         
@@ -425,7 +548,8 @@ class CalendarService:
         self,
         user: User,
         days_ahead: int,
-        db: Session
+        db: Session,
+        today: Optional[date] = None
     ) -> List[Dict[str, Any]]:
         """
         Get plantaciones that need to be transplanted in the next X days.
@@ -434,45 +558,71 @@ class CalendarService:
             user: User object
             days_ahead: Number of days to look ahead
             db: Database session
+            today: Local date of the user (default: server date)
             
         Returns:
-            List of plantaciones needing transplanting
+            List of plantaciones needing transplanting (today included)
         """
-        now = datetime.now()
-        end_date = now + timedelta(days=days_ahead)
+        today = today or date.today()
+        end_date = today + timedelta(days=days_ahead)
         
-        plantaciones = db.query(Plantacion).filter(
-            Plantacion.usuario_id == user.id,
-            Plantacion.estado == "germinada"
-        ).options(
-            joinedload(Plantacion.lote_semillas).joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
-        ).all()
+        plantaciones = self.load_plantacion_rows(user.id, [EstadoPlantacion.GERMINADA], db)
         
         upcoming = []
         for plantacion in plantaciones:
-            lote = plantacion.lote_semillas
-            variedad = lote.variedad
-            especie = variedad.especie
-            if variedad.dias_hasta_trasplante:
-                transplant_date = plantacion.fecha_siembra + timedelta(days=variedad.dias_hasta_trasplante)
-                if now <= transplant_date <= end_date:
-                    days_until = (transplant_date - now).days
+            if plantacion.dias_hasta_trasplante:
+                transplant_date = plantacion.fecha_siembra + timedelta(days=plantacion.dias_hasta_trasplante)
+                if today <= transplant_date.date() <= end_date:
+                    days_until = (transplant_date.date() - today).days
                     upcoming.append({
-                        "plantacion_id": plantacion.id,
+                        "plantacion_id": plantacion.plantacion_id,
                         "seed_name": plantacion.nombre_plantacion,
-                        "especie": especie.nombre_comun,
-                        "variety": variedad.nombre_variedad,
-                        "transplant_date": transplant_date.isoformat() if transplant_date else None,
+                        "especie": plantacion.especie_nombre,
+                        "variety": plantacion.variedad_nombre,
+                        "transplant_date": transplant_date.isoformat(),
                         "days_until": days_until
                     })
         
         return upcoming
     
+    @staticmethod
+    def _expiring_query(db: Session, days_ahead: int, today: date):
+        """
+        Range query over the indexed fecha_viabilidad_hasta of active lotes,
+        from today to today + days_ahead.
+        """
+        return db.query(
+            LoteSemillas.usuario_id,
+            LoteSemillas.id,
+            LoteSemillas.nombre_comercial,
+            LoteSemillas.fecha_viabilidad_hasta,
+            Variedad.nombre_variedad
+        ).join(
+            Variedad, LoteSemillas.variedad_id == Variedad.id
+        ).filter(
+            LoteSemillas.fecha_viabilidad_hasta >= today,
+            LoteSemillas.fecha_viabilidad_hasta <= today + timedelta(days=days_ahead),
+            LoteSemillas.estado == EstadoLoteSemillas.ACTIVO
+        ).order_by(
+            LoteSemillas.fecha_viabilidad_hasta
+        )
+    
+    @staticmethod
+    def _expiring_item(lote_id: int, nombre: str, fecha: date, variedad: str, today: date) -> Dict[str, Any]:
+        return {
+            "lote_id": lote_id,
+            "nombre": nombre,
+            "variedad": variedad,
+            "expiration_date": fecha.isoformat(),
+            "days_until": (fecha - today).days
+        }
+    
     def get_expiring_lotes(
         self,
         user: User,
         days_ahead: int,
-        db: Session
+        db: Session,
+        today: Optional[date] = None
     ) -> List[Dict[str, Any]]:
         """
         Get lotes expiring in the next X days.
@@ -481,35 +631,56 @@ class CalendarService:
             user: User object
             days_ahead: Number of days to look ahead
             db: Database session
+            today: Local date of the user (default: server date)
             
         Returns:
-            List of expiring lotes
+            List of expiring lotes, soonest first
         """
-        now = datetime.now()
-        end_date = now + timedelta(days=days_ahead)
-        
-        lotes = db.query(LoteSemillas).filter(
-            LoteSemillas.usuario_id == user.id,
-            LoteSemillas.fecha_vencimiento != None,
-            LoteSemillas.fecha_vencimiento <= end_date,
-            LoteSemillas.estado == EstadoLoteSemillas.ACTIVO
-        ).options(
-            joinedload(LoteSemillas.variedad)
-        ).all()
+        today = today or date.today()
+        query = self._expiring_query(db, days_ahead, today).filter(
+            LoteSemillas.usuario_id == user.id
+        )
+        return [
+            self._expiring_item(lote_id, nombre, fecha, variedad, today)
+            for _, lote_id, nombre, fecha, variedad in query
+        ]
+    
+    def get_expiring_lotes_by_user(
+        self,
+        days_ahead: int,
+        db: Session,
+        notifications_enabled_only: bool = True,
+        user_ids: Optional[Iterable[int]] = None,
+        today: Optional[date] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Get lotes expiring in the next X days for all users in one query.
         
-        expiring = []
-        for lote in lotes:
-            days_until = (lote.fecha_vencimiento - now).days
-            if days_until >= 0:  # Not already expired
-                expiring.append({
-                    "lote_id": lote.id,
-                    "nombre": lote.nombre_comercial,
-                    "variedad": lote.variedad.nombre_variedad,
-                    "expiration_date": lote.fecha_vencimiento,
-                    "days_until": days_until
-                })
+        Args:
+            days_ahead: Number of days to look ahead
+            db: Database session
+            notifications_enabled_only: Only include users with notifications enabled
+            user_ids: Optional subset of users
+            today: Local date of the users (default: server date)
+            
+        Returns:
+            Dict of user_id -> list of expiring lotes, soonest first
+        """
+        today = today or date.today()
+        query = self._expiring_query(db, days_ahead, today)
+        if notifications_enabled_only:
+            query = query.join(
+                User, LoteSemillas.usuario_id == User.id
+            ).filter(User.notifications_enabled == True)
+        if user_ids is not None:
+            query = query.filter(LoteSemillas.usuario_id.in_(list(user_ids)))
         
-        return sorted(expiring, key=lambda x: x["days_until"])
+        expiring: Dict[int, List[Dict[str, Any]]] = {}
+        for user_id, lote_id, nombre, fecha, variedad in query:
+            expiring.setdefault(user_id, []).append(
+                self._expiring_item(lote_id, nombre, fecha, variedad, today)
+            )
+        return expiring
 
 
 # Global calendar service instance
@@ -0,0 +1,115 @@
+"""
+Columnar response format for day-by-day calendar data.
+Encodes a list of per-day records as one array per field, with numeric
+codes for moon phases and weather conditions, so long ranges do not repeat
+every key and enum string once per day.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from datetime import date, datetime
+
+from app.application.services.lunar_calendar import lunar_calendar
+
+
+FORMAT_ROWS = "rows"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_PATTERN = f"^({FORMAT_ROWS}|{FORMAT_COLUMNAR})$"
+
+# Códigos de fase lunar: índice en esta lista (claves de LunarCalendar.MOON_PHASES)
+PHASES = [
+    "new_moon",
+    "waxing_crescent",
+    "first_quarter",
+    "waxing_gibbous",
+    "full_moon",
+    "waning_gibbous",
+    "last_quarter",
+    "waning_crescent",
+]
+
+# Códigos de condición meteorológica (valores de WeatherCacheService)
+CONDITIONS = ["Clear", "Partly Cloudy", "Cloudy", "Rainy"]
+
+_PHASE_ALIASES = {
+    # WeatherAPI astronomy names
+    "new moon": "new_moon",
+    "waxing crescent": "waxing_crescent",
+    "first quarter": "first_quarter",
+    "waxing gibbous": "waxing_gibbous",
+    "full moon": "full_moon",
+    "waning gibbous": "waning_gibbous",
+    "last quarter": "last_quarter",
+    "third quarter": "last_quarter",
+    "waning crescent": "waning_crescent",
+}
+# LunarCalendar display names ("Luna Nueva 🌑" -> "luna nueva")
+_PHASE_ALIASES.update({
+    display.rsplit(" ", 1)[0].lower(): key
+    for key, display in lunar_calendar.MOON_PHASES.items()
+})
+_PHASE_CODES = {key: code for code, key in enumerate(PHASES)}
+
+_CONDITION_CODES = {name.lower(): code for code, name in enumerate(CONDITIONS)}
+_CONDITION_CODES["sunny"] = _CONDITION_CODES["clear"]
+
+
+def phase_code(phase_name: Optional[str], day: date) -> int:
+    """
+    Numeric code of a moon phase name.
+
+    Names that cannot be mapped (e.g. truncated fallback names) are resolved
+    by computing the phase of ``day`` locally.
+
+    Args:
+        phase_name: Phase name as returned by LunarApiService
+        day: Day the phase belongs to
+
+    Returns:
+        Index in PHASES
+    """
+    if phase_name:
+        key = phase_name.strip().lower()
+        key = _PHASE_ALIASES.get(key, key)
+        if key in _PHASE_CODES:
+            return _PHASE_CODES[key]
+    computed = lunar_calendar.get_moon_phase(datetime.combine(day, datetime.min.time()))
+    return _PHASE_CODES[computed["phase"]]
+
+
+def condition_code(condition: Optional[str]) -> Optional[int]:
+    """Numeric code of a weather condition (index in CONDITIONS), None if unknown"""
+    if not condition:
+        return None
+    return _CONDITION_CODES.get(condition.strip().lower())
+
+
+def to_columns(
+    records: Sequence[Dict[str, Any]],
+    fields: Dict[str, Callable[[Dict[str, Any]], Any]]
+) -> Dict[str, List[Any]]:
+    """
+    Transpose records into one list per field.
+
+    Args:
+        records: Per-day records
+        fields: Output column name -> getter applied to each record
+
+    Returns:
+        Dict of column name -> list of values (same length as records)
+    """
+    return {
+        name: [getter(record) for record in records]
+        for name, getter in fields.items()
+    }
+
+
+def legend(*names: str) -> Dict[str, List[str]]:
+    """Code tables for the encoded columns included in a response"""
+    tables = {"phase": PHASES, "condition": CONDITIONS}
+    return {name: tables[name] for name in names}
+
+
+def rounded(value: Any, digits: int = 1) -> Any:
+    """Round numeric values to keep columns short"""
+    return round(value, digits) if isinstance(value, float) else value
+
@@ -0,0 +1,426 @@
+"""
+CSV import pipeline for the seed inventory.
+The upload is spooled to a temporary file and read twice as a stream: a
+first pass collects the referenced variedades (checked with one IN query)
+and counts the rows, a second pass validates each row and inserts the lotes
+in chunks with executemany. Progress and per-row errors are stored on an
+ImportJob so the import can run in the background and be polled.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+from datetime import date, datetime, timezone
+import csv
+import logging
+import math
+import os
+import re
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import ImportJob, LoteSemillas, Variedad, EstadoLoteSemillas
+from app.application.services.inventory_version_service import inventory_version_service
+
+logger = logging.getLogger(__name__)
+
+# Estados de un ImportJob
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Variedades comprobadas por consulta IN
+VARIEDAD_LOOKUP_BATCH = 5000
+
+# Mapeo entre nombres de columnas CSV y atributos del modelo
+# Acepta múltiples variantes de nombres
+FIELD_MAPPING = {
+    'ID_Variedad': 'variedad_id',
+    'ID': 'variedad_id',  # Variante corta
+    'Nombre Comercial': 'nombre_comercial',
+    'Nombre comercial': 'nombre_comercial',
+    'Marca': 'marca',
+    'Número de Lote': 'numero_lote',
+    'Numero Lote': 'numero_lote',
+    'Cantidad Estimada': 'cantidad_estimada',
+    'Cantidad estimada': 'cantidad_estimada',
+    'Año Producción': 'anno_produccion',
+    'Año producción': 'anno_produccion',
+    'Año Recolección': 'anno_recoleccion',
+    'Año recolección': 'anno_recoleccion',
+    'Lugar Almacenamiento': 'lugar_almacenamiento',
+    'Lugar almacenamiento': 'lugar_almacenamiento',
+    'Temperatura Almacenamiento (°C)': 'temperatura_almacenamiento_c',
+    'Temperatura almacenamiento': 'temperatura_almacenamiento_c',
+    'Humedad Relativa (%)': 'humedad_relativa',
+    'Humedad relativa': 'humedad_relativa',
+    'Humedad': 'humedad_relativa',
+    'Estado': 'estado',
+    'Cantidad Restante': 'cantidad_restante',
+    'Cantidad restante': 'cantidad_restante',
+    'Origen': 'origen',
+    'Tipo Origen': 'tipo_origen',
+    'Tipo origen': 'tipo_origen',
+    'Generación': 'generacion',
+    'Generacion': 'generacion',
+    'Notas': 'notas',
+}
+
+INT_FIELDS = {'cantidad_estimada', 'anno_produccion', 'anno_recoleccion', 'cantidad_restante'}
+FLOAT_FIELDS = {'temperatura_almacenamiento_c', 'humedad_relativa'}
+
+# Números admitidos, los mismos al importar y en la validación previa:
+# enteros y decimales en cifras ASCII, con los "_" que admite Python
+DIGITS_PATTERN = r'[0-9]+(?:_[0-9]+)*'
+INTEGER_PATTERN = rf'[+-]?{DIGITS_PATTERN}'
+FLOAT_PATTERN = (
+    rf'[+-]?(?:{DIGITS_PATTERN}(?:\.(?:{DIGITS_PATTERN})?)?|\.{DIGITS_PATTERN})'
+    rf'(?:[eE][+-]?{DIGITS_PATTERN})?'
+)
+
+
+def parse_number(field: str, value: str) -> Union[int, float]:
+    """
+    Convert the value of a numeric field (variedad_id, INT_FIELDS, FLOAT_FIELDS).
+
+    Raises:
+        ValueError: If it does not match the field's pattern or is not finite (1e400)
+    """
+    integer = field not in FLOAT_FIELDS
+    if not re.fullmatch(INTEGER_PATTERN if integer else FLOAT_PATTERN, value):
+        raise ValueError(value)
+    if integer:
+        return int(value)
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+# Rangos admitidos (None = sin límite); los años llegan hasta el año que viene
+MIN_YEAR = 1900
+RANGES = {
+    'anno_produccion': (MIN_YEAR, None),
+    'anno_recoleccion': (MIN_YEAR, None),
+    'cantidad_estimada': (0, None),
+    'cantidad_restante': (0, None),
+    'humedad_relativa': (0, 100),
+}
+YEAR_FIELDS = {'anno_produccion', 'anno_recoleccion'}
+
+# Longitud máxima de los campos de texto (de las columnas del modelo)
+TEXT_LENGTHS = {
+    field: LoteSemillas.__table__.c[field].type.length
+    for field in set(FIELD_MAPPING.values()) - INT_FIELDS - FLOAT_FIELDS - {'variedad_id', 'estado'}
+    if getattr(LoteSemillas.__table__.c[field].type, 'length', None)
+}
+
+
+def field_range(field: str) -> Tuple[Optional[float], Optional[float]]:
+    """(min, max) accepted for a numeric field"""
+    low, high = RANGES.get(field, (None, None))
+    if field in YEAR_FIELDS:
+        high = date.today().year + 1
+    return low, high
+
+
+# "activo", "ACTIVO"... -> EstadoLoteSemillas
+ESTADOS = {
+    **{estado.value.lower(): estado for estado in EstadoLoteSemillas},
+    **{estado.name.lower(): estado for estado in EstadoLoteSemillas},
+}
+
+
+class RowError(ValueError):
+    """Validation error of one CSV row"""
+
+    def __init__(self, nombre: str, error: str):
+        super().__init__(error)
+        self.nombre = nombre
+        self.error = error
+
+
+class ImportProgress:
+    """
+    Counters of a running import, kept outside the session (a rollback of a
+    failed chunk must not lose them) and copied to the job on save.
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.total_errors = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row_num: int, nombre: str, error: str) -> None:
+        self.total_errors += 1
+        if len(self.errors) < settings.CSV_IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({'fila': row_num, 'nombre': nombre, 'error': error})
+
+    def save(self, db: Session, job: ImportJob) -> None:
+        job.processed_rows = self.processed
+        job.imported = self.imported
+        job.total_errors = self.total_errors
+        job.errors = list(self.errors)
+        db.commit()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class CsvImportService:
+    """Streams CSV files into the seed inventory"""
+
+    @staticmethod
+    def _open(path: str):
+        return open(path, encoding='utf-8-sig', newline='')  # Handle BOM
+
+    def read_header(self, path: str) -> List[str]:
+        """Column names of the CSV file"""
+        with self._open(path) as csv_file:
+            return csv.DictReader(csv_file).fieldnames or []
+
+    @staticmethod
+    def map_columns(fieldnames: List[str]) -> Dict[str, str]:
+        """{csv column: model field} for the recognised columns"""
+        return {column: FIELD_MAPPING[column] for column in fieldnames if column in FIELD_MAPPING}
+
+    def header_error(self, path: str) -> Optional[str]:
+        """Error message when the file cannot be imported, None if valid"""
+        try:
+            fieldnames = self.read_header(path)
+        except UnicodeDecodeError:
+            return "El archivo debe estar codificado en UTF-8"
+        if not fieldnames:
+            return "CSV vacío o sin columnas"
+        columns = self.map_columns(fieldnames)
+        if 'variedad_id' not in columns.values():
+            return "CSV debe incluir columna 'ID' o 'ID_Variedad'"
+        if 'nombre_comercial' not in columns.values():
+            return "CSV debe incluir columna 'Nombre Comercial'"
+        return None
+
+    def _rows(self, path: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+        with self._open(path) as csv_file:
+            yield from enumerate(csv.DictReader(csv_file), start=2)
+
+    @staticmethod
+    def _field(row: Dict[str, str], columns: Dict[str, str], field: str) -> str:
+        for csv_col, model_field in columns.items():
+            if model_field == field:
+                return (row.get(csv_col) or '').strip()
+        return ''
+
+    def parse_row(
+        self, row: Dict[str, str], columns: Dict[str, str], user_id: int, variedad_ids: Set[int]
+    ) -> Dict[str, Any]:
+        """
+        Validate a CSV row and convert it to LoteSemillas column values.
+
+        Empty values are stored as NULL.
+
+        Raises:
+            RowError: If the row cannot be imported
+        """
+        variedad_id_str = self._field(row, columns, 'variedad_id')
+        nombre_comercial = self._field(row, columns, 'nombre_comercial')
+
+        if not variedad_id_str:
+            raise RowError(nombre_comercial or '(S/N)', 'Falta ID o ID_Variedad')
+        if not nombre_comercial:
+            raise RowError(f'ID:{variedad_id_str}', 'Falta Nombre Comercial')
+        if len(nombre_comercial) > TEXT_LENGTHS['nombre_comercial']:
+            raise RowError(nombre_comercial[:50], f'Nombre Comercial demasiado largo (máx. {TEXT_LENGTHS["nombre_comercial"]})')
+        try:
+            variedad_id = parse_number('variedad_id', variedad_id_str)
+        except ValueError:
+            raise RowError(nombre_comercial, f'ID_Variedad inválido: "{variedad_id_str}"')
+        if variedad_id not in variedad_ids:
+            raise RowError(nombre_comercial, f'Variedad ID {variedad_id} no encontrada')
+
+        lote_data = {
+            'usuario_id': user_id,
+            'variedad_id': variedad_id,
+            'nombre_comercial': nombre_comercial
+        }
+        for csv_col, model_field in columns.items():
+            if model_field in ('variedad_id', 'nombre_comercial'):
+                continue
+            value = (row.get(csv_col) or '').strip() or None
+            try:
+                if value is None:
+                    lote_data[model_field] = None
+                elif model_field in INT_FIELDS or model_field in FLOAT_FIELDS:
+                    # nan/inf no pasan: NaN no falla ninguna comparación de rango
+                    lote_data[model_field] = parse_number(model_field, value)
+                elif model_field == 'estado':
+                    lote_data[model_field] = ESTADOS[value.lower()]
+                else:
+                    # Campos de texto
+                    lote_data[model_field] = value
+            except (ValueError, KeyError):
+                raise RowError(nombre_comercial, f'Campo "{csv_col}" tiene valor inválido: "{value}"')
+            
+            converted = lote_data[model_field]
+            if converted is None:
+                continue
+            low, high = field_range(model_field)
+            if (low is not None and converted < low) or (high is not None and converted > high):
+                raise RowError(nombre_comercial, f'Campo "{csv_col}" fuera de rango: "{value}"')
+            max_length = TEXT_LENGTHS.get(model_field)
+            if max_length and len(converted) > max_length:
+                raise RowError(nombre_comercial, f'Campo "{csv_col}" demasiado largo (máx. {max_length})')
+
+        # executemany necesita las mismas claves en todas las filas
+        if 'estado' not in lote_data or lote_data['estado'] is None:
+            lote_data['estado'] = EstadoLoteSemillas.ACTIVO
+        return lote_data
+
+    def _existing_variedades(self, db: Session, ids: Set[int]) -> Set[int]:
+        """Ids of `ids` that exist in the catalog (one IN query per batch)"""
+        existing = set()
+        ordered = sorted(ids)
+        for start in range(0, len(ordered), VARIEDAD_LOOKUP_BATCH):
+            existing.update(
+                variedad_id for (variedad_id,) in db.query(Variedad.id).filter(
+                    Variedad.id.in_(ordered[start:start + VARIEDAD_LOOKUP_BATCH])
+                )
+            )
+        return existing
+
+    def create_job(self, db: Session, user_id: int, filename: Optional[str]) -> ImportJob:
+        """Register a pending import (committed)"""
+        job = ImportJob(usuario_id=user_id, filename=filename, status=JOB_PENDING, errors=[])
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def _insert_chunk(self, db: Session, progress: ImportProgress, chunk: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """
+        Insert a chunk with one executemany; if it fails, retry row by row
+        to find and report the offending rows. Every commit that inserts
+        lotes bumps the inventory version of their owner.
+        """
+        user_id = chunk[0][1]['usuario_id']
+        try:
+            db.execute(insert(LoteSemillas), [data for _, data in chunk])
+            inventory_version_service.bump(db, user_id)
+            db.commit()
+            progress.imported += len(chunk)
+            return
+        except Exception as chunk_error:
+            db.rollback()
+            logger.warning(f"CSV import chunk insert failed, retrying row by row: {chunk_error}")
+
+        for row_num, data in chunk:
+            try:
+                db.execute(insert(LoteSemillas), [data])
+                inventory_version_service.bump(db, user_id)
+                db.commit()
+                progress.imported += 1
+            except Exception as db_error:
+                db.rollback()
+                progress.add_error(row_num, data['nombre_comercial'], f'Error BD: {str(db_error)[:100]}')
+
+    def import_file(self, db: Session, job: ImportJob, path: str) -> ImportJob:
+        """
+        Run the import of a job.
+
+        Args:
+            db: Database session (committed as the import progresses)
+            job: Pending import job
+            path: CSV file (left in place)
+
+        Returns:
+            The finished job
+        """
+        columns = self.map_columns(self.read_header(path))
+        progress = ImportProgress()
+        job.status = JOB_RUNNING
+        job.started_at = _utcnow()
+        db.commit()
+
+        # Primera pasada: variedades referenciadas y número de filas
+        referenced: Set[int] = set()
+        total_rows = 0
+        for _, row in self._rows(path):
+            total_rows += 1
+            try:
+                referenced.add(int(self._field(row, columns, 'variedad_id')))
+            except ValueError:
+                pass
+        variedad_ids = self._existing_variedades(db, referenced)
+        job.total_rows = total_rows
+        db.commit()
+
+        # Segunda pasada: validar e insertar por bloques
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for row_num, row in self._rows(path):
+            try:
+                chunk.append((row_num, self.parse_row(row, columns, job.usuario_id, variedad_ids)))
+            except RowError as row_error:
+                progress.add_error(row_num, row_error.nombre, row_error.error)
+            progress.processed += 1
+
+            if len(chunk) >= settings.CSV_IMPORT_CHUNK_ROWS:
+                self._insert_chunk(db, progress, chunk)
+                chunk = []
+                progress.save(db, job)
+            elif progress.processed % settings.CSV_IMPORT_CHUNK_ROWS == 0:
+                progress.save(db, job)
+
+        if chunk:
+            self._insert_chunk(db, progress, chunk)
+
+        job.status = JOB_COMPLETED
+        job.finished_at = _utcnow()
+        job.message = f"Importación completada: {progress.imported} importados, {progress.total_errors} errores"
+        progress.save(db, job)
+
+        logger.info(f"Import job {job.id}: {progress.imported} imported, {progress.total_errors} errors")
+        return job
+
+    def run(self, job_id: int, path: str) -> None:
+        """
+        Background entry point: import the file of a job in its own session
+        and delete the file afterwards.
+        """
+        db = SessionLocal()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if job is None:
+                return
+            try:
+                self.import_file(db, job, path)
+            except Exception as e:
+                logger.error(f"Import job {job_id} failed: {str(e)}", exc_info=True)
+                db.rollback()
+                job.status = JOB_FAILED
+                job.finished_at = _utcnow()
+                job.message = f"Error importando CSV: {str(e)[:500]}"
+                db.commit()
+        finally:
+            db.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def summary(job: ImportJob) -> Dict[str, Any]:
+        """Result of a finished job in the format of the synchronous import"""
+        return {
+            "success": job.status == JOB_COMPLETED and job.total_errors == 0,
+            "message": job.message,
+            "imported": job.imported,
+            "errors": job.errors or [],
+            "total_errors": job.total_errors
+        }
+
+
+# Global CSV import service instance
+csv_import_service = CsvImportService()
@@ -0,0 +1,152 @@
+"""
+Dry-run validation of CSV imports.
+Loads the whole file into a DataFrame and applies the import rules of
+CsvImportService (coercions, enums, ranges, lengths, known variedades) as
+column-wide vectorized checks, so every problem of the file is reported at
+once, grouped by column, without writing anything.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.models import Variedad
+from app.application.services.csv_import_service import (
+    csv_import_service, ESTADOS, FLOAT_FIELDS, FLOAT_PATTERN, INT_FIELDS, INTEGER_PATTERN, TEXT_LENGTHS,
+    VARIEDAD_LOOKUP_BATCH, field_range
+)
+
+# Filas de ejemplo devueltas por cada problema (el recuento es siempre completo)
+MAX_REPORTED_ROWS = 50
+MAX_REPORTED_VALUES = 5
+
+
+class CsvValidationService:
+    """Vectorized validation of CSV imports"""
+
+    def _known_variedades(self, db: Session, ids: np.ndarray) -> set:
+        known = set()
+        ids = sorted(int(i) for i in ids)
+        for start in range(0, len(ids), VARIEDAD_LOOKUP_BATCH):
+            known.update(
+                variedad_id for (variedad_id,) in db.query(Variedad.id).filter(
+                    Variedad.id.in_(ids[start:start + VARIEDAD_LOOKUP_BATCH])
+                )
+            )
+        return known
+
+    @staticmethod
+    def _numbers(values: pd.Series, empty: pd.Series, pattern: str):
+        """
+        Vectorized parse_number: (values as floats, mask of invalid ones).
+        Empty values are neither converted nor invalid.
+        """
+        wrong = ~empty & ~values.str.fullmatch(pattern)
+        numbers = pd.to_numeric(
+            values.where(~empty & ~wrong).str.replace('_', '', regex=False), errors='coerce'
+        )
+        # 1e400 -> inf
+        wrong |= ~empty & ~wrong & ~np.isfinite(numbers)
+        return numbers.where(~wrong), wrong
+
+    @staticmethod
+    def _issue(frame: pd.DataFrame, column: str, mask: pd.Series, check: str, message: str) -> Dict[str, Any]:
+        rows = frame.index[mask]
+        values = frame.loc[mask, column].drop_duplicates().head(MAX_REPORTED_VALUES)
+        return {
+            "check": check,
+            "message": message,
+            "count": int(mask.sum()),
+            "rows": [int(row) for row in rows[:MAX_REPORTED_ROWS]],
+            "values": [str(value) for value in values],
+        }
+
+    def validate(self, db: Session, path: str) -> Dict[str, Any]:
+        """
+        Check a CSV file against the import rules without importing it.
+
+        Args:
+            db: Database session (one IN query for the variedades)
+            path: CSV file with a valid header (see CsvImportService.header_error)
+
+        Returns:
+            Totals and, per CSV column, the failed checks with their count,
+            the first row numbers and some offending values
+        """
+        # Todo como texto; las filas cortas dejan NaN en las últimas columnas y
+        # los valores de más se ignoran, como en el csv.DictReader de la importación
+        header = csv_import_service.read_header(path)
+        frame = pd.read_csv(
+            path, dtype=str, keep_default_na=False, encoding='utf-8-sig', usecols=range(len(header))
+        ).fillna('')
+        # Número de fila como en el fichero (cabecera = fila 1)
+        frame.index = frame.index + 2
+        columns = csv_import_service.map_columns(list(frame.columns))
+        invalid = pd.Series(False, index=frame.index)
+        report: Dict[str, List[Dict[str, Any]]] = {}
+
+        def add(column: str, mask: pd.Series, check: str, message: str) -> None:
+            nonlocal invalid
+            if mask.any():
+                report.setdefault(column, []).append(self._issue(frame, column, mask, check, message))
+                invalid |= mask
+
+        for column in frame.columns:
+            frame[column] = frame[column].str.strip()
+
+        for column, field in columns.items():
+            values = frame[column]
+            empty = values == ''
+
+            if field in ('variedad_id', 'nombre_comercial'):
+                add(column, empty, "required", "Valor obligatorio")
+            if field == 'variedad_id':
+                ids, not_integer = self._numbers(values, empty, INTEGER_PATTERN)
+                add(column, not_integer, "integer", "ID_Variedad inválido")
+                candidates = ids[~empty & ~not_integer].astype('int64')
+                known = self._known_variedades(db, candidates.unique())
+                unknown = pd.Series(False, index=frame.index)
+                unknown[candidates.index] = ~candidates.isin(known)
+                add(column, unknown, "unknown_variedad", "Variedad no encontrada")
+                continue
+
+            if field in INT_FIELDS or field in FLOAT_FIELDS:
+                pattern = INTEGER_PATTERN if field in INT_FIELDS else FLOAT_PATTERN
+                numbers, wrong = self._numbers(values, empty, pattern)
+                add(column, wrong, "integer" if field in INT_FIELDS else "number", "Valor numérico inválido")
+
+                low, high = field_range(field)
+                checked = ~empty & ~wrong
+                out_of_range = pd.Series(False, index=frame.index)
+                if low is not None:
+                    out_of_range |= checked & (numbers < low)
+                if high is not None:
+                    out_of_range |= checked & (numbers > high)
+                bounds = f"{'' if low is None else low}..{'' if high is None else high}"
+                add(column, out_of_range, "range", f"Fuera de rango ({bounds})")
+
+            elif field == 'estado':
+                add(column, ~empty & ~values.str.lower().isin(ESTADOS.keys()), "enum",
+                    f"Estado inválido (admitidos: {', '.join(sorted({e.value for e in ESTADOS.values()}))})")
+
+            max_length = TEXT_LENGTHS.get(field)
+            if max_length:
+                add(column, values.str.len() > max_length, "length", f"Demasiado largo (máx. {max_length})")
+
+        total = len(frame)
+        invalid_rows = int(invalid.sum())
+        return {
+            "dry_run": True,
+            "success": invalid_rows == 0,
+            "total_rows": total,
+            "valid_rows": total - invalid_rows,
+            "invalid_rows": invalid_rows,
+            "columns": report,
+            "ignored_columns": [column for column in frame.columns if column not in columns],
+        }
+
+
+# Global CSV validation service instance
+csv_validation_service = CsvValidationService()
@@ -0,0 +1,146 @@
+"""
+Delivery buckets for scheduled notifications.
+The digest job runs every NOTIFICATION_BUCKET_MINUTES and only processes the
+users whose local time has just reached the delivery hour. Local time comes
+from the user's time zone or, when unset, from the UTC offset of their
+longitude. Users of the same time zone are further spread over
+NOTIFICATION_DIGEST_SPREAD_MINUTES (by user id), so every run handles a
+small batch instead of everyone at once.
+"""
+
+from typing import List, Optional
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.infrastructure.database.models import User
+
+
+# Husos horarios derivados de la longitud (15 grados por hora): UTC-12 .. UTC+12
+LONGITUDE_OFFSETS = range(-12, 13)
+
+
+@dataclass(slots=True)
+class DeliveryBucket:
+    """Users due in one run: a time zone (or longitude band) and a spread slot"""
+    label: str  # e.g. "Europe/Madrid#2" or "UTC+01#0"
+    local_date: date  # Fecha local de los usuarios del bucket
+    condition: ColumnElement  # Filtro SQL sobre User
+
+
+def _load_zone(name: Optional[str]) -> Optional[tzinfo]:
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+class DeliveryBucketService:
+    """Computes which users are due at a scheduler tick"""
+
+    @staticmethod
+    def slot_count() -> int:
+        return max(settings.NOTIFICATION_DIGEST_SPREAD_MINUTES // settings.NOTIFICATION_BUCKET_MINUTES, 1)
+
+    def slot_condition(self, slot: int) -> ColumnElement:
+        """Users of one spread slot of a time zone"""
+        return User.id % self.slot_count() == slot
+
+    def shard_condition(self, shard: int, shard_count: int) -> ColumnElement:
+        """
+        Users of one scheduler shard.
+
+        Slots already split users by ``id % slot_count``; sharding by
+        ``id % shard_count`` too would put the users due in a run in only
+        ``shard_count / gcd(slot_count, shard_count)`` shards (one shard
+        when both counts are equal) and leave the rest idle. Shards use the
+        quotient instead, which is independent of the slot.
+        """
+        return (User.id // self.slot_count()) % shard_count == shard
+
+    @staticmethod
+    def floor_tick(moment: datetime) -> datetime:
+        """Start of the bucket interval containing ``moment`` (UTC)"""
+        moment = moment.astimezone(timezone.utc)
+        minutes = moment.minute - moment.minute % settings.NOTIFICATION_BUCKET_MINUTES
+        return moment.replace(minute=minutes, second=0, microsecond=0)
+
+    def _due_slot(self, tick: datetime, zone: tzinfo) -> Optional[tuple]:
+        """(slot, local date) if the delivery window of ``zone`` covers ``tick``"""
+        local = tick.astimezone(zone)
+        window_start = local.replace(
+            hour=settings.NOTIFICATION_DIGEST_HOUR, minute=0, second=0, microsecond=0
+        )
+        elapsed = (local - window_start).total_seconds() / 60
+        if not 0 <= elapsed < self.slot_count() * settings.NOTIFICATION_BUCKET_MINUTES:
+            return None
+        return int(elapsed // settings.NOTIFICATION_BUCKET_MINUTES), local.date()
+
+    def due_buckets(self, db: Session, tick: datetime) -> List[DeliveryBucket]:
+        """
+        Buckets whose users must receive their digest at ``tick``.
+
+        Args:
+            db: Database session (reads the distinct user time zones)
+            tick: Start of the current bucket interval (UTC)
+
+        Returns:
+            Due buckets, each with the SQL condition selecting its users
+        """
+        slots = self.slot_count()
+        buckets = []
+
+        def add(label: str, zone: tzinfo, condition: ColumnElement) -> None:
+            due = self._due_slot(tick, zone)
+            if due is None:
+                return
+            slot, local_date = due
+            if slots > 1:
+                condition = and_(condition, self.slot_condition(slot))
+            buckets.append(DeliveryBucket(f"{label}#{slot}", local_date, condition))
+
+        # Usuarios con huso horario IANA válido
+        valid_zones = set()
+        for (name,) in db.query(User.timezone).filter(User.timezone.isnot(None)).distinct():
+            zone = _load_zone(name)
+            if zone is None:
+                continue
+            valid_zones.add(name)
+            add(name, zone, User.timezone == name)
+
+        # Sin huso (o no válido): franja de longitud
+        no_zone = User.timezone.is_(None)
+        if valid_zones:
+            no_zone = or_(no_zone, User.timezone.notin_(valid_zones))
+        for offset in LONGITUDE_OFFSETS:
+            low = (offset - 0.5) * 15
+            high = (offset + 0.5) * 15
+            band = and_(User.longitude >= low, User.longitude < high)
+            if offset == LONGITUDE_OFFSETS[0]:
+                band = User.longitude < high
+            elif offset == LONGITUDE_OFFSETS[-1]:
+                band = User.longitude >= low
+            add(
+                f"UTC{offset:+03d}",
+                timezone(timedelta(hours=offset)),
+                and_(no_zone, band)
+            )
+
+        # Sin huso ni coordenadas: huso por defecto
+        add(
+            settings.NOTIFICATION_DEFAULT_TIMEZONE,
+            ZoneInfo(settings.NOTIFICATION_DEFAULT_TIMEZONE),
+            and_(no_zone, User.longitude.is_(None))
+        )
+        return buckets
+
+
+# Global delivery bucket service instance
+delivery_bucket_service = DeliveryBucketService()
@@ -5,11 +5,15 @@ Uses OpenStreetMap Nominatim API (free, no authentication required).
 """
 
 import httpx
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, List, Iterable
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Hemisferios
+HEMISPHERE_NORTH = "N"
+HEMISPHERE_SOUTH = "S"
+
 
 class GeolocationService:
     """Service for location geocoding and climate zone determination"""
@@ -88,6 +92,38 @@ class GeolocationService:
         # Default to temperate if no match
         return "temperate"
     
+    @staticmethod
+    def hemisphere_for(latitude: Optional[float]) -> str:
+        """
+        Determine the hemisphere for a latitude.
+        
+        Args:
+            latitude: Geographic latitude, None if unknown
+            
+        Returns:
+            HEMISPHERE_SOUTH for negative latitudes, HEMISPHERE_NORTH otherwise
+        """
+        if latitude is not None and latitude < 0:
+            return HEMISPHERE_SOUTH
+        return HEMISPHERE_NORTH
+    
+    @staticmethod
+    def shift_months_for_hemisphere(months: Iterable[int], hemisphere: str) -> List[int]:
+        """
+        Convert Northern hemisphere months to the given hemisphere.
+        
+        Args:
+            months: Months (1-12) for the Northern hemisphere
+            hemisphere: HEMISPHERE_NORTH or HEMISPHERE_SOUTH
+            
+        Returns:
+            Months for the hemisphere (shifted by 6 and sorted in the south)
+        """
+        if hemisphere == HEMISPHERE_SOUTH:
+            # Opposite seasons
+            return sorted((m + 6 - 1) % 12 + 1 for m in months)
+        return list(months)
+    
     @staticmethod
     def get_planting_months_for_climate(
         climate_zone: str,
@@ -132,13 +168,11 @@ class GeolocationService:
         months = climate_months.get(climate_zone, climate_months["temperate"])
         
         # Adjust for Southern hemisphere (negative latitude)
-        if latitude < 0:
-            # Shift months by 6 (opposite seasons)
-            interior = [(m + 6 - 1) % 12 + 1 for m in months["interior"]]
-            exterior = [(m + 6 - 1) % 12 + 1 for m in months["exterior"]]
-            return {"interior": interior, "exterior": exterior}
-        
-        return months
+        hemisphere = GeolocationService.hemisphere_for(latitude)
+        return {
+            "interior": GeolocationService.shift_months_for_hemisphere(months["interior"], hemisphere),
+            "exterior": GeolocationService.shift_months_for_hemisphere(months["exterior"], hemisphere)
+        }
 
 
 # Module-level function for convenience
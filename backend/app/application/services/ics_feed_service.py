@@ -0,0 +1,293 @@
+"""
+iCalendar (ICS) subscription feed service.
+Renders a user's planting windows, seed expirations and plantation phases
+(germination, transplant, harvest) as all-day VEVENTs. Feeds are streamed
+while they are generated and cached per feed version, so the frequent polls
+of calendar apps are answered from memory. The version is the persisted
+inventory version of the user (one primary key lookup, the same in every
+worker) plus the date.
+"""
+
+from typing import Iterator, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import User
+from app.application.services.calendar_service import CalendarService
+from app.application.services.inventory_version_service import InventoryVersion, inventory_version_service
+from app.application.services.timeline_service import (
+    timeline_service, PHASE_GERMINATION, PHASE_TRANSPLANT, PHASE_HARVEST
+)
+
+
+PRODID = "-//Lorapp//Calendario agricola//ES"
+
+# Eventos por bloque de salida en streaming
+EVENTS_PER_CHUNK = 100
+
+# Horizonte del feed: un mes hacia atrás y un año hacia delante
+FEED_PAST_DAYS = 30
+FEED_FUTURE_DAYS = 365
+
+# Número máximo de feeds en memoria
+MAX_CACHED_FEEDS = 1024
+
+PHASE_SUMMARIES = {
+    PHASE_GERMINATION: "Germinación",
+    PHASE_TRANSPLANT: "Trasplante",
+    PHASE_HARVEST: "Cosecha",
+}
+
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT value (RFC 5545 section 3.3.11)"""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """Fold a content line to 75 octets (RFC 5545 section 3.1)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    current = ""
+    size = 0
+    limit = 75
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if size + char_size > limit:
+            parts.append(current)
+            current = ""
+            size = 0
+            limit = 74  # la línea de continuación empieza con un espacio
+        current += char
+        size += char_size
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_date(value: date) -> str:
+    return value.strftime("%Y%m%d")
+
+
+def _add_month(value: date) -> date:
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+@dataclass(slots=True)
+class CachedFeed:
+    """Rendered feed of a user for one inventory version"""
+    tag: str
+    body: bytes
+    created: float
+
+
+class IcsFeedService:
+    """
+    Generates and caches per-user ICS feeds.
+
+    The cache is keyed by user and validated against the feed version tag
+    (see current_version). Entries also expire after
+    ``ICS_FEED_CACHE_SECONDS``, which bounds changes made outside the API
+    (scripts, raw SQL) that do not bump the inventory version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, CachedFeed]" = OrderedDict()
+
+    def current_version(self, user_id: int, today: Optional[date] = None) -> InventoryVersion:
+        """
+        Version of a user's feed.
+
+        The inventory version is bumped with every change the feed is built
+        from; the date is part of the version too, since the feed horizon
+        moves every day.
+
+        Args:
+            user_id: Feed owner
+            today: Date the feed is rendered for (default today)
+
+        Returns:
+            Version whose tag is the same in every worker for the same data
+        """
+        today = today or date.today()
+        db = SessionLocal()
+        try:
+            version = inventory_version_service.get(db, user_id)
+        finally:
+            db.close()
+
+        midnight = datetime.combine(today, dt_time.min, tzinfo=timezone.utc)
+        return InventoryVersion(
+            tag=f"{version.tag}.{today:%Y%m%d}",
+            changed_at=max(version.changed_at, midnight)
+        )
+
+    def get_cached(self, user_id: int, version: InventoryVersion) -> Optional[CachedFeed]:
+        """Return the cached feed for this version if it is still fresh"""
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is None:
+                return None
+            if entry.tag != version.tag or time.monotonic() - entry.created > settings.ICS_FEED_CACHE_SECONDS:
+                del self._cache[user_id]
+                return None
+            self._cache.move_to_end(user_id)
+            return entry
+
+    def _store(self, user_id: int, tag: str, body: bytes) -> None:
+        with self._lock:
+            self._cache[user_id] = CachedFeed(tag=tag, body=body, created=time.monotonic())
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > MAX_CACHED_FEEDS:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the cached feed of a user"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    @staticmethod
+    def _vevent(uid: str, stamp: str, start: date, end: date, summary: str,
+                description: Optional[str] = None, categories: Optional[str] = None) -> str:
+        """Render an all-day VEVENT covering ``start``..``end`` (inclusive)"""
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{_ics_date(start)}",
+            f"DTEND;VALUE=DATE:{_ics_date(end + timedelta(days=1))}",
+            f"SUMMARY:{escape_text(summary)}",
+        ]
+        if description:
+            lines.append(f"DESCRIPTION:{escape_text(description)}")
+        if categories:
+            lines.append(f"CATEGORIES:{escape_text(categories)}")
+        lines.append("TRANSP:TRANSPARENT")
+        lines.append("END:VEVENT")
+        return "".join(fold_line(line) for line in lines)
+
+    def _events(self, user: User, db: Session, stamp: str, today: date) -> Iterator[str]:
+        horizon_start = today - timedelta(days=FEED_PAST_DAYS)
+        horizon_end = today + timedelta(days=FEED_FUTURE_DAYS)
+
+        # Ventanas de siembra (un evento por mes recomendado)
+        lotes = CalendarService.load_lote_rows(user.id, db, user_latitude=user.latitude)
+        for lote in lotes:
+            meses_interior, meses_exterior = CalendarService.planting_months(lote, user)
+            windows = (
+                ("indoor", "Siembra interior", set(meses_interior)),
+                ("outdoor", "Siembra exterior", set(meses_exterior)),
+            )
+            nombre = f"{lote.especie_nombre} - {lote.variedad_nombre}" if lote.especie_nombre else lote.variedad_nombre
+            for kind, label, meses in windows:
+                month_start = date(horizon_start.year, horizon_start.month, 1)
+                while month_start <= horizon_end:
+                    if month_start.month in meses:
+                        yield self._vevent(
+                            uid=f"lote-{lote.lote_id}-{kind}-{month_start.strftime('%Y%m')}@lorapp",
+                            stamp=stamp,
+                            start=month_start,
+                            end=_add_month(month_start) - timedelta(days=1),
+                            summary=f"{label}: {nombre}",
+                            description=lote.nombre_comercial,
+                            categories="Siembra"
+                        )
+                    month_start = _add_month(month_start)
+
+            fecha_vencimiento = lote.fecha_vencimiento
+            if fecha_vencimiento and horizon_start <= fecha_vencimiento <= horizon_end:
+                yield self._vevent(
+                    uid=f"lote-{lote.lote_id}-expiration@lorapp",
+                    stamp=stamp,
+                    start=fecha_vencimiento,
+                    end=fecha_vencimiento,
+                    summary=f"Caducan las semillas: {lote.nombre_comercial}",
+                    categories="Recordatorio"
+                )
+
+        # Fases de las plantaciones
+        timeline = timeline_service.build(user.id, db)
+        for event in timeline.between(horizon_start, horizon_end):
+            yield self._vevent(
+                uid=f"plantacion-{event.plantacion_id}-{event.phase}@lorapp",
+                stamp=stamp,
+                start=event.start,
+                end=event.end,
+                summary=f"{PHASE_SUMMARIES[event.phase]}: {event.nombre_plantacion}",
+                description=event.variedad_nombre,
+                categories=PHASE_SUMMARIES[event.phase]
+            )
+
+    def stream(self, user_id: int, version: InventoryVersion) -> Iterator[bytes]:
+        """
+        Render the feed of a user chunk by chunk.
+
+        The generator opens its own database session on first iteration, so
+        nothing is held if the client goes away before the body is read. The
+        complete body is cached once the last chunk has been produced.
+
+        Args:
+            user_id: Feed owner
+            version: Inventory version the feed is rendered for
+
+        Yields:
+            UTF-8 encoded ICS chunks
+        """
+        chunks: List[bytes] = []
+
+        def emit(text: str) -> bytes:
+            data = text.encode("utf-8")
+            chunks.append(data)
+            return data
+
+        db = SessionLocal()
+        try:
+            stamp = version.changed_at.strftime("%Y%m%dT%H%M%SZ")
+            yield emit("".join(fold_line(line) for line in (
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                f"PRODID:{PRODID}",
+                "CALSCALE:GREGORIAN",
+                "METHOD:PUBLISH",
+                "X-WR-CALNAME:Lorapp",
+                "X-PUBLISHED-TTL:PT1H",
+                "REFRESH-INTERVAL;VALUE=DURATION:PT1H",
+            )))
+
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is not None:
+                batch: List[str] = []
+                for vevent in self._events(user, db, stamp, date.today()):
+                    batch.append(vevent)
+                    if len(batch) >= EVENTS_PER_CHUNK:
+                        yield emit("".join(batch))
+                        batch = []
+                if batch:
+                    yield emit("".join(batch))
+
+            yield emit(fold_line("END:VCALENDAR"))
+            if user is not None:
+                self._store(user_id, version.tag, b"".join(chunks))
+        finally:
+            db.close()
+
+
+# Global ICS feed service instance
+ics_feed_service = IcsFeedService()
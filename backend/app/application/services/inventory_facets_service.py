@@ -0,0 +1,222 @@
+"""
+Inventory facets service.
+Counts the lotes of a user per estado, marca, especie, storage place and
+origin type for the filter chips of the inventory, all in one query with
+GROUPING SETS. Facets are disjunctive: each one is counted with every
+applied filter except its own, so the other chips of a selected facet keep
+their counts. Results are cached per user, filters and inventory version.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.infrastructure.database.models import LoteSemillas, Variedad, Especie
+from app.application.services.inventory_version_service import InventoryVersion
+from app.application.services.text_search_service import text_search_service
+
+FACET_ESTADO = "estado"
+FACET_MARCA = "marca"
+FACET_ESPECIE = "especie"
+FACET_LUGAR = "lugar_almacenamiento"
+FACET_TIPO_ORIGEN = "tipo_origen"
+
+# Columnas agrupadas por cada faceta (la especie se agrupa por id y nombre)
+FACET_COLUMNS = {
+    FACET_ESTADO: (LoteSemillas.estado,),
+    FACET_MARCA: (LoteSemillas.marca,),
+    FACET_ESPECIE: (Especie.id, Especie.nombre_comun),
+    FACET_LUGAR: (LoteSemillas.lugar_almacenamiento,),
+    FACET_TIPO_ORIGEN: (LoteSemillas.tipo_origen,),
+}
+
+# Número máximo de resultados en memoria
+MAX_CACHED_FACETS = 4096
+
+
+class LoteFilters(NamedTuple):
+    """Filters of the inventory listing, shared with its facets"""
+    estado: Optional[str] = None
+    marca: Optional[str] = None
+    especie_id: Optional[int] = None
+    lugar_almacenamiento: Optional[str] = None
+    tipo_origen: Optional[str] = None
+    search: Optional[str] = None
+
+
+def lote_conditions(filters: LoteFilters) -> Dict[str, ColumnElement]:
+    """
+    SQL conditions of the applied filters.
+
+    Args:
+        filters: Filters of the request
+
+    Returns:
+        Condition per applied filter, keyed by facet name ('search' for the text search)
+    """
+    conditions = {}
+    if filters.estado:
+        conditions[FACET_ESTADO] = LoteSemillas.estado == filters.estado
+    if filters.marca:
+        conditions[FACET_MARCA] = text_search_service.contains(LoteSemillas.marca, filters.marca)
+    if filters.especie_id is not None:
+        conditions[FACET_ESPECIE] = LoteSemillas.variedad_id.in_(
+            select(Variedad.id).where(Variedad.especie_id == filters.especie_id)
+        )
+    if filters.lugar_almacenamiento:
+        conditions[FACET_LUGAR] = LoteSemillas.lugar_almacenamiento == filters.lugar_almacenamiento
+    if filters.tipo_origen:
+        conditions[FACET_TIPO_ORIGEN] = LoteSemillas.tipo_origen == filters.tipo_origen
+    if filters.search:
+        conditions["search"], _ = text_search_service.lote_search(filters.search)
+    return conditions
+
+
+def _count(conditions: List[ColumnElement]) -> ColumnElement:
+    """count(*), restricted with FILTER (WHERE ...) when there are conditions"""
+    if not conditions:
+        return func.count()
+    return func.count().filter(and_(*conditions))
+
+
+@dataclass(slots=True)
+class CachedFacets:
+    """Facet counts of a user and filters for one inventory version"""
+    tag: str
+    result: Dict[str, Any]
+    created: float
+
+
+class InventoryFacetsService:
+    """
+    Computes and caches inventory facet counts.
+
+    Entries are validated against the persisted inventory version, which
+    every worker reads from the database, so a change handled by another
+    worker invalidates them at once. They also expire after
+    ``SEEDS_FACETS_CACHE_SECONDS``, which bounds changes made outside the API
+    (scripts, raw SQL) that do not bump the version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[int, LoteFilters], CachedFacets]" = OrderedDict()
+
+    def _get_cached(self, key: Tuple[int, LoteFilters], version: InventoryVersion) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry.tag != version.tag or time.monotonic() - entry.created > settings.SEEDS_FACETS_CACHE_SECONDS:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry.result
+
+    def _store(self, key: Tuple[int, LoteFilters], tag: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[key] = CachedFacets(tag=tag, result=result, created=time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > MAX_CACHED_FACETS:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _statement(user_id: int, filters: LoteFilters):
+        conditions = lote_conditions(filters)
+        if filters.especie_id is not None:
+            # Especies ya está en el JOIN: sin subconsulta
+            conditions[FACET_ESPECIE] = Especie.id == filters.especie_id
+        facet_filters = {name: condition for name, condition in conditions.items() if name in FACET_COLUMNS}
+        # La búsqueda de texto restringe todas las facetas
+        where = [LoteSemillas.usuario_id == user_id] + [
+            condition for name, condition in conditions.items() if name not in FACET_COLUMNS
+        ]
+
+        columns = []
+        for name, facet_columns in FACET_COLUMNS.items():
+            columns.extend(facet_columns)
+            columns.append(func.grouping(facet_columns[0]).label(f"grouping_{name}"))
+            # Cada faceta cuenta con todos los filtros menos el suyo
+            columns.append(_count([
+                condition for other, condition in facet_filters.items() if other != name
+            ]).label(f"count_{name}"))
+        columns.append(_count(list(facet_filters.values())).label("total"))
+
+        return select(*columns).select_from(LoteSemillas).join(
+            Variedad, Variedad.id == LoteSemillas.variedad_id
+        ).join(
+            Especie, Especie.id == Variedad.especie_id
+        ).where(*where).group_by(
+            # Un conjunto por faceta + () para el total
+            func.grouping_sets(*[tuple_(*facet_columns) for facet_columns in FACET_COLUMNS.values()], tuple_())
+        )
+
+    def compute(self, db: Session, user_id: int, filters: LoteFilters) -> Dict[str, Any]:
+        """
+        Count the lotes of a user per facet value in one query.
+
+        Args:
+            db: Database session
+            user_id: Owner of the inventory
+            filters: Filters applied in the inventory listing
+
+        Returns:
+            {"total": lotes matching every filter,
+             "facets": {facet: [{"value", "label", "count"}, ...]}} with the
+            values of each facet sorted by count (lotes without a value
+            are counted under value None)
+        """
+        total = 0
+        facets: Dict[str, List[Dict[str, Any]]] = {name: [] for name in FACET_COLUMNS}
+        for row in db.execute(self._statement(user_id, filters)).mappings():
+            facet = next((name for name in FACET_COLUMNS if row[f"grouping_{name}"] == 0), None)
+            if facet is None:
+                total = row["total"]
+                continue
+            count = row[f"count_{facet}"]
+            if not count:
+                continue
+            if facet == FACET_ESPECIE:
+                value, label = row[Especie.id], row[Especie.nombre_comun]
+            else:
+                value = row[FACET_COLUMNS[facet][0]]
+                value = getattr(value, "value", value)  # Enum -> "activo"
+                label = value
+            facets[facet].append({"value": value, "label": label, "count": count})
+
+        for buckets in facets.values():
+            buckets.sort(key=lambda bucket: (-bucket["count"], bucket["label"] is None, str(bucket["label"])))
+        return {"total": total, "facets": facets}
+
+    def get(self, db: Session, user_id: int, filters: LoteFilters, version: InventoryVersion) -> Dict[str, Any]:
+        """
+        Facet counts for the inventory of a user, from the cache when the
+        inventory version has not changed.
+
+        Args:
+            db: Database session
+            user_id: Owner of the inventory
+            filters: Filters applied in the inventory listing
+            version: Current inventory version of the user
+
+        Returns:
+            Same as compute()
+        """
+        key = (user_id, filters)
+        cached = self._get_cached(key, version)
+        if cached is not None:
+            return cached
+        result = self.compute(db, user_id, filters)
+        self._store(key, version.tag, result)
+        return result
+
+
+# Global inventory facets service instance
+inventory_facets_service = InventoryFacetsService()
@@ -0,0 +1,89 @@
+"""
+Inventory version registry.
+Keeps a per-user counter that is bumped whenever something that feeds the
+calendar changes (lotes, plantaciones, user location) plus a catalog counter
+for variedad/especie edits, so derived artifacts can be cached per version.
+Counters are stored in `inventory_versions` and bumped in the transaction
+of the change itself, so every worker sees the same version and reading it
+is a single primary key lookup.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.models import InventoryVersionRecord
+
+# usuario_id de la fila del catálogo
+CATALOG_SCOPE = 0
+
+# changed_at de lo que nunca ha cambiado (sin fila)
+NEVER_CHANGED = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True, slots=True)
+class InventoryVersion:
+    """Opaque version tag and the time it last changed (UTC, whole seconds)"""
+    tag: str
+    changed_at: datetime
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+class InventoryVersionService:
+    """Persistent inventory versions"""
+
+    @staticmethod
+    def _bump_statement(scope: int):
+        table = InventoryVersionRecord.__table__
+        return insert(table).values(usuario_id=scope, version=1, changed_at=func.now()).on_conflict_do_update(
+            index_elements=[table.c.usuario_id],
+            set_={"version": table.c.version + 1, "changed_at": func.now()}
+        )
+
+    def bump(self, db: Session, user_id: int) -> None:
+        """
+        Mark the inventory of a user as changed (does not commit).
+
+        Call it before committing the change, so both are seen together.
+        """
+        db.execute(self._bump_statement(user_id))
+
+    def bump_catalog(self, db: Session) -> None:
+        """Mark the shared catalog (especies/variedades) as changed (does not commit)"""
+        db.execute(self._bump_statement(CATALOG_SCOPE))
+
+    def get(self, db: Session, user_id: int) -> InventoryVersion:
+        """
+        Return the current version of a user's inventory.
+
+        Args:
+            db: Database session
+            user_id: Owner of the inventory
+
+        Returns:
+            Version whose tag changes with the user's or the catalog's counter
+        """
+        rows = {
+            scope: (version, changed_at)
+            for scope, version, changed_at in db.query(
+                InventoryVersionRecord.usuario_id, InventoryVersionRecord.version, InventoryVersionRecord.changed_at
+            ).filter(InventoryVersionRecord.usuario_id.in_((CATALOG_SCOPE, user_id)))
+        }
+        catalog_version, catalog_changed = rows.get(CATALOG_SCOPE, (0, NEVER_CHANGED))
+        user_version, user_changed = rows.get(user_id, (0, NEVER_CHANGED))
+        return InventoryVersion(
+            tag=f"{catalog_version}.{user_version}",
+            changed_at=max(_as_utc(catalog_changed), _as_utc(user_changed))
+        )
+
+
+# Global inventory version registry
+inventory_version_service = InventoryVersionService()
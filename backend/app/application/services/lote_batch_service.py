@@ -0,0 +1,108 @@
+"""
+Batch mutation of lotes.
+Applies many partial updates or deletions of one user's lotes with a few
+set-based statements instead of one query + commit per lote: lotes that
+receive the same changes share a single `UPDATE ... WHERE id IN (...)`, the
+rest go in one executemany UPDATE by primary key, and deletions are one
+`DELETE ... RETURNING id`. Nothing is committed here; the caller owns the
+transaction.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.models import LoteSemillas, EstadoLoteSemillas
+
+# Resultado por lote
+BATCH_UPDATED = "updated"
+BATCH_UNCHANGED = "unchanged"
+BATCH_DELETED = "deleted"
+BATCH_NOT_FOUND = "not_found"
+
+
+class LoteBatchService:
+    """Set-based updates and deletions of lotes"""
+
+    @staticmethod
+    def _owned_ids(db: Session, user_id: int, ids: List[int]) -> set:
+        # Bloquea las filas hasta el commit: nadie las borra entre la comprobación y el UPDATE
+        return set(db.scalars(
+            select(LoteSemillas.id).where(
+                LoteSemillas.usuario_id == user_id,
+                LoteSemillas.id.in_(ids)
+            ).with_for_update()
+        ))
+
+    def update_many(self, db: Session, user_id: int, updates: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, str]:
+        """
+        Apply partial updates to lotes of a user (does not commit).
+
+        Args:
+            db: Database session
+            user_id: Owner of the lotes; other users' lotes are reported as not found
+            updates: (lote_id, changed fields) pairs, ids must be unique
+
+        Returns:
+            Status of each lote id (BATCH_UPDATED, BATCH_UNCHANGED or BATCH_NOT_FOUND)
+        """
+        owned = self._owned_ids(db, user_id, [lote_id for lote_id, _ in updates])
+        results: Dict[int, str] = {}
+        # Cambios idénticos -> un solo UPDATE ... WHERE id IN (...)
+        groups: Dict[tuple, List[int]] = {}
+        for lote_id, values in updates:
+            if lote_id not in owned:
+                results[lote_id] = BATCH_NOT_FOUND
+                continue
+            if not values:
+                results[lote_id] = BATCH_UNCHANGED
+                continue
+            if 'estado' in values:
+                values = {**values, 'estado': EstadoLoteSemillas(values['estado'])}
+            groups.setdefault(tuple(sorted(values.items())), []).append(lote_id)
+            results[lote_id] = BATCH_UPDATED
+
+        by_primary_key: List[Dict[str, Any]] = []
+        for changes, lote_ids in groups.items():
+            if len(lote_ids) == 1:
+                by_primary_key.append({'id': lote_ids[0], **dict(changes)})
+                continue
+            db.execute(
+                update(LoteSemillas).where(
+                    LoteSemillas.id.in_(lote_ids),
+                    LoteSemillas.usuario_id == user_id
+                ).values(**dict(changes)).execution_options(synchronize_session=False)
+            )
+        if by_primary_key:
+            # ORM bulk UPDATE by primary key: una sentencia por conjunto de campos, en executemany
+            db.execute(update(LoteSemillas), by_primary_key)
+        return results
+
+    @staticmethod
+    def delete_many(db: Session, user_id: int, ids: List[int]) -> Dict[int, str]:
+        """
+        Delete lotes of a user in one statement (does not commit).
+
+        Plantaciones, germination tests and other rows of the lotes are
+        removed by their ON DELETE CASCADE foreign keys.
+
+        Args:
+            db: Database session
+            user_id: Owner of the lotes
+            ids: Lote ids
+
+        Returns:
+            Status of each lote id (BATCH_DELETED or BATCH_NOT_FOUND)
+        """
+        deleted = set(db.scalars(
+            delete(LoteSemillas).where(
+                LoteSemillas.id.in_(ids),
+                LoteSemillas.usuario_id == user_id
+            ).returning(LoteSemillas.id).execution_options(synchronize_session=False)
+        ))
+        return {lote_id: BATCH_DELETED if lote_id in deleted else BATCH_NOT_FOUND for lote_id in ids}
+
+
+# Global lote batch service instance
+lote_batch_service = LoteBatchService()
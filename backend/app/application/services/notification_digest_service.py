@@ -0,0 +1,118 @@
+"""
+Notification digest service.
+Merges every reminder due for a user in the same delivery window (monthly
+planting, seed expiration, transplants...) into a single push with a
+summary line and a deep link, instead of one push per reminder.
+"""
+
+from typing import Dict, List
+from collections import Counter
+
+from app.application.services.notification_outbox_service import PendingNotification
+
+
+DIGEST_TYPE = "digest"
+
+# Elementos detallados en el payload (los push tienen un límite de ~4 KB)
+DIGEST_MAX_ITEMS = 5
+
+# Enlace del resumen (rutas del frontend): listado del tipo si todos los
+# avisos son del mismo tipo, el calendario si se mezclan
+DIGEST_URL = "/calendar"
+TYPE_URLS: Dict[str, str] = {
+    "transplant": "/my-seedling",
+    "expiration_urgent": "/inventory",
+    "expiration_reminder": "/inventory",
+    "monthly_planting": "/calendar",
+}
+
+# Texto del resumen por tipo de recordatorio: (singular, plural)
+SUMMARY_LABELS: Dict[str, tuple] = {
+    "transplant": ("{n} trasplante pendiente", "{n} trasplantes pendientes"),
+    "expiration_urgent": ("{n} semilla a punto de caducar", "{n} semillas a punto de caducar"),
+    "expiration_reminder": ("semillas que caducan pronto", "semillas que caducan pronto"),
+    "monthly_planting": ("siembras del mes", "siembras del mes"),
+}
+
+
+class NotificationDigestService:
+    """Groups pending notifications into one digest per user and window"""
+
+    @staticmethod
+    def summary(counts: Counter) -> str:
+        """
+        Human readable summary of the reminder kinds in a digest.
+
+        Args:
+            counts: Number of reminders per notification type
+
+        Returns:
+            E.g. "3 trasplantes pendientes · siembras del mes"
+        """
+        parts = []
+        for notification_type, n in counts.items():
+            singular, plural = SUMMARY_LABELS.get(notification_type, ("{n} aviso", "{n} avisos"))
+            parts.append((singular if n == 1 else plural).format(n=n))
+        return " · ".join(parts)
+
+    def merge(self, pending: List[PendingNotification], window: str) -> List[PendingNotification]:
+        """
+        Merge the notifications of each user into one digest.
+
+        Users with a single notification keep it unchanged. The digest key
+        is derived from the user and window, so the outbox deduplicates a
+        window that is processed twice.
+
+        Args:
+            pending: Notifications collected by the reminder jobs
+            window: Delivery window identifier (e.g. "2026-10-19")
+
+        Returns:
+            At most one notification per user
+        """
+        by_user: Dict[int, List[PendingNotification]] = {}
+        for notification in pending:
+            by_user.setdefault(notification.user_id, []).append(notification)
+
+        merged = []
+        for user_id, notifications in by_user.items():
+            if len(notifications) == 1:
+                merged.append(notifications[0])
+                continue
+
+            counts = Counter(n.notification_type for n in notifications)
+            urls = {(n.data or {}).get("url") for n in notifications}
+            if len(urls) == 1 and None not in urls:
+                url = urls.pop()
+            elif len(counts) == 1:
+                url = TYPE_URLS.get(notifications[0].notification_type, DIGEST_URL)
+            else:
+                url = DIGEST_URL
+
+            merged.append(PendingNotification(
+                user_id=user_id,
+                notification_type=DIGEST_TYPE,
+                title=f"🌱 Tienes {len(notifications)} avisos en tu huerta",
+                body=self.summary(counts),
+                key=f"{DIGEST_TYPE}:{user_id}:{window}",
+                data={
+                    "type": DIGEST_TYPE,
+                    "url": url,
+                    "counts": dict(counts),
+                    "items": [
+                        {
+                            "type": n.notification_type,
+                            "title": n.title,
+                            "body": n.body,
+                            "url": (n.data or {}).get("url")
+                        }
+                        for n in notifications[:DIGEST_MAX_ITEMS]
+                    ],
+                    "more": max(len(notifications) - DIGEST_MAX_ITEMS, 0)
+                }
+            ))
+        return merged
+
+
+# Global notification digest service instance
+notification_digest_service = NotificationDigestService()
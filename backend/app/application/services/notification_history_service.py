@@ -0,0 +1,189 @@
+"""
+Notification history service.
+`notification_history` is range-partitioned by month on sent_at. This
+service bulk-inserts history rows, creates the partitions of the coming
+months ahead of time and enforces the retention policy by dropping whole
+monthly partitions (no row-by-row DELETE, no table bloat). Rows outside
+every monthly range land in the DEFAULT partition; they are moved into a
+month's partition when it is created and expire with the same retention.
+"""
+
+from typing import Any, Dict, List
+from datetime import date
+import logging
+import re
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.models import NotificationHistory
+
+logger = logging.getLogger(__name__)
+
+TABLE = NotificationHistory.__tablename__
+
+# Nombre de las particiones mensuales: notification_history_y2026m10
+PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+# Recibe las filas que no encajan en ninguna partición mensual
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+class NotificationHistoryService:
+    """Writes and maintains the partitioned notification history"""
+
+    @staticmethod
+    def add_many(db: Session, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert history rows in one multi-row INSERT (does not commit).
+
+        Args:
+            db: Database session
+            rows: Column values (usuario_id, notification_type, title, body,
+                success, error_message...)
+
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        db.execute(insert(NotificationHistory), rows)
+        return len(rows)
+
+    def ensure_partitions(self, db: Session, months_ahead: int = None) -> List[str]:
+        """
+        Create the partitions of the current and the next months.
+
+        Args:
+            db: Database session (committed)
+            months_ahead: Future months to prepare (default NOTIFICATION_HISTORY_MONTHS_AHEAD)
+
+        Returns:
+            Names of the partitions that were missing
+        """
+        if months_ahead is None:
+            months_ahead = settings.NOTIFICATION_HISTORY_MONTHS_AHEAD
+        # Un solo proceso a la vez crea particiones
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": TABLE})
+        existing = set(self.partitions(db))
+        current = date.today().replace(day=1)
+
+        created = []
+        for offset in range(months_ahead + 1):
+            start = _add_months(current, offset)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            if DEFAULT_PARTITION in existing:
+                self._create_from_default(db, name, start)
+            else:
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+                ))
+            created.append(name)
+
+        if DEFAULT_PARTITION not in existing:
+            db.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        db.commit()
+
+        if created:
+            logger.info(f"Created notification history partitions: {', '.join(created)}")
+        return created
+
+    @staticmethod
+    def _create_from_default(db: Session, name: str, start: date) -> None:
+        """
+        Create a monthly partition when the DEFAULT partition exists.
+
+        CREATE ... PARTITION OF fails if the default partition already holds
+        rows of the new range, so the partition is created as a plain
+        table, those rows are moved into it and it is then attached.
+        """
+        end = _add_months(start, 1)
+        # Nada entra en la partición por defecto hasta el commit
+        db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        db.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        moved = db.execute(text(
+            f"WITH moved AS ("
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE sent_at >= :start AND sent_at < :end RETURNING *"
+            f") INSERT INTO {name} SELECT * FROM moved"
+        ), {"start": start, "end": end}).rowcount
+        db.execute(text(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        if moved:
+            logger.info(f"Moved {moved} notification history rows from {DEFAULT_PARTITION} to {name}")
+
+    @staticmethod
+    def partitions(db: Session) -> List[str]:
+        """Names of the partitions attached to notification_history"""
+        return [
+            name for (name,) in db.execute(text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table ORDER BY child.relname"
+            ), {"table": TABLE})
+        ]
+
+    def drop_expired(self, db: Session, retention_months: int = None) -> List[str]:
+        """
+        Drop monthly partitions older than the retention period.
+
+        A partition is dropped once its whole month is older than
+        ``retention_months`` (counting the current month). Rows of the
+        DEFAULT partition older than that are deleted as well.
+
+        Args:
+            db: Database session (committed)
+            retention_months: Months to keep (default NOTIFICATION_HISTORY_RETENTION_MONTHS)
+
+        Returns:
+            Names of the dropped partitions
+        """
+        if retention_months is None:
+            retention_months = settings.NOTIFICATION_HISTORY_RETENTION_MONTHS
+        oldest_kept = _add_months(date.today().replace(day=1), -(retention_months - 1))
+
+        dropped = []
+        existing = self.partitions(db)
+        for name in existing:
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            if month >= oldest_kept:
+                continue
+            # Detach first so the parent is only locked briefly
+            db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+        if DEFAULT_PARTITION in existing:
+            # Filas sin partición mensual (fuera de rango al insertarse)
+            expired = db.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION} WHERE sent_at < :oldest_kept"),
+                {"oldest_kept": oldest_kept}
+            ).rowcount
+            if expired:
+                logger.info(f"Deleted {expired} expired rows from {DEFAULT_PARTITION}")
+        db.commit()
+
+        if dropped:
+            logger.info(f"Dropped expired notification history partitions: {', '.join(dropped)}")
+        return dropped
+
+
+# Global notification history service instance
+notification_history_service = NotificationHistoryService()
@@ -0,0 +1,319 @@
+"""
+Notification outbox service.
+Scheduler jobs enqueue notifications into the `notification_outbox` table
+(one row per subscription, deduplicated by idempotency key) and a worker
+drains it in batches: delivered rows are marked with their delivery time,
+transient failures (network errors, 429, 5xx) are retried with exponential
+backoff or after the Retry-After requested by the push service.
+"""
+
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import random
+
+from sqlalchemy import or_, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import NotificationOutbox, PushSubscription
+from app.application.services.notification_history_service import notification_history_service
+from app.application.services.subscription_health_service import subscription_health_service
+from app.infrastructure.notifications.web_push_service import (
+    push_service, PushMessage, PushResult
+)
+
+logger = logging.getLogger(__name__)
+
+# Estados de una fila del outbox
+OUTBOX_PENDING = "pending"
+OUTBOX_SENDING = "sending"
+OUTBOX_DELIVERED = "delivered"
+OUTBOX_FAILED = "failed"
+
+# Filas insertadas por sentencia al encolar
+ENQUEUE_BATCH_SIZE = 1000
+
+
+@dataclass(slots=True)
+class PendingNotification:
+    """
+    A notification to deliver to every active subscription of a user.
+
+    ``key`` identifies the notification (e.g. "transplant:12:2026-10-19");
+    enqueueing the same key twice for a subscription is a no-op.
+    """
+    user_id: int
+    notification_type: str
+    title: str
+    body: str
+    key: str
+    data: Optional[Dict[str, Any]] = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class NotificationOutboxService:
+    """Enqueues notifications and drains the outbox with retries"""
+
+    def enqueue(self, db: Session, pending: List[PendingNotification]) -> int:
+        """
+        Add notifications to the outbox, one row per active subscription.
+
+        Rows whose idempotency key already exists are skipped, so a job that
+        is re-run after a crash does not notify anyone twice. The caller
+        commits the session.
+
+        Args:
+            db: Database session
+            pending: Notifications to enqueue
+
+        Returns:
+            Number of rows prepared for insertion (duplicates included)
+        """
+        if not pending:
+            return 0
+
+        # Active subscriptions of all recipients in one query (skipping those
+        # with a run of failed deliveries)
+        subscriptions_by_user: Dict[int, List[int]] = {}
+        for subscription_id, usuario_id in db.query(PushSubscription.id, PushSubscription.usuario_id).filter(
+            PushSubscription.usuario_id.in_({n.user_id for n in pending}),
+            PushSubscription.is_active == True,
+            subscription_health_service.healthy_filter()
+        ):
+            subscriptions_by_user.setdefault(usuario_id, []).append(subscription_id)
+
+        rows = []
+        for notification in pending:
+            payload = push_service.build_payload(notification.title, notification.body, notification.data)
+            for subscription_id in subscriptions_by_user.get(notification.user_id, []):
+                rows.append({
+                    "usuario_id": notification.user_id,
+                    "subscription_id": subscription_id,
+                    "idempotency_key": f"{notification.key}:{subscription_id}",
+                    "notification_type": notification.notification_type,
+                    "title": notification.title,
+                    "body": notification.body,
+                    "payload": payload,
+                    "status": OUTBOX_PENDING,
+                    "attempts": 0,
+                })
+
+        for start in range(0, len(rows), ENQUEUE_BATCH_SIZE):
+            statement = insert(NotificationOutbox).on_conflict_do_nothing(
+                index_elements=["idempotency_key"]
+            )
+            db.execute(statement, rows[start:start + ENQUEUE_BATCH_SIZE])
+
+        logger.info(f"Enqueued {len(rows)} push messages for {len(pending)} notifications")
+        return len(rows)
+
+    def claim_batch(self, db: Session, limit: int) -> List[PushMessage]:
+        """
+        Lock and claim the next due rows.
+
+        Rows are selected with ``FOR UPDATE SKIP LOCKED`` so several workers
+        can drain the outbox at once. Claimed rows move to "sending" with a
+        lease: if the worker dies before recording the outcome they become
+        due again once the lease expires.
+
+        Args:
+            db: Database session (committed)
+            limit: Maximum number of rows to claim
+
+        Returns:
+            Messages to deliver, tagged with their outbox row id
+        """
+        now = _utcnow()
+        rows = db.query(NotificationOutbox, PushSubscription).join(
+            PushSubscription, PushSubscription.id == NotificationOutbox.subscription_id
+        ).filter(
+            NotificationOutbox.status.in_((OUTBOX_PENDING, OUTBOX_SENDING)),
+            NotificationOutbox.next_attempt_at <= now
+        ).order_by(
+            NotificationOutbox.next_attempt_at
+        ).limit(limit).with_for_update(of=NotificationOutbox, skip_locked=True).all()
+
+        lease_until = now + timedelta(seconds=settings.NOTIFICATION_OUTBOX_LEASE_SECONDS)
+        messages = []
+        for row, subscription in rows:
+            row.status = OUTBOX_SENDING
+            row.attempts += 1
+            row.next_attempt_at = lease_until
+            messages.append(PushMessage(
+                subscription_id=subscription.id,
+                endpoint=subscription.endpoint,
+                p256dh=subscription.p256dh,
+                auth=subscription.auth,
+                payload=row.payload,
+                tag=row.id
+            ))
+        db.commit()
+        return messages
+
+    @staticmethod
+    def backoff_seconds(attempts: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before the next attempt.
+
+        Exponential backoff with jitter (base * 2^(attempts-1), capped), or the
+        push service's Retry-After when it asks for longer.
+        """
+        base = settings.NOTIFICATION_OUTBOX_BACKOFF_SECONDS
+        delay = min(base * (2 ** max(attempts - 1, 0)), settings.NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS)
+        delay = delay * random.uniform(0.8, 1.2)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def record_results(self, db: Session, results: List[PushResult]) -> Dict[str, int]:
+        """
+        Store delivery outcomes of claimed rows.
+
+        Args:
+            db: Database session (committed)
+            results: Results of a send_batch over claimed messages
+
+        Returns:
+            Counts of delivered, retried and failed rows
+        """
+        counts = {"delivered": 0, "retried": 0, "failed": 0}
+        if not results:
+            return counts
+
+        now = _utcnow()
+        rows = {
+            row.id: row for row in db.query(NotificationOutbox).filter(
+                NotificationOutbox.id.in_([result.message.tag for result in results])
+            )
+        }
+        history = []
+        for result in results:
+            row = rows.get(result.message.tag)
+            if row is None or row.status == OUTBOX_DELIVERED:
+                continue
+            row.last_status_code = result.status_code
+
+            if result.success:
+                row.status = OUTBOX_DELIVERED
+                row.delivered_at = now
+                row.last_error = None
+                counts["delivered"] += 1
+            elif result.retryable and row.attempts < settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+                row.status = OUTBOX_PENDING
+                row.next_attempt_at = now + timedelta(
+                    seconds=self.backoff_seconds(row.attempts, result.retry_after)
+                )
+                row.last_error = result.error
+                counts["retried"] += 1
+                continue
+            else:
+                row.status = OUTBOX_FAILED
+                row.last_error = result.error
+                counts["failed"] += 1
+
+            history.append({
+                "usuario_id": row.usuario_id,
+                "notification_type": row.notification_type,
+                "title": row.title,
+                "body": row.body,
+                "data": {},
+                "success": result.success,
+                "error_message": None if result.success else result.error
+            })
+
+        notification_history_service.add_many(db, history)
+
+        # last_used_at / failure counts; deactivates dead subscriptions
+        deactivated_ids = subscription_health_service.record(db, results)
+        if deactivated_ids:
+            # Nothing else queued for them can be delivered
+            db.query(NotificationOutbox).filter(
+                NotificationOutbox.subscription_id.in_(deactivated_ids),
+                NotificationOutbox.status == OUTBOX_PENDING
+            ).update(
+                {"status": OUTBOX_FAILED, "last_error": "Subscription no longer valid"},
+                synchronize_session=False
+            )
+
+        db.commit()
+        return counts
+
+    @staticmethod
+    def _in_session(method, *args):
+        """Run method(db, *args) in a short session of its own"""
+        db = SessionLocal()
+        try:
+            return method(db, *args)
+        finally:
+            db.close()
+
+    async def drain(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """
+        Deliver due outbox rows batch by batch until none are left.
+
+        Database work happens in short sessions between the network phases,
+        so no transaction stays open while waiting on push services, and
+        runs in a worker thread so the event loop is never blocked on it.
+
+        Args:
+            max_batches: Optional limit of batches for this run
+
+        Returns:
+            Total counts of delivered, retried and failed rows
+        """
+        totals = {"delivered": 0, "retried": 0, "failed": 0}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            messages = await asyncio.to_thread(
+                self._in_session, self.claim_batch, settings.NOTIFICATION_OUTBOX_BATCH_SIZE
+            )
+            if not messages:
+                break
+
+            report = await push_service.send_batch(messages)
+
+            counts = await asyncio.to_thread(self._in_session, self.record_results, report.results)
+            for name, value in counts.items():
+                totals[name] += value
+            batches += 1
+
+        if batches:
+            logger.info(
+                f"Outbox drained in {batches} batch(es): {totals['delivered']} delivered, "
+                f"{totals['retried']} to retry, {totals['failed']} failed"
+            )
+        return totals
+
+    def purge(self, db: Session, older_than_days: int) -> int:
+        """
+        Delete finished rows older than the retention period.
+
+        Args:
+            db: Database session (committed)
+            older_than_days: Retention in days
+
+        Returns:
+            Number of rows deleted
+        """
+        cutoff = _utcnow() - timedelta(days=older_than_days)
+        deleted = db.query(NotificationOutbox).filter(
+            NotificationOutbox.status.in_((OUTBOX_DELIVERED, OUTBOX_FAILED)),
+            or_(
+                NotificationOutbox.delivered_at < cutoff,
+                and_(NotificationOutbox.delivered_at.is_(None), NotificationOutbox.created_at < cutoff)
+            )
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+
+# Global notification outbox service instance
+notification_outbox_service = NotificationOutboxService()
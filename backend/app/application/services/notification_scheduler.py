@@ -1,22 +1,45 @@
 """
 Notification scheduler using APScheduler.
 Runs periodic tasks to send push notifications based on agricultural calendar.
+
+Every worker process starts the scheduler; cron jobs only run in the leader
+(see scheduler_coordination), while outbox delivery and job shards are
+processed by all workers.
+
+Database work never runs on the event loop: jobs that only touch the
+database are plain functions, which APScheduler runs in its worker threads,
+and coroutine jobs hand their blocking parts to asyncio.to_thread.
 """
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
-from datetime import datetime
+from typing import List
+from datetime import datetime, date, timezone
+import asyncio
 import logging
 
+from app.core.config import settings
+from app.core.metrics import job_run, CALENDAR_COMPUTE, registry as metrics_registry
 from app.infrastructure.database.base import SessionLocal
-from app.infrastructure.database.models import User, PushSubscription, NotificationHistory
+from app.infrastructure.database.models import User
 from app.application.services.calendar_service import calendar_service
-from app.infrastructure.notifications.web_push_service import push_service
+from app.application.services.notification_outbox_service import (
+    notification_outbox_service, PendingNotification
+)
+from app.application.services.notification_digest_service import notification_digest_service
+from app.application.services.scheduler_coordination import SchedulerLeader, ShardCoordinator
+from app.application.services.delivery_bucket_service import delivery_bucket_service
+from app.application.services.notification_history_service import notification_history_service
+from app.application.services.sowing_window_service import sowing_window_service
 
 
 logger = logging.getLogger(__name__)
 
+# Clave de ejecución del digest: inicio del intervalo en UTC
+RUN_KEY_FORMAT = "%Y-%m-%dT%H:%M"
+
 
 class NotificationScheduler:
     """
@@ -26,251 +49,434 @@ class NotificationScheduler:
     
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self.leader = SchedulerLeader()
+        self.shards = ShardCoordinator()
+        self.shards.register("daily_digest", self._queue_digests)
     
     def start(self):
         """
         Start the scheduler and register all cron jobs.
         """
-        # Monthly planting reminder - 1st of each month at 9:00 AM
+        # Leader election - check (or take over) the advisory lock
+        self.scheduler.add_job(
+            self.check_leadership,
+            trigger=IntervalTrigger(seconds=settings.SCHEDULER_LEADER_CHECK_SECONDS),
+            id="scheduler_leader",
+            name="Check scheduler leadership",
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True
+        )
+        
+        # Shard worker - processes pending shards published by the leader
+        self.scheduler.add_job(
+            self.process_shards,
+            trigger=IntervalTrigger(seconds=settings.SCHEDULER_SHARD_POLL_SECONDS),
+            id="scheduler_shards",
+            name="Process pending job shards",
+            max_instances=1,
+            coalesce=True
+        )
+        
+        # Daily digest - all reminders of a user merged into one push, sent
+        # at NOTIFICATION_DIGEST_HOUR local time (users due in each interval)
+        self.scheduler.add_job(
+            self.send_daily_digest,
+            trigger=CronTrigger(minute=f"*/{settings.NOTIFICATION_BUCKET_MINUTES}"),
+            id="daily_digest",
+            name="Send daily reminder digests"
+        )
+        
+        # Outbox worker - delivers queued notifications and retries failures
         self.scheduler.add_job(
-            self.send_monthly_planting_reminders,
-            trigger=CronTrigger(day=1, hour=9, minute=0),
-            id="monthly_planting_reminder",
-            name="Send monthly planting reminders"
+            self.drain_outbox,
+            trigger=IntervalTrigger(seconds=settings.NOTIFICATION_OUTBOX_POLL_SECONDS),
+            id="notification_outbox",
+            name="Deliver queued push notifications",
+            max_instances=1,
+            coalesce=True
         )
         
-        # Seed expiration check - Daily at 10:00 AM
+        # Outbox cleanup - Daily at 3:00 AM
         self.scheduler.add_job(
-            self.send_expiration_alerts,
-            trigger=CronTrigger(hour=10, minute=0),
-            id="expiration_alerts",
-            name="Check and alert for expiring seeds"
+            self.purge_outbox,
+            trigger=CronTrigger(hour=3, minute=0),
+            id="notification_outbox_purge",
+            name="Delete finished outbox rows"
         )
         
-        # Transplant reminders - Daily at 8:00 AM
+        # Shard cleanup - Daily at 3:15 AM
         self.scheduler.add_job(
-            self.send_transplant_reminders,
-            trigger=CronTrigger(hour=8, minute=0),
-            id="transplant_reminders",
-            name="Send transplant reminders"
+            self.purge_shards,
+            trigger=CronTrigger(hour=3, minute=15),
+            id="scheduler_shards_purge",
+            name="Delete old job shards"
         )
         
+        # History partitions - Daily at 3:30 AM
+        self.scheduler.add_job(
+            self.maintain_history,
+            trigger=CronTrigger(hour=3, minute=30),
+            id="notification_history_partitions",
+            name="Create and drop notification history partitions"
+        )
+        
+        # Metrics snapshot - every worker publishes its values for GET /metrics
+        if settings.METRICS_MULTIPROC_DIR:
+            self.scheduler.add_job(
+                self.publish_metrics,
+                trigger=IntervalTrigger(seconds=settings.METRICS_SNAPSHOT_SECONDS),
+                id="metrics_snapshot",
+                name="Publish the metrics of this worker",
+                next_run_time=datetime.now(),
+                max_instances=1,
+                coalesce=True
+            )
+        
         self.scheduler.start()
         logger.info("Notification scheduler started")
     
     def stop(self):
         """Stop the scheduler"""
         self.scheduler.shutdown()
+        self.leader.release()
+        try:
+            metrics_registry.write_snapshot()
+        except Exception as e:
+            logger.error(f"Error publishing metrics: {e}")
         logger.info("Notification scheduler stopped")
     
-    async def send_monthly_planting_reminders(self):
+    async def publish_metrics(self):
+        """Write the metrics snapshot of this worker (read by the one serving /metrics)"""
+        try:
+            await asyncio.to_thread(metrics_registry.write_snapshot)
+        except Exception as e:
+            logger.error(f"Error publishing metrics: {e}")
+    
+    async def check_leadership(self):
+        """Keep or take the scheduler leadership"""
+        was_leader = self.leader.is_leader
+        try:
+            # Conexión y consulta del advisory lock: fuera del event loop
+            await asyncio.to_thread(self.leader.check)
+        except Exception as e:
+            logger.error(f"Error checking scheduler leadership: {e}")
+        
+        if self.leader.is_leader and not was_leader:
+            await self.on_leadership_acquired()
+    
+    async def on_leadership_acquired(self):
         """
-        Send monthly planting recommendations to all users.
-        Runs on the 1st of each month.
+        One-off maintenance that must not run in every worker: build the
+        sowing windows of variedades added since the last start.
         """
-        logger.info("Running monthly planting reminder job")
+        try:
+            await asyncio.to_thread(self._build_missing_sowing_windows)
+        except Exception as e:
+            logger.error(f"Sowing window build failed: {e}")
+    
+    @staticmethod
+    def _build_missing_sowing_windows() -> None:
         db = SessionLocal()
+        try:
+            sowing_window_service.rebuild_missing(db)
+        finally:
+            db.close()
+    
+    async def process_shards(self):
+        """Process pending job shards (any worker)"""
+        try:
+            await asyncio.to_thread(self.shards.process_pending)
+        except Exception as e:
+            logger.error(f"Error processing job shards: {e}")
+    
+    async def send_daily_digest(self):
+        """
+        Queue the daily digest of the users whose local delivery time falls
+        in the current interval (see delivery_bucket_service): planting on
+        the 1st of the month, seed expiration and transplants, merged into
+        one push per user.
+        Runs every NOTIFICATION_BUCKET_MINUTES in the leader; with
+        SCHEDULER_SHARDS > 1 the users of the interval are split into shards
+        processed by all workers.
+        """
+        if not self.leader.is_leader:
+            return
         
+        tick = delivery_bucket_service.floor_tick(datetime.now(timezone.utc))
+        run_key = tick.strftime(RUN_KEY_FORMAT)
         try:
-            # Get all users with notifications enabled
-            users = db.query(User).filter(User.notifications_enabled == True).all()
+            await asyncio.to_thread(self._start_daily_digest, run_key)
+        except Exception as e:
+            logger.error(f"Error in daily digest job: {e}")
+        
+        # El líder también procesa shards en lugar de esperar al siguiente sondeo
+        if settings.SCHEDULER_SHARDS > 1:
+            await self.process_shards()
+    
+    def _start_daily_digest(self, run_key: str) -> None:
+        """Publish the shards of a digest run, or queue it here when not sharded"""
+        db = SessionLocal()
+        try:
+            if settings.SCHEDULER_SHARDS > 1:
+                self.shards.publish(db, "daily_digest", run_key, settings.SCHEDULER_SHARDS)
+            else:
+                self._queue_digests(db, 0, 1, run_key)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def _queue_digests(self, db: Session, shard: int, shard_count: int, run_key: str) -> None:
+        """
+        Queue the digests of the due users in one shard (does not commit).
+        
+        Args:
+            db: Database session
+            shard: Shard number (see DeliveryBucketService.shard_condition)
+            shard_count: Number of shards
+            run_key: Interval being processed (UTC, RUN_KEY_FORMAT)
+        """
+        tick = datetime.strptime(run_key, RUN_KEY_FORMAT).replace(tzinfo=timezone.utc)
+        
+        with job_run("daily_digest") as run:
+            buckets = delivery_bucket_service.due_buckets(db, tick)
+            run.extra["buckets"] = len(buckets)
             
-            for user in users:
-                # Get planting recommendations for this month
-                recommendations = calendar_service.get_current_month_recommendations(user, db)
-                
-                if not recommendations:
-                    continue  # No seeds to plant this month
-                
-                # Get user's push subscriptions
-                subscriptions = db.query(PushSubscription).filter(
-                    PushSubscription.user_id == user.id,
-                    PushSubscription.is_active == True
-                ).all()
-                
-                if not subscriptions:
-                    continue  # User has no active subscriptions
+            for bucket in buckets:
+                users_query = db.query(User).filter(
+                    User.notifications_enabled == True,
+                    bucket.condition
+                )
+                if shard_count > 1:
+                    users_query = users_query.filter(delivery_bucket_service.shard_condition(shard, shard_count))
+                users = users_query.all()
+                if not users:
+                    continue
                 
-                # Prepare notification content
-                month_name = datetime.now().strftime("%B")
-                seed_list = ", ".join([r["nombre"] for r in recommendations[:5]])
-                if len(recommendations) > 5:
-                    seed_list += f" y {len(recommendations) - 5} más"
+                today = bucket.local_date
+                pending: List[PendingNotification] = []
+                if today.day == 1:
+                    with CALENDAR_COMPUTE.time(step="monthly_planting"):
+                        pending.extend(self.collect_monthly_planting_reminders(db, users, today))
+                with CALENDAR_COMPUTE.time(step="expiration"):
+                    pending.extend(self.collect_expiration_alerts(db, users, today))
+                with CALENDAR_COMPUTE.time(step="transplant"):
+                    pending.extend(self.collect_transplant_reminders(db, users, today))
                 
-                title = f"🌱 Siembras de {month_name}"
-                body = f"Este mes puedes sembrar: {seed_list}"
+                digests = notification_digest_service.merge(pending, window=today.isoformat())
+                notification_outbox_service.enqueue(db, digests)
                 
-                # Send notification
-                result = push_service.send_to_user(
-                    subscriptions=subscriptions,
-                    title=title,
-                    body=body,
-                    data={"type": "monthly_planting", "recommendations": recommendations}
+                run.users += len(users)
+                run.notifications += len(digests)
+                run.extra["reminders"] = run.extra.get("reminders", 0) + len(pending)
+                logger.info(
+                    f"Daily digest {bucket.label} (shard {shard + 1}/{shard_count}): {len(users)} users, "
+                    f"{len(pending)} reminders merged into {len(digests)} notifications"
                 )
+    
+    def collect_monthly_planting_reminders(
+        self, db: Session, users: List[User], today: date
+    ) -> List[PendingNotification]:
+        """
+        Monthly planting recommendations for each user.
+        
+        Args:
+            db: Database session
+            users: Users with notifications enabled
+            today: Local date of the users
+        
+        Returns:
+            One notification per user with something to sow this month
+        """
+        pending = []
+        for user in users:
+            # Get planting recommendations for this month
+            recommendations = calendar_service.get_current_month_recommendations(user, db, today=today)
+            
+            if not recommendations:
+                continue  # No seeds to plant this month
+            
+            # Prepare notification content
+            month_name = today.strftime("%B")
+            seed_list = ", ".join([r["seed_name"] for r in recommendations[:5]])
+            if len(recommendations) > 5:
+                seed_list += f" y {len(recommendations) - 5} más"
+            
+            pending.append(PendingNotification(
+                user_id=user.id,
+                notification_type="monthly_planting",
+                title=f"🌱 Siembras de {month_name}",
+                body=f"Este mes puedes sembrar: {seed_list}",
+                key=f"monthly_planting:{user.id}:{today:%Y-%m}",
+                data={
+                    "type": "monthly_planting",
+                    "url": f"/calendar/mes/{today.year}/{today.month}",
+                    "recommendations": recommendations
+                }
+            ))
+        return pending
+    
+    def collect_expiration_alerts(
+        self, db: Session, users: List[User], today: date
+    ) -> List[PendingNotification]:
+        """
+        Alerts for seeds expiring within 30 days: urgent ones (7 days) daily,
+        a general reminder on Mondays.
+        
+        Args:
+            db: Database session
+            users: Users with notifications enabled
+            today: Local date of the users
+        
+        Returns:
+            At most one notification per user
+        """
+        # Seeds expiring in 30 days for all these users, in one range query
+        expiring_by_user = calendar_service.get_expiring_lotes_by_user(
+            days_ahead=30, db=db, user_ids=[user.id for user in users], today=today
+        )
+        
+        pending = []
+        for user_id, expiring_soon in expiring_by_user.items():
+            # Seeds expiring in 7 days (more urgent)
+            expiring_urgent = [seed for seed in expiring_soon if seed["days_until"] <= 7]
+            
+            # Send urgent notification if seeds expiring within 7 days
+            if expiring_urgent:
+                seed = expiring_urgent[0]
+                pending.append(PendingNotification(
+                    user_id=user_id,
+                    notification_type="expiration_urgent",
+                    title="⚠️ Semilla próxima a caducar",
+                    body=f"{seed['nombre']} caduca en {seed['days_until']} días",
+                    key=f"expiration_urgent:{user_id}:{today}",
+                    data={"type": "expiration_urgent", "url": "/inventory", "seed": seed}
+                ))
+            
+            # Send general reminder for seeds expiring within 30 days (once per week)
+            elif today.weekday() == 0:  # Monday only
+                pending.append(PendingNotification(
+                    user_id=user_id,
+                    notification_type="expiration_reminder",
+                    title="📅 Semillas por caducar",
+                    body=f"Tienes {len(expiring_soon)} semilla(s) que caducan pronto",
+                    key=f"expiration_reminder:{user_id}:{today}",
+                    data={"type": "expiration_reminder", "url": "/inventory", "seeds": expiring_soon}
+                ))
+        return pending
+    
+    def collect_transplant_reminders(
+        self, db: Session, users: List[User], today: date
+    ) -> List[PendingNotification]:
+        """
+        Reminders for upcoming transplants (within 3 days).
+        
+        Args:
+            db: Database session
+            users: Users with notifications enabled
+            today: Local date of the users
+        
+        Returns:
+            One notification per upcoming transplant
+        """
+        pending = []
+        for user in users:
+            # Get transplants due within 3 days
+            upcoming = calendar_service.get_upcoming_transplants(user, days_ahead=3, db=db, today=today)
+            
+            for item in upcoming:
+                if item["days_until"] == 0:
+                    body = f"Hoy toca trasplantar {item['seed_name']}"
+                else:
+                    body = f"Trasplanta {item['seed_name']} en {item['days_until']} días"
                 
-                # Log notification
-                self._log_notification(
-                    db=db,
+                pending.append(PendingNotification(
                     user_id=user.id,
-                    notification_type="monthly_planting",
-                    title=title,
+                    notification_type="transplant",
+                    title="🌿 Tiempo de trasplantar",
                     body=body,
-                    success=result["successful"] > 0
-                )
-                
-                # Deactivate invalid subscriptions
-                for sub_id in result["invalid_subscriptions"]:
-                    db.query(PushSubscription).filter(PushSubscription.id == sub_id).update(
-                        {"is_active": False}
-                    )
-            
-            db.commit()
-            logger.info(f"Monthly planting reminders sent to {len(users)} users")
+                    key=f"transplant:{item['plantacion_id']}:{today}",
+                    data={
+                        "type": "transplant",
+                        "url": f"/my-seedling/{item['plantacion_id']}",
+                        "seed": item
+                    }
+                ))
+        return pending
+    
+    async def drain_outbox(self):
+        """
+        Deliver due notifications from the outbox.
+        Runs every NOTIFICATION_OUTBOX_POLL_SECONDS.
+        """
+        try:
+            with job_run("notification_outbox") as run:
+                run.extra.update(await notification_outbox_service.drain())
+        except Exception as e:
+            logger.error(f"Error draining notification outbox: {e}")
+    
+    def purge_outbox(self):
+        """
+        Delete delivered and failed outbox rows past the retention period.
+        Runs daily in the leader.
+        """
+        if not self.leader.is_leader:
+            return
         
+        db = SessionLocal()
+        try:
+            with job_run("notification_outbox_purge") as run:
+                deleted = notification_outbox_service.purge(db, settings.NOTIFICATION_OUTBOX_RETENTION_DAYS)
+                run.extra["deleted"] = deleted
+            logger.info(f"Purged {deleted} notification outbox rows")
         except Exception as e:
-            logger.error(f"Error in monthly planting reminder job: {e}")
+            logger.error(f"Error purging notification outbox: {e}")
             db.rollback()
-        
         finally:
             db.close()
     
-    async def send_expiration_alerts(self):
+    def purge_shards(self):
         """
-        Send alerts for seeds expiring within 30 days.
-        Runs daily.
+        Delete job shards past SCHEDULER_SHARD_RETENTION_DAYS.
+        Runs daily in the leader.
         """
-        logger.info("Running expiration alerts job")
-        db = SessionLocal()
+        if not self.leader.is_leader:
+            return
         
+        db = SessionLocal()
         try:
-            users = db.query(User).filter(User.notifications_enabled == True).all()
-            
-            for user in users:
-                # Get seeds expiring in 30 days
-                expiring_soon = calendar_service.get_expiring_lotes(user, days_ahead=30, db=db)
-                
-                # Get seeds expiring in 7 days (more urgent)
-                expiring_urgent = calendar_service.get_expiring_lotes(user, days_ahead=7, db=db)
-                
-                if not expiring_soon:
-                    continue
-                
-                subscriptions = db.query(PushSubscription).filter(
-                    PushSubscription.user_id == user.id,
-                    PushSubscription.is_active == True
-                ).all()
-                
-                if not subscriptions:
-                    continue
-                
-                # Send urgent notification if seeds expiring within 7 days
-                if expiring_urgent:
-                    seed = expiring_urgent[0]
-                    title = "⚠️ Semilla próxima a caducar"
-                    body = f"{seed['nombre']} caduca en {seed['days_until']} días"
-                    
-                    push_service.send_to_user(
-                        subscriptions=subscriptions,
-                        title=title,
-                        body=body,
-                        data={"type": "expiration_urgent", "seed": seed}
-                    )
-                    
-                    self._log_notification(db, user.id, "expiration_urgent", title, body, True)
-                
-                # Send general reminder for seeds expiring within 30 days (once per week)
-                elif len(expiring_soon) > 0 and datetime.now().weekday() == 0:  # Monday only
-                    title = "📅 Semillas por caducar"
-                    body = f"Tienes {len(expiring_soon)} semilla(s) que caducan pronto"
-                    
-                    push_service.send_to_user(
-                        subscriptions=subscriptions,
-                        title=title,
-                        body=body,
-                        data={"type": "expiration_reminder", "seeds": expiring_soon}
-                    )
-                    
-                    self._log_notification(db, user.id, "expiration_reminder", title, body, True)
-            
-            db.commit()
-        
+            with job_run("scheduler_shards_purge") as run:
+                deleted = self.shards.purge(db, settings.SCHEDULER_SHARD_RETENTION_DAYS)
+                run.extra["deleted"] = deleted
+            logger.info(f"Purged {deleted} job shards")
         except Exception as e:
-            logger.error(f"Error in expiration alerts job: {e}")
+            logger.error(f"Error purging job shards: {e}")
             db.rollback()
-        
         finally:
             db.close()
     
-    async def send_transplant_reminders(self):
+    def maintain_history(self):
         """
-        Send reminders for upcoming transplants (within 3 days).
-        Runs daily.
+        Create the coming notification history partitions and drop the
+        ones past NOTIFICATION_HISTORY_RETENTION_MONTHS.
+        Runs daily in the leader.
         """
-        logger.info("Running transplant reminder job")
-        db = SessionLocal()
+        if not self.leader.is_leader:
+            return
         
+        db = SessionLocal()
         try:
-            users = db.query(User).filter(User.notifications_enabled == True).all()
-            
-            for user in users:
-                # Get transplants due within 3 days
-                upcoming = calendar_service.get_upcoming_transplants(user, days_ahead=3, db=db)
-                
-                if not upcoming:
-                    continue
-                
-                subscriptions = db.query(PushSubscription).filter(
-                    PushSubscription.user_id == user.id,
-                    PushSubscription.is_active == True
-                ).all()
-                
-                if not subscriptions:
-                    continue
-                
-                # Send notification for each upcoming transplant
-                for item in upcoming:
-                    title = "🌿 Tiempo de trasplantar"
-                    if item["days_until"] == 0:
-                        body = f"Hoy toca trasplantar {item['nombre']}"
-                    else:
-                        body = f"Trasplanta {item['nombre']} en {item['days_until']} días"
-                    
-                    push_service.send_to_user(
-                        subscriptions=subscriptions,
-                        title=title,
-                        body=body,
-                        data={"type": "transplant", "seed": item}
-                    )
-                    
-                    self._log_notification(db, user.id, "transplant", title, body, True)
-            
-            db.commit()
-        
+            with job_run("notification_history_partitions") as run:
+                run.extra["created"] = len(notification_history_service.ensure_partitions(db))
+                run.extra["dropped"] = len(notification_history_service.drop_expired(db))
         except Exception as e:
-            logger.error(f"Error in transplant reminder job: {e}")
+            logger.error(f"Error maintaining notification history partitions: {e}")
             db.rollback()
-        
         finally:
             db.close()
-    
-    def _log_notification(
-        self,
-        db: Session,
-        user_id: int,
-        notification_type: str,
-        title: str,
-        body: str,
-        success: bool
-    ):
-        """Helper method to log sent notifications"""
-        history = NotificationHistory(
-            user_id=user_id,
-            notification_type=notification_type,
-            title=title,
-            body=body,
-            success=success
-        )
-        db.add(history)
 
 
 # Global scheduler instance
@@ -0,0 +1,249 @@
+"""
+Coordination of the notification scheduler across worker processes.
+
+Every uvicorn/gunicorn worker starts the scheduler, but only the process
+holding a Postgres advisory lock (the leader) runs the cron jobs. The lock
+is session level and lives on a dedicated AUTOCOMMIT connection (never idle
+in a transaction): if the leader dies, its connection closes, the lock is
+released and another worker takes over on its next check.
+
+Large jobs can be split into shards (users by id, see
+DeliveryBucketService.shard_condition). The leader publishes the shards of
+a run in ``scheduler_shards`` and every worker claims pending ones with
+``FOR UPDATE SKIP LOCKED``. A shard that keeps raising is marked failed
+after SCHEDULER_SHARD_MAX_ATTEMPTS tries, and old shards are purged.
+"""
+
+from typing import Callable, Dict, Optional, Set
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import socket
+
+from sqlalchemy import case, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.base import engine, SessionLocal
+from app.infrastructure.database.models import SchedulerShard
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock del líder ("LORA")
+SCHEDULER_LOCK_KEY = 0x4C4F5241
+
+SHARD_PENDING = "pending"
+SHARD_DONE = "done"
+SHARD_FAILED = "failed"
+
+# Longitud máxima guardada en last_error
+MAX_ERROR_LENGTH = 1000
+
+# Processes one shard inside the caller's transaction (must not commit):
+# handler(db, shard, shard_count, run_key)
+ShardHandler = Callable[[Session, int, int, str], None]
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SchedulerLeader:
+    """Leader election with a session-level Postgres advisory lock"""
+
+    def __init__(self, lock_key: int = SCHEDULER_LOCK_KEY):
+        self.lock_key = lock_key
+        self._connection: Optional[Connection] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._connection is not None
+
+    def check(self) -> bool:
+        """
+        Keep or try to take the leadership.
+
+        The leader verifies its lock connection is still alive; other
+        workers try to acquire the lock without waiting.
+
+        Returns:
+            True if this process is the leader
+        """
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                return True
+            except Exception as e:
+                logger.warning(f"Scheduler leader connection lost: {e}")
+                self._drop_connection()
+
+        # AUTOCOMMIT: el lock y los pings no dejan la conexión "idle in transaction"
+        connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+
+        if not acquired:
+            connection.close()
+            return False
+
+        self._connection = connection
+        logger.info(f"Scheduler leadership acquired by {worker_name()}")
+        return True
+
+    def release(self) -> None:
+        """Give up the leadership (on shutdown)"""
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key}
+            )
+        except Exception as e:
+            logger.warning(f"Error releasing scheduler leadership: {e}")
+        self._drop_connection()
+
+    def _drop_connection(self) -> None:
+        try:
+            self._connection.invalidate()
+        except Exception:
+            pass
+        self._connection = None
+
+
+class ShardCoordinator:
+    """Publishes job shards and processes pending ones in any worker"""
+
+    def __init__(self):
+        self._handlers: Dict[str, ShardHandler] = {}
+
+    def register(self, job_id: str, handler: ShardHandler) -> None:
+        self._handlers[job_id] = handler
+
+    def publish(self, db: Session, job_id: str, run_key: str, shard_count: int) -> None:
+        """
+        Create the shards of a run (idempotent per job and run key).
+
+        Args:
+            db: Database session (committed)
+            job_id: Registered job
+            run_key: Run window, e.g. the date
+            shard_count: Number of shards
+        """
+        statement = insert(SchedulerShard).on_conflict_do_nothing(
+            index_elements=["job_id", "run_key", "shard"]
+        )
+        db.execute(statement, [
+            {
+                "job_id": job_id,
+                "run_key": run_key,
+                "shard": shard,
+                "shard_count": shard_count,
+                "status": SHARD_PENDING,
+            }
+            for shard in range(shard_count)
+        ])
+        db.commit()
+
+    def process_pending(self) -> int:
+        """
+        Claim and process pending shards until none are left.
+
+        Each shard is processed in the transaction that locks its row, so
+        its work and the "done" mark are committed together; if the worker
+        dies, the transaction is rolled back and another worker retries it.
+        A handler error is recorded on the shard (attempts, last_error) and
+        the shard is left for a later poll, or marked failed once it reaches
+        SCHEDULER_SHARD_MAX_ATTEMPTS.
+
+        Returns:
+            Number of shards processed by this worker
+        """
+        processed = 0
+        failed_ids: Set[int] = set()  # No se reintentan en esta misma pasada
+        while True:
+            db = SessionLocal()
+            try:
+                query = db.query(SchedulerShard).filter(
+                    SchedulerShard.status == SHARD_PENDING,
+                    SchedulerShard.job_id.in_(list(self._handlers))
+                )
+                if failed_ids:
+                    query = query.filter(SchedulerShard.id.notin_(failed_ids))
+                shard = query.order_by(
+                    SchedulerShard.id
+                ).limit(1).with_for_update(skip_locked=True).first()
+                if shard is None:
+                    db.rollback()
+                    return processed
+
+                shard_id = shard.id
+                label = f"{shard.shard + 1}/{shard.shard_count} of {shard.job_id} ({shard.run_key})"
+                try:
+                    self._handlers[shard.job_id](db, shard.shard, shard.shard_count, shard.run_key)
+                except Exception as e:
+                    db.rollback()
+                    failed_ids.add(shard_id)
+                    self._record_failure(db, shard_id, e)
+                    logger.error(f"Error processing shard {label}: {e}")
+                    continue
+
+                shard.status = SHARD_DONE
+                shard.worker = worker_name()
+                shard.finished_at = datetime.now(timezone.utc)
+                db.commit()
+                processed += 1
+                logger.info(f"Processed shard {label}")
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+    @staticmethod
+    def _record_failure(db: Session, shard_id: int, error: Exception) -> None:
+        """Count a failed attempt; the shard fails for good after SCHEDULER_SHARD_MAX_ATTEMPTS"""
+        attempts = SchedulerShard.attempts + 1
+        db.query(SchedulerShard).filter(
+            SchedulerShard.id == shard_id,
+            SchedulerShard.status == SHARD_PENDING
+        ).update(
+            {
+                "attempts": attempts,
+                "last_error": f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH],
+                "worker": worker_name(),
+                "status": case(
+                    (attempts >= settings.SCHEDULER_SHARD_MAX_ATTEMPTS, SHARD_FAILED),
+                    else_=SHARD_PENDING
+                ),
+            },
+            synchronize_session=False
+        )
+        db.commit()
+
+    @staticmethod
+    def purge(db: Session, older_than_days: int) -> int:
+        """
+        Delete the shards of runs older than the retention period.
+
+        Their run windows are over, so pending ones are stale as well.
+
+        Args:
+            db: Database session (committed)
+            older_than_days: Retention in days
+
+        Returns:
+            Number of rows deleted
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        deleted = db.query(SchedulerShard).filter(
+            SchedulerShard.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
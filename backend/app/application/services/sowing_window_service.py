@@ -0,0 +1,111 @@
+"""
+Sowing window service.
+Precomputes the sowing months of every variedad for each hemisphere into
+the `sowing_window` table, which the calendar joins instead of adjusting the
+months of each lote on every request. Windows are rebuilt when a variedad's
+months change (API and catalog scripts); the scheduler leader builds the
+missing ones.
+
+The user's climate zone is not part of the key: the calendar's months only
+depend on the hemisphere. The per-zone tables of
+GeolocationService.get_planting_months_for_climate are generic (the same
+months for every species) and the calendar has never applied them, so
+keying by zone would only store identical copies of each window.
+"""
+
+from typing import Iterable, Optional
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.models import Variedad, SowingWindow
+from app.application.services.calendar_service import CalendarService
+from app.application.services.geolocation_service import HEMISPHERE_NORTH, HEMISPHERE_SOUTH
+
+logger = logging.getLogger(__name__)
+
+# Filas insertadas por sentencia al reconstruir
+INSERT_BATCH_SIZE = 1000
+
+# Una ventana por hemisferio
+HEMISPHERES = (HEMISPHERE_NORTH, HEMISPHERE_SOUTH)
+
+
+class SowingWindowService:
+    """Builds the sowing_window table from the variedad catalog"""
+
+    def rebuild(self, db: Session, variedad_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recompute the sowing windows of some (or all) variedades.
+
+        Args:
+            db: Database session (committed on success)
+            variedad_ids: Variedades to rebuild, None for the whole catalog
+
+        Returns:
+            Number of window rows written
+        """
+        ids = None if variedad_ids is None else list(variedad_ids)
+        if ids is not None and not ids:
+            return 0
+
+        query = db.query(
+            Variedad.id,
+            Variedad.meses_siembra_interior,
+            Variedad.meses_siembra_exterior
+        )
+        delete_query = db.query(SowingWindow)
+        if ids is not None:
+            query = query.filter(Variedad.id.in_(ids))
+            delete_query = delete_query.filter(SowingWindow.variedad_id.in_(ids))
+
+        delete_query.delete(synchronize_session=False)
+
+        written = 0
+        batch = []
+        for variedad_id, interior, exterior in query:
+            for hemisphere in HEMISPHERES:
+                batch.append({
+                    "variedad_id": variedad_id,
+                    "hemisphere": hemisphere,
+                    "meses_siembra_interior": CalendarService.window_months(interior or [], hemisphere),
+                    "meses_siembra_exterior": CalendarService.window_months(exterior or [], hemisphere),
+                })
+            if len(batch) >= INSERT_BATCH_SIZE:
+                db.execute(insert(SowingWindow), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            db.execute(insert(SowingWindow), batch)
+            written += len(batch)
+
+        db.commit()
+        return written
+
+    def rebuild_missing(self, db: Session) -> int:
+        """
+        Build the windows of variedades that have none yet.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of window rows written
+        """
+        missing = [
+            variedad_id for (variedad_id,) in db.query(Variedad.id).filter(
+                ~db.query(SowingWindow.id).filter(
+                    SowingWindow.variedad_id == Variedad.id
+                ).exists()
+            )
+        ]
+        if not missing:
+            return 0
+        written = self.rebuild(db, missing)
+        logger.info(f"Built {written} sowing windows for {len(missing)} variedades")
+        return written
+
+
+# Global sowing window service instance
+sowing_window_service = SowingWindowService()
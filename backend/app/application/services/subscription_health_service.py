@@ -0,0 +1,93 @@
+"""
+Push subscription health.
+Records the outcome of every real delivery on its subscription
+(last_used_at, consecutive_failures) and deactivates the endpoints the push
+service rejects (404/410) or that keep failing for reasons of their own.
+Transient failures (network errors, 429, 5xx) are retried by the outbox and
+say nothing about the subscription, so they never count towards
+deactivation: an outage of a push service must not disable every
+subscription it touched. There is no separate probe:
+browsers treat pushes without a notification as abuse (Chrome shows a
+generic "site updated in the background" message, Safari revokes the
+subscription), so health is only learnt from notifications actually sent.
+"""
+
+from typing import List
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.models import PushSubscription
+from app.infrastructure.notifications.web_push_service import PushResult
+
+
+class SubscriptionHealthService:
+    """Tracks delivery health of push subscriptions"""
+
+    @staticmethod
+    def healthy_filter():
+        """Subscriptions the delivery pipeline should still send to"""
+        return PushSubscription.consecutive_failures < settings.PUSH_SUBSCRIPTION_MAX_FAILURES
+
+    def record(self, db: Session, results: List[PushResult]) -> List[int]:
+        """
+        Store delivery outcomes on the subscriptions (does not commit).
+
+        Successful deliveries set last_used_at and reset the failure count;
+        permanent failures (4xx other than 404/410/429) increase it and
+        transient ones only set last_checked_at. Subscriptions rejected by
+        the push service (404/410) or reaching PUSH_SUBSCRIPTION_MAX_FAILURES
+        are deactivated. All updates are bulk statements.
+
+        Args:
+            db: Database session
+            results: Delivery results
+
+        Returns:
+            Ids of the subscriptions deactivated
+        """
+        now = datetime.now(timezone.utc)
+        ok_ids = {r.message.subscription_id for r in results if r.success}
+        invalid_ids = {r.message.subscription_id for r in results if r.invalid_subscription}
+        failed_ids = {
+            r.message.subscription_id for r in results
+            if not r.success and not r.retryable and not r.invalid_subscription
+        } - ok_ids
+        transient_ids = {r.message.subscription_id for r in results if r.retryable} - ok_ids - failed_ids
+
+        if ok_ids:
+            db.query(PushSubscription).filter(PushSubscription.id.in_(ok_ids)).update(
+                {"last_used_at": now, "last_checked_at": now, "consecutive_failures": 0},
+                synchronize_session=False
+            )
+        if transient_ids:
+            db.query(PushSubscription).filter(PushSubscription.id.in_(transient_ids)).update(
+                {"last_checked_at": now}, synchronize_session=False
+            )
+        if failed_ids:
+            db.query(PushSubscription).filter(PushSubscription.id.in_(failed_ids)).update(
+                {
+                    "last_checked_at": now,
+                    "consecutive_failures": PushSubscription.consecutive_failures + 1
+                },
+                synchronize_session=False
+            )
+            exhausted = {
+                subscription_id for (subscription_id,) in db.query(PushSubscription.id).filter(
+                    PushSubscription.id.in_(failed_ids),
+                    PushSubscription.is_active == True,
+                    ~self.healthy_filter()
+                )
+            }
+            invalid_ids |= exhausted
+
+        if invalid_ids:
+            db.query(PushSubscription).filter(PushSubscription.id.in_(invalid_ids)).update(
+                {"is_active": False}, synchronize_session=False
+            )
+        return sorted(invalid_ids)
+
+
+# Global subscription health service instance
+subscription_health_service = SubscriptionHealthService()
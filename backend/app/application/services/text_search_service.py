@@ -0,0 +1,84 @@
+"""
+Text search service.
+Builds the search conditions and ranking used by the inventory, garden and
+seedling listings. Substring matches run on `lorapp_unaccent(column)` so
+the pg_trgm GIN expression indexes of migration 030 serve `%term%`
+patterns; lotes are also matched on their `search_vector` (Spanish stems
+plus unstemmed words, accent-insensitive) and ranked by relevance.
+"""
+
+from typing import List, Tuple
+
+from sqlalchemy import func, or_, literal, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.infrastructure.database.models import LoteSemillas
+
+# Configuraciones de text search: castellano con stemming y 'simple' (euskera, marcas)
+SEARCH_CONFIGS = ("spanish", "simple")
+
+
+def _like_pattern(term: str) -> str:
+    """%term% with LIKE wildcards escaped"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class TextSearchService:
+    """Accent-insensitive, index-backed search conditions"""
+
+    @staticmethod
+    def unaccent(value) -> ColumnElement:
+        return func.lorapp_unaccent(value)
+
+    def contains(self, column, term: str) -> ColumnElement:
+        """
+        Case and accent-insensitive substring match.
+
+        Args:
+            column: Text column (with a trigram index on lorapp_unaccent(column))
+            term: Text typed by the user
+
+        Returns:
+            Condition usable in filter()
+        """
+        return self.unaccent(column).ilike(self.unaccent(literal(_like_pattern(term))), escape="\\")
+
+    def similarity(self, columns: List, term: str) -> ColumnElement:
+        """Best trigram similarity of the term against any of the columns"""
+        scores = [func.similarity(self.unaccent(column), self.unaccent(literal(term))) for column in columns]
+        return scores[0] if len(scores) == 1 else func.greatest(*scores)
+
+    def lote_search(self, term: str) -> Tuple[ColumnElement, ColumnElement]:
+        """
+        Search lotes by nombre comercial or marca.
+
+        A lote matches when any word form of the term is in its search vector
+        ("tomates" finds "Tomate corazón de buey") or when the term is a
+        substring of the name or the brand.
+
+        Args:
+            term: Text typed by the user
+
+        Returns:
+            (condition, rank) - rank is higher for better matches
+        """
+        queries = [
+            func.websearch_to_tsquery(literal_column(f"'{config}'::regconfig"), self.unaccent(literal(term)))
+            for config in SEARCH_CONFIGS
+        ]
+        condition = or_(
+            *[LoteSemillas.search_vector.op("@@")(query) for query in queries],
+            self.contains(LoteSemillas.nombre_comercial, term),
+            self.contains(LoteSemillas.marca, term)
+        )
+        rank = (
+            func.ts_rank(LoteSemillas.search_vector, queries[0])
+            + func.ts_rank(LoteSemillas.search_vector, queries[1])
+            + self.similarity([LoteSemillas.nombre_comercial, LoteSemillas.marca], term)
+        )
+        return condition, rank
+
+
+# Global text search service instance
+text_search_service = TextSearchService()
@@ -0,0 +1,327 @@
+"""
+Plantation timeline service.
+Indexes the lifecycle phases of each plantacion (germination, transplant
+window and harvest window) as date intervals so that "what is happening on
+day D / in range R" is answered without scanning every plantacion.
+Built timelines are cached per user and inventory version.
+"""
+
+from typing import Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.models import EstadoPlantacion
+from app.application.services.calendar_service import (
+    CalendarService, PlantacionCalendarRow
+)
+from app.application.services.inventory_version_service import inventory_version_service
+
+
+T = TypeVar("T")
+
+# Fases de la línea temporal
+PHASE_GERMINATION = "germination"
+PHASE_TRANSPLANT = "transplant"
+PHASE_HARVEST = "harvest"
+
+# Margen (días) de la ventana de trasplante alrededor de la fecha estimada
+TRANSPLANT_WINDOW_DAYS = 7
+
+# Plantaciones que siguen vivas en el calendario
+TIMELINE_ESTADOS = [
+    EstadoPlantacion.PLANIFICADA,
+    EstadoPlantacion.SEMBRADA,
+    EstadoPlantacion.GERMINADA,
+    EstadoPlantacion.LISTA,
+    EstadoPlantacion.TRASPLANTADA,
+    EstadoPlantacion.CRECIMIENTO,
+    EstadoPlantacion.COSECHA_CERCANA,
+]
+
+# Número máximo de líneas temporales en memoria
+MAX_CACHED_TIMELINES = 1024
+
+# Estados en los que el plantel todavía está en semillero
+SEEDLING_ESTADOS = {
+    EstadoPlantacion.PLANIFICADA,
+    EstadoPlantacion.SEMBRADA,
+    EstadoPlantacion.GERMINADA,
+    EstadoPlantacion.LISTA,
+}
+
+
+class IntervalIndex(Generic[T]):
+    """
+    Static interval tree over closed ``[start, end]`` intervals.
+
+    Intervals are sorted by start and laid out as an implicit balanced BST
+    (the node of ``[lo, hi)`` is its middle element). Each node keeps the
+    maximum end of its subtree, so overlap queries prune whole subtrees and
+    run in O(log n + k) for k matches. Build cost is O(n log n).
+    """
+
+    __slots__ = ("_starts", "_ends", "_payloads", "_max_end")
+
+    def __init__(self, intervals: Iterable[Tuple[date, date, T]]):
+        items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts = [item[0] for item in items]
+        self._ends = [item[1] for item in items]
+        self._payloads = [item[2] for item in items]
+        self._max_end: List[Optional[date]] = [None] * len(items)
+        if items:
+            self._build(0, len(items))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _build(self, lo: int, hi: int) -> date:
+        mid = (lo + hi) // 2
+        max_end = self._ends[mid]
+        if lo < mid:
+            max_end = max(max_end, self._build(lo, mid))
+        if mid + 1 < hi:
+            max_end = max(max_end, self._build(mid + 1, hi))
+        self._max_end[mid] = max_end
+        return max_end
+
+    def overlapping(self, start: date, end: date) -> List[T]:
+        """
+        Return payloads whose interval overlaps ``[start, end]``, ordered by
+        interval start.
+        """
+        result: List[Tuple[int, T]] = []
+        stack = [(0, len(self._starts))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            # Todo el subárbol termina antes del rango
+            if self._max_end[mid] < start:
+                continue
+            stack.append((lo, mid))
+            # A la derecha solo hay intervalos que empiezan igual o más tarde
+            if self._starts[mid] <= end:
+                if self._ends[mid] >= start:
+                    result.append((mid, self._payloads[mid]))
+                stack.append((mid + 1, hi))
+        result.sort(key=lambda item: item[0])
+        return [payload for _, payload in result]
+
+    def at(self, day: date) -> List[T]:
+        """Return payloads whose interval contains ``day``"""
+        return self.overlapping(day, day)
+
+
+@dataclass(frozen=True, slots=True)
+class TimelineEvent:
+    """One lifecycle phase of a plantacion"""
+    plantacion_id: int
+    nombre_plantacion: str
+    variedad_nombre: str
+    especie_nombre: Optional[str]
+    estado: EstadoPlantacion
+    phase: str
+    start: date
+    end: date
+
+    def to_dict(self) -> Dict:
+        return {
+            "plantacion_id": self.plantacion_id,
+            "nombre_plantacion": self.nombre_plantacion,
+            "variedad": self.variedad_nombre,
+            "especie": self.especie_nombre,
+            "estado": self.estado.value,
+            "phase": self.phase,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+        }
+
+
+def _as_date(value: Optional[datetime]) -> Optional[date]:
+    if value is None:
+        return None
+    return value.date() if isinstance(value, datetime) else value
+
+
+class PlantationTimeline:
+    """Interval index of the lifecycle phases of a user's plantaciones"""
+
+    def __init__(self, events: Iterable[TimelineEvent]):
+        self._index: IntervalIndex[TimelineEvent] = IntervalIndex(
+            (event.start, event.end, event) for event in events
+        )
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def on(self, day: date) -> List[TimelineEvent]:
+        """Events active on ``day``"""
+        return self._index.at(day)
+
+    def between(self, start: date, end: date) -> List[TimelineEvent]:
+        """Events overlapping ``[start, end]``"""
+        return self._index.overlapping(start, end)
+
+    def by_day(self, start: date, end: date) -> Dict[date, List[TimelineEvent]]:
+        """
+        Group the events overlapping ``[start, end]`` by day.
+
+        Only days with at least one event are returned.
+        """
+        days: Dict[date, List[TimelineEvent]] = {}
+        for event in self.between(start, end):
+            day = max(event.start, start)
+            last = min(event.end, end)
+            while day <= last:
+                days.setdefault(day, []).append(event)
+                day += timedelta(days=1)
+        return dict(sorted(days.items()))
+
+
+@dataclass(slots=True)
+class CachedTimeline:
+    """Timeline of a user for one inventory version"""
+    tag: str
+    timeline: PlantationTimeline
+    created: float
+
+
+class TimelineService:
+    """
+    Builds plantation timelines from the calendar projection.
+
+    Timelines are immutable once built and are cached per user. Entries are
+    validated against the persisted inventory version, which the plantacion,
+    lote and catalog changes bump, so an edit in any worker invalidates them.
+    They also expire after ``TIMELINE_CACHE_SECONDS`` (changes outside the API).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, CachedTimeline]" = OrderedDict()
+
+    @staticmethod
+    def phases_for(row: PlantacionCalendarRow) -> List[TimelineEvent]:
+        """
+        Derive the lifecycle phases of a plantacion.
+
+        Recorded dates (fecha_germinacion, fecha_trasplante,
+        fecha_cosecha_estimada) win over the variedad estimates.
+
+        Args:
+            row: Plantacion calendar projection
+
+        Returns:
+            List of TimelineEvent (possibly empty)
+        """
+        siembra = _as_date(row.fecha_siembra)
+        germinacion = _as_date(row.fecha_germinacion)
+        trasplante = _as_date(row.fecha_trasplante)
+        cosecha = _as_date(row.fecha_cosecha_estimada)
+
+        def event(phase: str, start: date, end: date) -> TimelineEvent:
+            return TimelineEvent(
+                plantacion_id=row.plantacion_id,
+                nombre_plantacion=row.nombre_plantacion,
+                variedad_nombre=row.variedad_nombre,
+                especie_nombre=row.especie_nombre,
+                estado=row.estado,
+                phase=phase,
+                start=start,
+                end=max(start, end),
+            )
+
+        events: List[TimelineEvent] = []
+
+        # Germinación: desde la siembra hasta la germinación real o estimada
+        if siembra:
+            if germinacion:
+                events.append(event(PHASE_GERMINATION, siembra, germinacion))
+            elif row.estado in (EstadoPlantacion.PLANIFICADA, EstadoPlantacion.SEMBRADA):
+                dias_max = row.dias_germinacion_max or row.dias_germinacion_min
+                if dias_max:
+                    events.append(event(
+                        PHASE_GERMINATION,
+                        siembra,
+                        siembra + timedelta(days=dias_max)
+                    ))
+
+        # Trasplante: fecha registrada o ventana alrededor de la estimada
+        if trasplante:
+            events.append(event(PHASE_TRANSPLANT, trasplante, trasplante))
+        elif siembra and row.dias_hasta_trasplante and row.estado in SEEDLING_ESTADOS:
+            target = siembra + timedelta(days=row.dias_hasta_trasplante)
+            events.append(event(
+                PHASE_TRANSPLANT,
+                target - timedelta(days=TRANSPLANT_WINDOW_DAYS),
+                target + timedelta(days=TRANSPLANT_WINDOW_DAYS)
+            ))
+
+        # Cosecha: fecha estimada registrada o rango de la variedad
+        dias_cosecha_min = row.dias_hasta_cosecha_min or row.dias_hasta_cosecha_max
+        dias_cosecha_max = row.dias_hasta_cosecha_max or row.dias_hasta_cosecha_min
+        if cosecha:
+            spread = (dias_cosecha_max - dias_cosecha_min) if dias_cosecha_min else 0
+            events.append(event(PHASE_HARVEST, cosecha, cosecha + timedelta(days=spread)))
+        elif siembra and dias_cosecha_min:
+            events.append(event(
+                PHASE_HARVEST,
+                siembra + timedelta(days=dias_cosecha_min),
+                siembra + timedelta(days=dias_cosecha_max)
+            ))
+
+        return events
+
+    def _load(self, user_id: int, db: Session) -> PlantationTimeline:
+        rows = CalendarService.load_plantacion_rows(user_id, TIMELINE_ESTADOS, db)
+        return PlantationTimeline(
+            event for row in rows for event in self.phases_for(row)
+        )
+
+    def _get_cached(self, user_id: int, tag: str) -> Optional[PlantationTimeline]:
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is None:
+                return None
+            if entry.tag != tag or time.monotonic() - entry.created > settings.TIMELINE_CACHE_SECONDS:
+                del self._cache[user_id]
+                return None
+            self._cache.move_to_end(user_id)
+            return entry.timeline
+
+    def _store(self, user_id: int, tag: str, timeline: PlantationTimeline) -> None:
+        with self._lock:
+            self._cache[user_id] = CachedTimeline(tag=tag, timeline=timeline, created=time.monotonic())
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > MAX_CACHED_TIMELINES:
+                self._cache.popitem(last=False)
+
+    def build(self, user_id: int, db: Session) -> PlantationTimeline:
+        """
+        Timeline of a user's active plantaciones, from the cache when the
+        inventory has not changed since it was built.
+
+        Args:
+            user_id: Owner of the plantaciones
+            db: Database session
+
+        Returns:
+            PlantationTimeline
+        """
+        tag = inventory_version_service.get(db, user_id).tag
+        timeline = self._get_cached(user_id, tag)
+        if timeline is None:
+            timeline = self._load(user_id, db)
+            self._store(user_id, tag, timeline)
+        return timeline
+
+
+# Global timeline service instance
+timeline_service = TimelineService()
@@ -4,7 +4,7 @@ Loads environment variables and provides centralized settings.
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 
@@ -41,6 +41,57 @@ class Settings(BaseSettings):
     VAPID_PUBLIC_KEY: str
     VAPID_PRIVATE_KEY: str
     VAPID_CLAIM_EMAIL: str
+    WEB_PUSH_CONCURRENCY: int = 100  # Deliveries in flight per batch
+    WEB_PUSH_MAX_CONNECTIONS_PER_HOST: int = 20  # Pooled connections per push service
+    WEB_PUSH_TIMEOUT_SECONDS: float = 10.0
+    
+    # Scheduler coordination across worker processes
+    SCHEDULER_LEADER_CHECK_SECONDS: int = 30  # Leader heartbeat / takeover check
+    SCHEDULER_SHARDS: int = 1  # Users shards of the daily digest (1 = no sharding)
+    SCHEDULER_SHARD_POLL_SECONDS: int = 30
+    SCHEDULER_SHARD_MAX_ATTEMPTS: int = 3  # Failed tries before a shard is given up
+    SCHEDULER_SHARD_RETENTION_DAYS: int = 7
+    
+    # Notification digest (all reminders of a user merged into one push)
+    NOTIFICATION_DIGEST_HOUR: int = 9  # Local time of each user
+    NOTIFICATION_BUCKET_MINUTES: int = 15  # Interval of the digest job
+    NOTIFICATION_DIGEST_SPREAD_MINUTES: int = 60  # Users of a time zone spread over this window
+    NOTIFICATION_DEFAULT_TIMEZONE: str = "Europe/Madrid"  # Users without time zone or coordinates
+    
+    # Notification outbox worker
+    NOTIFICATION_OUTBOX_POLL_SECONDS: int = 15  # Interval of the drain job
+    NOTIFICATION_OUTBOX_BATCH_SIZE: int = 500  # Rows claimed per batch
+    NOTIFICATION_OUTBOX_LEASE_SECONDS: int = 300  # Claimed rows become due again after this
+    NOTIFICATION_OUTBOX_MAX_ATTEMPTS: int = 8
+    NOTIFICATION_OUTBOX_BACKOFF_SECONDS: int = 30  # First retry delay, doubled per attempt
+    NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS: int = 6 * 60 * 60
+    NOTIFICATION_OUTBOX_RETENTION_DAYS: int = 7  # Finished rows kept for inspection
+    
+    # Metrics (GET /metrics)
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # Shared by the workers to merge their metrics
+    METRICS_SNAPSHOT_SECONDS: int = 15  # Interval at which each worker publishes its values
+    
+    # Push subscription health
+    PUSH_SUBSCRIPTION_MAX_FAILURES: int = 5  # Consecutive failed deliveries before deactivation
+    
+    # Notification history (partitioned by month)
+    NOTIFICATION_HISTORY_RETENTION_MONTHS: int = 12  # Including the current month
+    NOTIFICATION_HISTORY_MONTHS_AHEAD: int = 3  # Partitions created in advance
+    
+    # ICS calendar feed
+    ICS_FEED_TOKEN_DAYS: int = 365  # Validity of feed subscription tokens
+    ICS_FEED_CACHE_SECONDS: int = 900  # Max age of a cached feed (per worker)
+    TIMELINE_CACHE_SECONDS: int = 300  # Max age of a cached plantation timeline (changes outside the API)
+    
+    # Seed inventory listing (keyset pagination)
+    SEEDS_PAGE_SIZE: int = 50  # Page size when a cursor is sent without limit
+    SEEDS_PAGE_MAX_SIZE: int = 500
+    SEEDS_BATCH_MAX_SIZE: int = 1000  # Lotes per PATCH/DELETE /seeds/batch request
+    SEEDS_FACETS_CACHE_SECONDS: int = 300  # Max age of cached facet counts (changes outside the API)
+    
+    # CSV import pipeline
+    CSV_IMPORT_CHUNK_ROWS: int = 1000  # Rows per INSERT batch / progress update
+    CSV_IMPORT_MAX_REPORTED_ERRORS: int = 1000  # Row errors kept in the job (all are counted)
     
     # File Upload Settings
     UPLOAD_DIR: str = "./uploads"
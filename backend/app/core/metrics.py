@@ -0,0 +1,397 @@
+"""
+In-process metrics for the notification pipeline.
+Minimal counters, gauges and histograms rendered in the Prometheus text
+exposition format on GET /metrics, plus a structured log line per
+scheduler job run (picked up by Loki).
+
+Each worker process keeps its own values. With METRICS_MULTIPROC_DIR set,
+every worker publishes a snapshot there every METRICS_SNAPSHOT_SECONDS and
+GET /metrics merges them (counters and histograms are summed, gauges keep
+the last value set), whichever worker answers the scrape. Without it,
+the output only covers the worker that answers.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.metrics")
+
+LabelValues = Tuple[str, ...]
+
+# Buckets (seconds) for durations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    """Base of the metric types: name, help text and label names"""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _scalar_lines(self, values: Dict[LabelValues, float]) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+    def load(self, entries: List[list]) -> Dict[LabelValues, Any]:
+        """Values of a snapshot read back from JSON ([labels, value] pairs)"""
+        return {tuple(key): self._decode(value) for key, value in entries}
+
+    def _decode(self, value: Any) -> Any:
+        return value
+
+    @abstractmethod
+    def snapshot(self) -> Dict[LabelValues, Any]:
+        """Copy of the current values of this process, by label values"""
+
+    @abstractmethod
+    def merge(self, snapshots: Sequence[Dict[LabelValues, Any]]) -> Dict[LabelValues, Any]:
+        """Combine the snapshots of several processes into one"""
+
+    @abstractmethod
+    def render(self, values: Optional[Dict[LabelValues, Any]] = None) -> List[str]:
+        """Lines of the metric in the Prometheus text format (own values by default)"""
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, snapshots: Sequence[Dict[LabelValues, float]]) -> Dict[LabelValues, float]:
+        # Los contadores de todos los workers se suman
+        merged: Dict[LabelValues, float] = {}
+        for values in snapshots:
+            for key, value in values.items():
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self, values: Optional[Dict[LabelValues, float]] = None) -> List[str]:
+        return self._header() + self._scalar_lines(self.snapshot() if values is None else values)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (last observed value)"""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # key -> (value, unix time when it was set)
+        self._values: Dict[LabelValues, Tuple[float, float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = (value, time.time())
+
+    def value(self, **labels: str) -> float:
+        entry = self._values.get(self._key(labels))
+        return entry[0] if entry else 0
+
+    def snapshot(self) -> Dict[LabelValues, Tuple[float, float]]:
+        with self._lock:
+            return dict(self._values)
+
+    def _decode(self, value: list) -> Tuple[float, float]:
+        return value[0], value[1]
+
+    def merge(self, snapshots: Sequence[Dict[LabelValues, Tuple[float, float]]]) -> Dict[LabelValues, Tuple[float, float]]:
+        # Gana el último valor observado, lo haya puesto el worker que sea
+        merged: Dict[LabelValues, Tuple[float, float]] = {}
+        for values in snapshots:
+            for key, entry in values.items():
+                if key not in merged or entry[1] > merged[key][1]:
+                    merged[key] = entry
+        return merged
+
+    def render(self, values: Optional[Dict[LabelValues, Tuple[float, float]]] = None) -> List[str]:
+        values = self.snapshot() if values is None else values
+        return self._header() + self._scalar_lines({key: value for key, (value, _) in values.items()})
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (counts per bucket + overflow, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def snapshot(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    def _decode(self, value: list) -> Tuple[List[int], float]:
+        return list(value[0]), value[1]
+
+    def merge(self, snapshots: Sequence[Dict[LabelValues, Tuple[List[int], float]]]) -> Dict[LabelValues, Tuple[List[int], float]]:
+        merged: Dict[LabelValues, Tuple[List[int], float]] = {}
+        for values in snapshots:
+            for key, (counts, total) in values.items():
+                # Snapshot de una versión con otros buckets: no se puede sumar
+                if len(counts) != len(self.buckets) + 1:
+                    continue
+                previous, previous_total = merged.get(key) or ([0] * len(counts), 0.0)
+                merged[key] = ([a + b for a, b in zip(previous, counts)], previous_total + total)
+        return merged
+
+    def render(self, values: Optional[Dict[LabelValues, Tuple[List[int], float]]] = None) -> List[str]:
+        values = self.snapshot() if values is None else values
+        lines = self._header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Set of metrics rendered together.
+
+    With a multiprocess directory, every worker publishes its values there
+    (write_snapshot) and render() merges the snapshots of all running
+    workers with the live values of the process serving the scrape, so
+    /metrics returns the same totals whichever worker answers.
+    """
+
+    SNAPSHOT_PREFIX = "metrics_"
+
+    def __init__(self, multiprocess_dir: Optional[str] = None):
+        self._metrics: List[_Metric] = []
+        self.multiprocess_dir = multiprocess_dir
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> Dict[str, list]:
+        """Values of this process as JSON-serializable [labels, value] pairs per metric"""
+        return {
+            metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+            for metric in self._metrics
+        }
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.multiprocess_dir, f"{self.SNAPSHOT_PREFIX}{pid}.json")
+
+    def write_snapshot(self) -> None:
+        """Publish the values of this process for the other workers"""
+        if not self.multiprocess_dir:
+            return
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        # Escritura atómica: un lector nunca ve un archivo a medias
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(temp_path, path)
+
+    def _other_snapshots(self) -> List[Dict[str, list]]:
+        """Snapshots of the other live workers"""
+        if not self.multiprocess_dir or not os.path.isdir(self.multiprocess_dir):
+            return []
+        snapshots = []
+        for file_name in sorted(os.listdir(self.multiprocess_dir)):
+            if not (file_name.startswith(self.SNAPSHOT_PREFIX) and file_name.endswith(".json")):
+                continue
+            pid = file_name[len(self.SNAPSHOT_PREFIX):-len(".json")]
+            if not pid.isdigit() or int(pid) == os.getpid() or not _process_alive(int(pid)):
+                continue
+            try:
+                with open(os.path.join(self.multiprocess_dir, file_name)) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping metrics snapshot {file_name}: {e}")
+        return snapshots
+
+    def render(self) -> str:
+        others = self._other_snapshots()
+        lines: List[str] = []
+        for metric in self._metrics:
+            values = metric.snapshot()
+            if others:
+                values = metric.merge([values] + [metric.load(other.get(metric.name, [])) for other in others])
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this pid runs on this host (snapshots of dead workers are ignored)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = Registry(settings.METRICS_MULTIPROC_DIR)
+
+# ---------------------------------------------------------------------------
+# Notification pipeline metrics
+# ---------------------------------------------------------------------------
+
+JOB_DURATION = registry.register(Histogram(
+    "lorapp_scheduler_job_duration_seconds", "Duration of scheduler job runs",
+    ["job"], buckets=JOB_BUCKETS
+))
+JOB_RUNS = registry.register(Counter(
+    "lorapp_scheduler_job_runs_total", "Scheduler job runs by status", ["job", "status"]
+))
+JOB_LAST_SUCCESS = registry.register(Gauge(
+    "lorapp_scheduler_job_last_success_timestamp_seconds", "Unix time of the last successful run", ["job"]
+))
+USERS_SCANNED = registry.register(Counter(
+    "lorapp_scheduler_users_scanned_total", "Users processed by scheduler jobs", ["job"]
+))
+USERS_PER_SECOND = registry.register(Gauge(
+    "lorapp_scheduler_users_per_second", "Users processed per second in the last run", ["job"]
+))
+NOTIFICATIONS_QUEUED = registry.register(Counter(
+    "lorapp_scheduler_notifications_queued_total", "Notifications queued by scheduler jobs", ["job"]
+))
+CALENDAR_COMPUTE = registry.register(Histogram(
+    "lorapp_calendar_compute_seconds", "Time spent computing calendar reminders", ["step"]
+))
+PUSH_LATENCY = registry.register(Histogram(
+    "lorapp_push_latency_seconds", "Push service request latency", ["host"]
+))
+PUSH_DELIVERIES = registry.register(Counter(
+    "lorapp_push_deliveries_total", "Push deliveries by host and outcome", ["host", "outcome"]
+))
+
+
+class JobRun:
+    """Mutable stats of one job run, filled in by the job"""
+
+    def __init__(self, job: str):
+        self.job = job
+        self.users = 0
+        self.notifications = 0
+        self.extra: Dict[str, float] = {}
+
+
+@contextmanager
+def job_run(job: str) -> Iterator[JobRun]:
+    """
+    Time a scheduler job run and record its metrics.
+
+    Usage:
+        with job_run("daily_digest") as run:
+            run.users += len(users)
+    """
+    run = JobRun(job)
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield run
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        JOB_DURATION.observe(duration, job=job)
+        JOB_RUNS.inc(job=job, status=status)
+        if status == "ok":
+            JOB_LAST_SUCCESS.set(time.time(), job=job)
+        if run.users:
+            USERS_SCANNED.inc(run.users, job=job)
+            USERS_PER_SECOND.set(run.users / duration if duration else 0.0, job=job)
+        if run.notifications:
+            NOTIFICATIONS_QUEUED.inc(run.notifications, job=job)
+        # Las ejecuciones sin trabajo (p. ej. sondeos del outbox vacíos) no se registran en el log
+        idle = status == "ok" and not (run.users or run.notifications or any(run.extra.values()))
+        if not idle:
+            logger.info("job_metrics " + json.dumps({
+                "job": job,
+                "status": status,
+                "duration_seconds": round(duration, 3),
+                "users": run.users,
+                "users_per_second": round(run.users / duration, 1) if duration and run.users else 0,
+                "notifications": run.notifications,
+                **run.extra
+            }))
@@ -5,8 +5,9 @@ Defines tables for users, species, varieties, seed lots, plantings, harvests, an
 # pylint: disable=unused-import
 # pyright: ignore
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Date, Text, JSON, ForeignKey, Enum as SQLEnum, text, UniqueConstraint, Index, CheckConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Date, Text, JSON, ForeignKey, Enum as SQLEnum, text, UniqueConstraint, Index, CheckConstraint, Computed, DDL, event
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from app.infrastructure.database.base import Base
 import enum
 from typing import Dict, Any
@@ -81,6 +82,7 @@ class User(Base):
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     climate_zone = Column(String(50), nullable=True)  # e.g., "temperate", "mediterranean"
+    timezone = Column(String(64), nullable=True, index=True)  # IANA, e.g. "Europe/Madrid" (None: from longitude)
     
     # User preferences
     language = Column(String(5), default="es")  # "es" or "eu"
@@ -260,6 +262,42 @@ class SquareFootGardening(Base):
     especie = relationship("Especie", back_populates="square_foot_gardening", uselist=False)
 
 
+# Fecha hasta la que el lote es viable: desde la adquisición (o el 1 de enero
+# del año de producción) más los años de viabilidad. Solo usa funciones
+# inmutables para poder ser una columna generada e indexada en PostgreSQL.
+FECHA_VIABILIDAD_HASTA_SQL = (
+    "CAST(COALESCE(CAST(fecha_adquisicion AS date), make_date(anno_produccion, 1, 1))"
+    " + make_interval(years => anos_viabilidad_semilla) AS date)"
+)
+
+
+# Vector de búsqueda del inventario: nombre comercial y marca sin acentos,
+# con stemming en castellano (peso A) y tal cual, válido para euskera y
+# marcas (peso B). lorapp_unaccent es el envoltorio inmutable de unaccent
+# creado en la migración 030.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('spanish'::regconfig, lorapp_unaccent("
+    "coalesce(nombre_comercial, '') || ' ' || coalesce(marca, ''))), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, lorapp_unaccent("
+    "coalesce(nombre_comercial, '') || ' ' || coalesce(marca, ''))), 'B')"
+)
+
+# Extensiones y función que usan search_vector y TextSearchService. Las crea
+# la migración 030, pero una base nueva se construye con create_all (init_db)
+# sin pasar por alembic: se crean también antes de crear las tablas. Todas
+# son idempotentes, así que se pueden repetir en cada arranque.
+TEXT_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() solo es STABLE; fijar el diccionario la hace usable en índices
+    "CREATE OR REPLACE FUNCTION lorapp_unaccent(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+]
+for _statement in TEXT_SEARCH_DDL:
+    event.listen(Base.metadata, "before_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
 class LoteSemillas(Base):
     """
     Lote de semillas model.
@@ -281,6 +319,8 @@ class LoteSemillas(Base):
     anno_produccion = Column(Integer, nullable=True)
     fecha_adquisicion = Column(DateTime, nullable=True)
     anos_viabilidad_semilla = Column(Integer, nullable=True)  # Años que la semilla mantiene viabilidad
+    fecha_viabilidad_hasta = Column(Date, Computed(FECHA_VIABILIDAD_HASTA_SQL, persisted=True), nullable=True)
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True))
     
     # Información de almacenamiento
     lugar_almacenamiento = Column(String(255), nullable=True)  # "frigo", "despensa", etc.
@@ -308,17 +348,24 @@ class LoteSemillas(Base):
     # Propiedades calculadas
     @property
     def fecha_vencimiento(self):
-        """Calcula la fecha de vencimiento basado en fecha_adquisicion y anos_viabilidad_semilla"""
-        if self.fecha_adquisicion and self.anos_viabilidad_semilla:
-            from datetime import timedelta
-            return self.fecha_adquisicion + timedelta(days=365.25 * self.anos_viabilidad_semilla)
-        return None
+        """Fecha de vencimiento (columna generada fecha_viabilidad_hasta)"""
+        return self.fecha_viabilidad_hasta
     
     # Relationships
     usuario = relationship("User", back_populates="lotes_semillas")
     variedad = relationship("Variedad", back_populates="lotes_semillas")
     plantaciones = relationship("Plantacion", back_populates="lote_semillas", cascade="all, delete-orphan")
     pruebas_germinacion = relationship("PruebaGerminacion", back_populates="lote_semillas", cascade="all, delete-orphan")
+    
+    # Indexes for expiry range scans (all users / one user), the
+    # keyset-paginated inventory listing and full-text search (the trigram
+    # expression indexes on nombre_comercial/marca live in migration 030)
+    __table_args__ = (
+        Index('ix_lotes_semillas_fecha_viabilidad_hasta', 'fecha_viabilidad_hasta'),
+        Index('ix_lotes_semillas_usuario_viabilidad', 'usuario_id', 'fecha_viabilidad_hasta'),
+        Index('ix_lotes_semillas_usuario_created_id', 'usuario_id', 'created_at', 'id'),
+        Index('ix_lotes_semillas_search_vector', 'search_vector', postgresql_using='gin'),
+    )
 
 
 # ============================================================================
@@ -616,9 +663,13 @@ class PushSubscription(Base):
     is_active = Column(Boolean, default=True)
     user_agent = Column(String(500), nullable=True)  # Browser/device info
     
+    # Delivery health (updated by the outbox with every delivery result)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)  # Last delivery attempt
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
-    last_used_at = Column(DateTime(timezone=True), nullable=True)
+    last_used_at = Column(DateTime(timezone=True), nullable=True)  # Last successful delivery
     
     # Relationships
     usuario = relationship("User", back_populates="push_subscriptions")
@@ -667,10 +718,13 @@ class NotificationHistory(Base):
     """
     Notification history model.
     Tracks all notifications sent to users for debugging and analytics.
+    Partitioned by month on sent_at (one table per month, see
+    NotificationHistoryService); old months are dropped by the retention job.
     """
     __tablename__ = "notification_history"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # La clave de partición debe formar parte de la clave primaria
+    id = Column(BIGINT, primary_key=True, autoincrement=True)
     usuario_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Notification details
@@ -680,12 +734,18 @@ class NotificationHistory(Base):
     data = Column(JSON, default=dict)  # Additional payload data
     
     # Delivery status
-    sent_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
+    sent_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
     success = Column(Boolean, default=True)
     error_message = Column(Text, nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
+    
+    # Constraints and indexes
+    __table_args__ = (
+        Index('ix_notification_history_usuario_sent_at', 'usuario_id', 'sent_at'),
+        {"postgresql_partition_by": "RANGE (sent_at)"},
+    )
 
 
 class LunarDataCache(Base):
@@ -796,3 +856,139 @@ class WeatherDataCache(Base):
             },
             "forecast_3_days": []
         }
+
+
+class SowingWindow(Base):
+    """
+    Precomputed sowing months of a variedad for a hemisphere.
+    Rebuilt from the variedad calendar whenever the catalog changes, so the
+    calendar reads the adjusted months instead of recomputing them per lote.
+    """
+    __tablename__ = "sowing_window"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    variedad_id = Column(Integer, ForeignKey("variedades.id", ondelete="CASCADE"), nullable=False)
+    hemisphere = Column(String(1), nullable=False)  # "N" / "S"
+    
+    # Meses ajustados (1-12)
+    meses_siembra_interior = Column(JSON, nullable=False, default=list)
+    meses_siembra_exterior = Column(JSON, nullable=False, default=list)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
+    
+    # Constraints and indexes
+    __table_args__ = (
+        UniqueConstraint('variedad_id', 'hemisphere', name='uq_sowing_window_variedad_hemisphere'),
+    )
+
+
+class NotificationOutbox(Base):
+    """
+    Durable queue of push notifications, one row per subscription.
+    Filled in bulk by the scheduler jobs and drained by the outbox worker,
+    which retries transient failures with backoff.
+    """
+    __tablename__ = "notification_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subscription_id = Column(Integer, ForeignKey("push_subscriptions.id", ondelete="CASCADE"), nullable=False)
+    
+    # Evita encolar dos veces la misma notificación para la misma suscripción
+    idempotency_key = Column(String(255), nullable=False, unique=True)
+    
+    # Notification content
+    notification_type = Column(String(100), nullable=False)
+    title = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    payload = Column(JSON, nullable=False)  # Payload leído por el service worker
+    
+    # Delivery state: "pending", "sending", "delivered", "failed"
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
+    last_status_code = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Constraints and indexes
+    __table_args__ = (
+        Index('ix_notification_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+
+class SchedulerShard(Base):
+    """
+    One shard of a scheduled job run.
+    The leader publishes the shards of a run and every worker process
+    claims pending ones, so large jobs are split across workers.
+    """
+    __tablename__ = "scheduler_shards"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(100), nullable=False)  # e.g. "daily_digest"
+    run_key = Column(String(50), nullable=False)  # Ventana de la ejecución, e.g. "2026-10-19"
+    shard = Column(Integer, nullable=False)
+    shard_count = Column(Integer, nullable=False)
+    
+    # "pending" / "done" / "failed" (after SCHEDULER_SHARD_MAX_ATTEMPTS errors)
+    status = Column(String(20), nullable=False, default="pending")
+    worker = Column(String(100), nullable=True)  # host:pid que procesó el shard
+    attempts = Column(Integer, nullable=False, default=0)  # Intentos fallidos
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Constraints and indexes
+    __table_args__ = (
+        UniqueConstraint('job_id', 'run_key', 'shard', name='uq_scheduler_shards_job_run_shard'),
+        Index('ix_scheduler_shards_status', 'status'),
+    )
+
+
+class ImportJob(Base):
+    """
+    CSV import job.
+    Tracks the progress and the per-row errors of an inventory import
+    running in the background, so any worker can report its status.
+    """
+    __tablename__ = "import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String(255), nullable=True)
+    
+    # "pending" / "running" / "completed" / "failed"
+    status = Column(String(20), nullable=False, default="pending")
+    total_rows = Column(Integer, nullable=True)  # Conocido tras la primera pasada
+    processed_rows = Column(Integer, nullable=False, default=0)
+    imported = Column(Integer, nullable=False, default=0)
+    total_errors = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=True)  # [{"fila", "nombre", "error"}], hasta CSV_IMPORT_MAX_REPORTED_ERRORS
+    message = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class InventoryVersionRecord(Base):
+    """
+    Version counter of what the calendar of a user is built from.
+    Bumped in the same transaction as every change of lotes, plantaciones or
+    the user's location, so cached artifacts (ICS feed, facets) are validated
+    with one primary key lookup in any worker. The row with usuario_id 0
+    versions the shared catalog (especies/variedades); hence no foreign key.
+    """
+    __tablename__ = "inventory_versions"
+    
+    usuario_id = Column(Integer, primary_key=True, autoincrement=False)  # 0: catálogo
+    version = Column(Integer, nullable=False, default=0)
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=text("CURRENT_TIMESTAMP"))  # type: ignore
@@ -1,94 +1,358 @@
 """
-Web Push notification service using pywebpush.
-Handles push subscription management and notification delivery.
+Web Push notification service.
+Encrypts payloads (RFC 8291, aes128gcm) and delivers them asynchronously with
+httpx, with bounded concurrency and one connection pool per push-service host.
 """
 
-from typing import Dict, Any, Optional
-from pywebpush import webpush, WebPushException
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+import asyncio
+import base64
 import json
+import logging
+import threading
+import time
+
+import http_ece
+import httpx
+from cryptography.hazmat.primitives.asymmetric import ec
+from py_vapid import Vapid
 
 from app.core.config import settings
+from app.core.metrics import PUSH_LATENCY, PUSH_DELIVERIES
 from app.infrastructure.database.models import PushSubscription
 
 
+logger = logging.getLogger(__name__)
+
+# Validity of the VAPID JWT sent with each request
+VAPID_EXPIRATION_SECONDS = 12 * 60 * 60
+
+# Cached VAPID headers are re-signed this long before they expire
+VAPID_REFRESH_MARGIN_SECONDS = 60 * 60
+
+CONTENT_ENCODING = "aes128gcm"
+
+
+@dataclass(slots=True)
+class PushMessage:
+    """
+    One notification for one subscription.
+    Holds plain values so it can be prepared outside the DB session/thread.
+    """
+    subscription_id: int
+    endpoint: str
+    p256dh: str
+    auth: str
+    payload: Dict[str, Any]
+    ttl: int = 0
+    tag: Any = None  # Caller correlation (e.g. user id)
+
+    @classmethod
+    def for_subscription(
+        cls,
+        subscription: PushSubscription,
+        payload: Dict[str, Any],
+        ttl: int = 0,
+        tag: Any = None
+    ) -> "PushMessage":
+        return cls(
+            subscription_id=subscription.id,
+            endpoint=subscription.endpoint,
+            p256dh=subscription.p256dh,
+            auth=subscription.auth,
+            payload=payload,
+            ttl=ttl,
+            tag=tag
+        )
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.endpoint).netloc
+
+
+@dataclass(slots=True)
+class PushResult:
+    """Delivery outcome of a PushMessage"""
+    message: PushMessage
+    success: bool
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    retry_after: Optional[float] = None  # Seconds requested by the push service
+
+    @property
+    def invalid_subscription(self) -> bool:
+        """The push service no longer knows the subscription (404/410)"""
+        return self.status_code in (404, 410)
+
+    @property
+    def retryable(self) -> bool:
+        """Transient failure: network error, 429 or 5xx"""
+        if self.success:
+            return False
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+    @property
+    def outcome(self) -> str:
+        """delivered / invalid / retryable / failed"""
+        if self.success:
+            return "delivered"
+        if self.invalid_subscription:
+            return "invalid"
+        return "retryable" if self.retryable else "failed"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+@dataclass
+class PushBatchReport:
+    """Results and throughput of one delivery batch"""
+    results: List[PushResult] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+    @property
+    def successful(self) -> int:
+        return sum(1 for result in self.results if result.success)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.successful
+
+    @property
+    def invalid_subscription_ids(self) -> List[int]:
+        return [r.message.subscription_id for r in self.results if r.invalid_subscription]
+
+    @property
+    def throughput(self) -> float:
+        """Messages per second"""
+        if not self.duration_seconds:
+            return 0.0
+        return len(self.results) / self.duration_seconds
+
+    def by_host(self) -> Dict[str, Dict[str, int]]:
+        hosts: Dict[str, Dict[str, int]] = {}
+        for result in self.results:
+            stats = hosts.setdefault(result.message.host, {"sent": 0, "failed": 0})
+            stats["sent" if result.success else "failed"] += 1
+        return hosts
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": len(self.results),
+            "successful": self.successful,
+            "failed": self.failed,
+            "invalid_subscriptions": self.invalid_subscription_ids,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "messages_per_second": round(self.throughput, 1),
+            "hosts": self.by_host()
+        }
+
+
 class WebPushService:
     """
     Service for sending Web Push notifications to subscribed users.
     Uses VAPID authentication for secure delivery.
     """
-    
+
     def __init__(self):
         self.vapid_private_key = settings.VAPID_PRIVATE_KEY
         self.vapid_claims = {
             "sub": settings.VAPID_CLAIM_EMAIL
         }
-    
-    def send_notification(
-        self,
-        subscription: PushSubscription,
+        self._vapid: Optional[Vapid] = None
+        # Signed VAPID headers per audience: aud -> (headers, exp)
+        self._vapid_cache: Dict[str, Tuple[Dict[str, str], int]] = {}
+        self._vapid_lock = threading.Lock()
+
+    @staticmethod
+    def build_payload(
         title: str,
         body: str,
         data: Optional[Dict[str, Any]] = None,
         icon: str = "/icons/icon-192x192.png",
         badge: str = "/icons/badge-96x96.png"
-    ) -> tuple[bool, Optional[str]]:
-        """
-        Send a push notification to a single subscription.
-        
-        Args:
-            subscription: PushSubscription database object
-            title: Notification title
-            body: Notification body text
-            data: Optional additional data payload
-            icon: Notification icon URL
-            badge: Notification badge URL
-            
-        Returns:
-            Tuple of (success: bool, error_message: Optional[str])
-        """
-        # Prepare notification payload
-        payload = {
+    ) -> Dict[str, Any]:
+        """Build the notification payload read by the service worker"""
+        return {
             "title": title,
             "body": body,
             "icon": icon,
             "badge": badge,
             "data": data or {}
         }
-        
-        # Prepare subscription info for pywebpush
-        subscription_info = {
-            "endpoint": subscription.endpoint,
-            "keys": {
-                "p256dh": subscription.p256dh,
-                "auth": subscription.auth
-            }
-        }
-        
-        try:
-            # Send push notification
-            webpush(
-                subscription_info=subscription_info,
-                data=json.dumps(payload),
-                vapid_private_key=self.vapid_private_key,
-                vapid_claims=self.vapid_claims
+
+    def _vapid_key(self) -> Vapid:
+        if self._vapid is None:
+            self._vapid = Vapid.from_string(private_key=self.vapid_private_key)
+        return self._vapid
+
+    def _vapid_headers(self, endpoint: str) -> Dict[str, str]:
+        """
+        VAPID Authorization headers for the push service origin of an endpoint.
+
+        The signed JWT only depends on the audience (scheme + host), so it is
+        cached per audience and shared by every subscription on that push
+        service until it is about to expire.
+        """
+        url = urlsplit(endpoint)
+        aud = f"{url.scheme}://{url.netloc}"
+        now = int(time.time())
+        with self._vapid_lock:
+            cached = self._vapid_cache.get(aud)
+            if cached is not None and cached[1] - now > VAPID_REFRESH_MARGIN_SECONDS:
+                return cached[0]
+
+            claims = dict(self.vapid_claims)
+            claims["aud"] = aud
+            claims["exp"] = now + VAPID_EXPIRATION_SECONDS
+            headers = self._vapid_key().sign(claims)
+            self._vapid_cache[aud] = (headers, claims["exp"])
+            return headers
+
+    def reset_vapid_cache(self) -> None:
+        """Drop signed headers (e.g. after changing the VAPID key or claims)"""
+        with self._vapid_lock:
+            self._vapid = None
+            self._vapid_cache.clear()
+
+    @staticmethod
+    def _b64decode(value: str) -> bytes:
+        return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+    def _encrypt(self, message: PushMessage) -> bytes:
+        """Encrypt the payload for the subscription keys (RFC 8291)"""
+        # Ephemeral ECDH key used only for this message
+        server_key = ec.generate_private_key(ec.SECP256R1())
+        return http_ece.encrypt(
+            json.dumps(message.payload).encode("utf-8"),
+            private_key=server_key,
+            dh=self._b64decode(message.p256dh),
+            auth_secret=self._b64decode(message.auth),
+            version=CONTENT_ENCODING
+        )
+
+    def _prepare(self, message: PushMessage) -> Tuple[Dict[str, str], bytes]:
+        """
+        Encrypt the payload and build the request headers (CPU bound).
+
+        Returns:
+            Tuple of (headers, encrypted body)
+        """
+        body = self._encrypt(message)
+        headers = dict(self._vapid_headers(message.endpoint))
+        headers.update({
+            "Content-Encoding": CONTENT_ENCODING,
+            "Content-Type": "application/octet-stream",
+            "TTL": str(message.ttl)
+        })
+        return headers, body
+
+    @staticmethod
+    def _client_for(clients: Dict[str, httpx.AsyncClient], host: str) -> httpx.AsyncClient:
+        """One pooled client per push service host, created on first use"""
+        client = clients.get(host)
+        if client is None:
+            limit = settings.WEB_PUSH_MAX_CONNECTIONS_PER_HOST
+            client = httpx.AsyncClient(
+                timeout=settings.WEB_PUSH_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
             )
-            return True, None
-        
-        except WebPushException as e:
-            error_message = str(e)
-            
-            # Check if subscription is no longer valid (410 Gone or 404 Not Found)
-            if e.response and e.response.status_code in [404, 410]:
-                # Subscription is invalid, should be removed
-                return False, f"Invalid subscription: {error_message}"
-            
-            # Other error
-            return False, error_message
-        
-        except Exception as e:
-            return False, f"Unexpected error: {str(e)}"
-    
-    def send_to_user(
+            clients[host] = client
+        return client
+
+    async def _deliver(
+        self,
+        message: PushMessage,
+        semaphore: asyncio.Semaphore,
+        clients: Dict[str, httpx.AsyncClient]
+    ) -> PushResult:
+        result = await self._send(message, semaphore, clients)
+        PUSH_DELIVERIES.inc(host=message.host, outcome=result.outcome)
+        return result
+
+    async def _send(
+        self,
+        message: PushMessage,
+        semaphore: asyncio.Semaphore,
+        clients: Dict[str, httpx.AsyncClient]
+    ) -> PushResult:
+        async with semaphore:
+            try:
+                # Encryption and signing run in a worker thread
+                headers, body = await asyncio.to_thread(self._prepare, message)
+                client = self._client_for(clients, message.host)
+                with PUSH_LATENCY.time(host=message.host):
+                    response = await client.post(message.endpoint, content=body, headers=headers)
+            except httpx.HTTPError as e:
+                return PushResult(message, False, error=f"HTTP error: {e!r}")
+            except Exception as e:
+                return PushResult(message, False, error=f"Unexpected error: {str(e)}")
+
+        if response.status_code > 202:
+            return PushResult(
+                message, False,
+                status_code=response.status_code,
+                error=f"Push failed: {response.status_code} {response.text[:200]}",
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+        return PushResult(message, True, status_code=response.status_code)
+
+    async def send_batch(
+        self,
+        messages: List[PushMessage],
+        concurrency: Optional[int] = None
+    ) -> PushBatchReport:
+        """
+        Deliver a batch of messages concurrently.
+
+        At most `concurrency` (default WEB_PUSH_CONCURRENCY) deliveries are in
+        flight; connections are pooled and reused per push service host for
+        the duration of the batch.
+
+        Args:
+            messages: Messages to deliver
+            concurrency: Optional override of the concurrency limit
+
+        Returns:
+            PushBatchReport with per-message results and throughput
+        """
+        report = PushBatchReport()
+        if not messages:
+            return report
+
+        semaphore = asyncio.Semaphore(concurrency or settings.WEB_PUSH_CONCURRENCY)
+        clients: Dict[str, httpx.AsyncClient] = {}
+        started = time.perf_counter()
+        try:
+            report.results = list(await asyncio.gather(
+                *(self._deliver(message, semaphore, clients) for message in messages)
+            ))
+        finally:
+            await asyncio.gather(*(client.aclose() for client in clients.values()))
+        report.duration_seconds = time.perf_counter() - started
+
+        logger.info(
+            f"Push batch: {len(messages)} messages, {report.successful} ok, "
+            f"{report.failed} failed in {report.duration_seconds:.2f}s "
+            f"({report.throughput:.1f} msg/s, {len(clients)} hosts)"
+        )
+        return report
+
+    async def send_to_user(
         self,
         subscriptions: list[PushSubscription],
         title: str,
@@ -97,44 +361,26 @@ class WebPushService:
     ) -> Dict[str, Any]:
         """
         Send notification to all active subscriptions for a user.
-        
+
         Args:
             subscriptions: List of user's push subscriptions
             title: Notification title
             body: Notification body
             data: Optional payload data
-            
+
         Returns:
             Dictionary with delivery statistics
         """
-        results = {
-            "total": len(subscriptions),
-            "successful": 0,
-            "failed": 0,
-            "invalid_subscriptions": []
-        }
-        
-        for subscription in subscriptions:
-            if not subscription.is_active:
-                continue
-            
-            success, error = self.send_notification(
-                subscription=subscription,
-                title=title,
-                body=body,
-                data=data
-            )
-            
-            if success:
-                results["successful"] += 1
-            else:
-                results["failed"] += 1
-                
-                # Mark as invalid if subscription no longer exists
-                if error and "Invalid subscription" in error:
-                    results["invalid_subscriptions"].append(subscription.id)
-        
-        return results
+        payload = self.build_payload(title, body, data)
+        messages = [
+            PushMessage.for_subscription(subscription, payload)
+            for subscription in subscriptions
+            if subscription.is_active
+        ]
+        report = await self.send_batch(messages)
+        summary = report.summary()
+        summary["total"] = len(subscriptions)
+        return summary
 
 
 # Global web push service instance
@@ -6,15 +6,18 @@ Configures the app, registers routers, and initializes services.
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
 import os
 from datetime import datetime
 
 from app.core.config import settings
-from app.infrastructure.database.base import init_db
+from app.core.metrics import registry as metrics_registry
+from app.api.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.infrastructure.database.base import init_db, SessionLocal
 from app.application.services.notification_scheduler import notification_scheduler
+from app.application.services.notification_history_service import notification_history_service
 
 # Import routers
 from app.api.routes import auth, users, seeds, notifications, calendar, planting, my_garden, my_seedling, lunar, calendar_integrated
@@ -45,6 +48,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
 )
 
 
@@ -142,6 +146,16 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
     
+    # Make sure notification history has partitions for this and next months
+    try:
+        db = SessionLocal()
+        try:
+            notification_history_service.ensure_partitions(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Notification history partitioning failed: {e}")
+    
     # Start notification scheduler
     try:
         notification_scheduler.start()
@@ -189,6 +203,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Metrics endpoint (Prometheus text format)
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Notification pipeline metrics, merged across workers when
+    METRICS_MULTIPROC_DIR is set (otherwise those of this worker only).
+    """
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # Run with: uvicorn app.main:app --reload
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,178 @@
+"""
+Calendar projection benchmark.
+
+Compares the legacy ORM hydration of lotes (joinedload of Variedad/Especie)
+with the column projection used by CalendarService on a synthetic inventory.
+Reports latency and peak Python memory (tracemalloc) for each path.
+
+Usage (from backend/):
+    python -m benchmarks.calendar_projection_benchmark --lotes 20000
+    python -m benchmarks.calendar_projection_benchmark --database-url sqlite:///bench.db
+
+The synthetic user and catalog rows are deleted when the run finishes.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from sqlalchemy import create_engine, insert, delete  # noqa: E402
+from sqlalchemy.orm import sessionmaker, joinedload  # noqa: E402
+
+from app.infrastructure.database.base import Base  # noqa: E402
+from app.infrastructure.database.models import (  # noqa: E402
+    User, Especie, Variedad, LoteSemillas, Plantacion, SowingWindow, EstadoLoteSemillas
+)
+from app.application.services.calendar_service import CalendarService  # noqa: E402
+
+
+BENCH_TABLES = [
+    User.__table__, Especie.__table__, Variedad.__table__,
+    LoteSemillas.__table__, Plantacion.__table__, SowingWindow.__table__
+]
+
+
+def seed_inventory(session, num_lotes: int, num_variedades: int) -> tuple[int, list[int]]:
+    """Create a synthetic user with `num_lotes` lotes spread over a synthetic catalog"""
+    tag = f"bench-{int(time.time())}"
+    user = User(email=f"{tag}@lorapp.local", name="Benchmark", latitude=42.85)
+    session.add(user)
+    session.flush()
+
+    especie_ids = []
+    for i in range(max(1, num_variedades // 10)):
+        especie = Especie(
+            nombre_comun=f"{tag} especie {i}",
+            descripcion="x" * 2000
+        )
+        session.add(especie)
+        session.flush()
+        especie_ids.append(especie.id)
+
+    variedad_rows = [
+        {
+            "especie_id": random.choice(especie_ids),
+            "nombre_variedad": f"{tag} variedad {i}",
+            "descripcion": "y" * 2000,
+            "meses_siembra_interior": sorted(random.sample(range(1, 13), 3)),
+            "meses_siembra_exterior": sorted(random.sample(range(1, 13), 3)),
+            "dias_germinacion_min": 5,
+            "dias_germinacion_max": 12,
+            "fotos": [f"uploads/seeds/{i}/{j}.jpg" for j in range(5)],
+            "resistencias": ["oidio", "mildiu"],
+            "zonas_climaticas_preferidas": ["temperate"],
+        }
+        for i in range(num_variedades)
+    ]
+    session.execute(insert(Variedad), variedad_rows)
+    variedad_ids = [
+        v.id for v in session.query(Variedad.id).filter(Variedad.especie_id.in_(especie_ids))
+    ]
+
+    now = datetime.now()
+    lote_rows = [
+        {
+            "usuario_id": user.id,
+            "variedad_id": random.choice(variedad_ids),
+            "nombre_comercial": f"Lote {i}",
+            "marca": "Bench",
+            "estado": EstadoLoteSemillas.ACTIVO,
+            "fecha_adquisicion": now - timedelta(days=random.randint(0, 1500)),
+            "anos_viabilidad_semilla": random.randint(1, 5),
+            "notas": "z" * 500,
+            "informacion_proveedor": {"url": "https://example.org", "contacto": "bench"},
+        }
+        for i in range(num_lotes)
+    ]
+    session.execute(insert(LoteSemillas), lote_rows)
+    session.commit()
+    return user.id, especie_ids
+
+
+def legacy_load(session, user_id: int):
+    """Previous CalendarService read path: full ORM objects via joinedload"""
+    lotes = session.query(LoteSemillas).filter(
+        LoteSemillas.usuario_id == user_id,
+        LoteSemillas.estado == EstadoLoteSemillas.ACTIVO
+    ).options(
+        joinedload(LoteSemillas.variedad).joinedload(Variedad.especie)
+    ).all()
+    for lote in lotes:
+        _ = (lote.variedad.meses_siembra_interior, lote.variedad.especie.nombre_comun)
+    return lotes
+
+
+def projection_load(session, user_id: int):
+    """Current CalendarService read path: slotted projection rows"""
+    return CalendarService.load_lote_rows(user_id, session)
+
+
+def measure(label: str, fn, session_factory, user_id: int, repeat: int) -> None:
+    timings = []
+    peaks = []
+    for _ in range(repeat):
+        session = session_factory()
+        try:
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = fn(session, user_id)
+            timings.append(time.perf_counter() - started)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks.append(peak)
+            rows = len(result)
+            del result
+        finally:
+            session.close()
+
+    print(
+        f"{label:<12} rows={rows:<7} "
+        f"median={statistics.median(timings) * 1000:8.1f} ms  "
+        f"min={min(timings) * 1000:8.1f} ms  "
+        f"peak_mem={max(peaks) / (1024 * 1024):7.1f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--lotes", type=int, default=20000)
+    parser.add_argument("--variedades", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine, tables=BENCH_TABLES, checkfirst=True)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    setup = session_factory()
+    user_id, especie_ids = seed_inventory(setup, args.lotes, args.variedades)
+    setup.close()
+    print(f"Seeded {args.lotes} lotes over {args.variedades} variedades (user {user_id})")
+
+    try:
+        measure("legacy ORM", legacy_load, session_factory, user_id, args.repeat)
+        measure("projection", projection_load, session_factory, user_id, args.repeat)
+    finally:
+        cleanup = session_factory()
+        cleanup.execute(delete(LoteSemillas).where(LoteSemillas.usuario_id == user_id))
+        cleanup.execute(delete(Variedad).where(Variedad.especie_id.in_(especie_ids)))
+        cleanup.execute(delete(Especie).where(Especie.id.in_(especie_ids)))
+        cleanup.execute(delete(User).where(User.id == user_id))
+        cleanup.commit()
+        cleanup.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Web Push delivery benchmark.
+
+Starts local stub push services (one per simulated host, each answering
+after a fixed latency) and delivers one notification to N synthetic
+subscriptions with WebPushService.send_batch. A sample is also sent one
+request at a time (the previous per-subscription loop) for comparison.
+
+Usage (from backend/):
+    python -m benchmarks.push_delivery_benchmark --devices 5000 --hosts 3
+    python -m benchmarks.push_delivery_benchmark --latency-ms 120 --sequential-sample 50
+
+No database is needed; VAPID and subscription keys are generated per run.
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import multiprocessing
+import random
+import socket
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.infrastructure.notifications.web_push_service import (  # noqa: E402
+    WebPushService, PushMessage
+)
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def stub_push_app(latency: float, gone_ratio: float) -> Starlette:
+    async def receive(request):
+        await request.body()
+        await asyncio.sleep(latency)
+        status = 410 if random.random() < gone_ratio else 201
+        return Response(status_code=status)
+
+    return Starlette(routes=[Route("/push/{token}", receive, methods=["POST"])])
+
+
+def run_stub_server(port: int, latency: float, gone_ratio: float) -> None:
+    uvicorn.run(
+        stub_push_app(latency, gone_ratio), host="127.0.0.1", port=port,
+        log_level="warning", access_log=False
+    )
+
+
+def start_stub_servers(count: int, latency: float, gone_ratio: float) -> list:
+    """Start each stub push service in its own process (no shared GIL)"""
+    servers = []
+    for _ in range(count):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        process = multiprocessing.Process(
+            target=run_stub_server, args=(port, latency, gone_ratio), daemon=True
+        )
+        process.start()
+        servers.append((process, port))
+    for _, port in servers:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+    return [(process, f"http://127.0.0.1:{port}") for process, port in servers]
+
+
+def make_subscription_keys():
+    receiver = ec.generate_private_key(ec.SECP256R1())
+    p256dh = receiver.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return b64url(p256dh), b64url(os.urandom(16))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--gone-ratio", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--sequential-sample", type=int, default=100)
+    args = parser.parse_args()
+
+    servers = start_stub_servers(args.hosts, args.latency_ms / 1000, args.gone_ratio)
+    origins = [origin for _, origin in servers]
+
+    vapid_key = ec.generate_private_key(ec.SECP256R1())
+    private_key = b64url(vapid_key.private_numbers().private_value.to_bytes(32, "big"))
+
+    service = WebPushService()
+    service.vapid_private_key = private_key
+    service.vapid_claims = {"sub": "mailto:bench@lorapp.local"}
+
+    p256dh, auth = make_subscription_keys()
+    payload = service.build_payload("Benchmark", "Mensaje de prueba", {"type": "benchmark"})
+    messages = [
+        PushMessage(
+            subscription_id=i,
+            endpoint=f"{origins[i % len(origins)]}/push/{i}",
+            p256dh=p256dh,
+            auth=auth,
+            payload=payload
+        )
+        for i in range(args.devices)
+    ]
+
+    report = asyncio.run(service.send_batch(messages, concurrency=args.concurrency))
+    summary = report.summary()
+    print(
+        f"async pipeline  devices={summary['total']:<6} ok={summary['successful']:<6} "
+        f"gone={len(summary['invalid_subscriptions']):<5} "
+        f"time={summary['duration_seconds']:7.2f} s  "
+        f"throughput={summary['messages_per_second']:8.1f} msg/s"
+    )
+
+    sample = messages[:args.sequential_sample]
+    if sample:
+        started = time.perf_counter()
+        with httpx.Client(timeout=10.0) as client:
+            for message in sample:
+                # The old path signed a new VAPID JWT for every request
+                service.reset_vapid_cache()
+                headers, body = service._prepare(message)
+                client.post(message.endpoint, content=body, headers=headers)
+        elapsed = time.perf_counter() - started
+        rate = len(sample) / elapsed
+        print(
+            f"sequential      devices={len(sample):<6} "
+            f"time={elapsed:7.2f} s  throughput={rate:8.1f} msg/s  "
+            f"(~{args.devices / rate:.0f} s for {args.devices})"
+        )
+
+    for process, _ in servers:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+List response serialization benchmark.
+
+Builds synthetic rows for the list routes (inventory, garden, seedlings and
+planting guide) and times, per route, the previous response path - one
+`from_orm` per row, then FastAPI revalidating the list against the
+response_model and encoding it with jsonable_encoder + json.dumps - against
+the fast path of app.api.serialization (one batch validation, JSON encoded
+by pydantic-core). Both outputs are compared before timing.
+
+Usage (from backend/):
+    python -m benchmarks.serialization_benchmark
+    python -m benchmarks.serialization_benchmark --rows 5000 --repeat 9
+
+No database is needed; rows are transient ORM objects filled like loaded ones.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import warnings
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from sqlalchemy import inspect  # noqa: E402
+
+from app.api.schemas import LoteSemillasResponse  # noqa: E402
+from app.api.serialization import json_list_response, validate_list  # noqa: E402
+from app.api.routes.my_garden import PlantingResponse  # noqa: E402
+from app.api.routes.my_seedling import SeedlingResponse  # noqa: E402
+from app.api.routes.planting import PlantingGuideResponse, SquareFootGardeningData  # noqa: E402
+from app.infrastructure.database.models import (  # noqa: E402
+    Especie, Variedad, LoteSemillas, Plantacion, SquareFootGardening,
+    EstadoLoteSemillas, EstadoPlantacion
+)
+
+NOW = datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc)
+
+
+def loaded(obj):
+    """Give unset columns a None value, as in an object loaded from the database"""
+    for column in inspect(type(obj)).column_attrs:
+        obj.__dict__.setdefault(column.key, None)
+    return obj
+
+
+def make_lotes(count: int) -> List[LoteSemillas]:
+    especies = [
+        loaded(Especie(
+            id=i, nombre_comun=f"Especie {i}", nombre_cientifico=f"Species {i}",
+            familia_botanica="Solanaceae", created_at=NOW
+        ))
+        for i in range(20)
+    ]
+    variedades = [
+        loaded(Variedad(
+            id=i, especie_id=i % 20, especie=especies[i % 20], nombre_variedad=f"Variedad {i}",
+            descripcion="Variedad tradicional de fruto grande " * 3, dias_germinacion_min=6,
+            dias_germinacion_max=12, meses_siembra_interior=[2, 3], meses_siembra_exterior=[4, 5, 6],
+            zonas_climaticas_preferidas=["atlantica"], resistencias=["mildiu"], es_hija_f1=False,
+            es_variedad_antigua=True, fotos=[f"variedades/{i}/1.jpg"], created_at=NOW
+        ))
+        for i in range(200)
+    ]
+    return [
+        loaded(LoteSemillas(
+            id=i, usuario_id=1, variedad_id=i % 200, variedad=variedades[i % 200],
+            nombre_comercial=f"Tomate Corazón de Buey {i}", marca="Hazi Etxea", numero_lote=f"L-{i}",
+            cantidad_estimada=100, anno_produccion=2024, fecha_adquisicion=NOW.replace(tzinfo=None),
+            anos_viabilidad_semilla=4, fecha_viabilidad_hasta=date(2028, 3, 1),
+            lugar_almacenamiento="frigo", temperatura_almacenamiento_c=4.0, humedad_relativa=35.0,
+            estado=EstadoLoteSemillas.ACTIVO, cantidad_restante=80, origen="Latanina",
+            generacion="F2", notas="Guardar en sobre de papel", created_at=NOW - timedelta(minutes=i)
+        ))
+        for i in range(count)
+    ]
+
+
+def make_plantings(count: int, estado: EstadoPlantacion) -> List[tuple]:
+    return [
+        (
+            loaded(Plantacion(
+                id=i, usuario_id=1, lote_semillas_id=i, nombre_plantacion=f"Bancal {i % 12}",
+                fecha_siembra=datetime(2026, 2, 1), tipo_siembra="exterior", cantidad_semillas_plantadas=12,
+                ubicacion_descripcion="Bancal norte", estado=estado, notas="Riego por goteo",
+                created_at=NOW - timedelta(minutes=i)
+            )),
+            f"Variedad {i % 200}",
+            f"Especie {i % 20}",
+        )
+        for i in range(count)
+    ]
+
+
+def make_guide(count: int) -> List[dict]:
+    rows = []
+    for i in range(count):
+        sfg = loaded(SquareFootGardening(
+            plantas_original=4, plantas_multisow=8, plantas_macizo=9, espaciado_cm=15.0
+        ))
+        rows.append({
+            "id": i, "nombre_comun": f"Especie {i}", "nombre_cientifico": f"Species {i}",
+            "tipo_cultivo": "hortaliza", "descripcion": "Cultivo de temporada cálida",
+            "profundidad_siembra_cm": None, "distancia_plantas_cm": None, "distancia_surcos_cm": None,
+            "meses_siembra_interior": [2, 3], "meses_siembra_exterior": [4, 5],
+            "dias_germinacion_min": None, "dias_germinacion_max": None,
+            "dias_hasta_cosecha_min": None, "dias_hasta_cosecha_max": None,
+            "frecuencia_riego": None, "exposicion_solar": None,
+            "square_foot_gardening": SquareFootGardeningData.model_validate(sfg) if i % 2 else None,
+        })
+    return rows
+
+
+def legacy(model, build_results: Callable[[], list]) -> Callable[[], bytes]:
+    """Previous path: models built per row, revalidated and encoded by FastAPI"""
+    field = create_response_field(name="Response", type_=List[model])
+    loop = asyncio.new_event_loop()
+
+    def run() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=build_results(), is_coroutine=True)
+        )
+        return JSONResponse(content=content).body
+    return run
+
+
+def plantings_legacy(model, rows, with_days: bool):
+    def build():
+        results = []
+        for planting, variedad_nombre, especie_nombre in rows:
+            data = model.from_orm(planting)
+            data.variedad_nombre = variedad_nombre
+            data.especie_nombre = especie_nombre
+            if with_days:
+                data.dias_desde_siembra = (datetime(2026, 3, 1) - planting.fecha_siembra).days
+            results.append(data)
+        return results
+    return legacy(model, build)
+
+
+def plantings_fast(model, rows, with_days: bool):
+    def run() -> bytes:
+        results = validate_list(model, [row[0] for row in rows])
+        for data, (planting, variedad_nombre, especie_nombre) in zip(results, rows):
+            data.variedad_nombre = variedad_nombre
+            data.especie_nombre = especie_nombre
+            if with_days:
+                data.dias_desde_siembra = (datetime(2026, 3, 1) - planting.fecha_siembra).days
+        return json_list_response(model, results, validated=True).body
+    return run
+
+
+def measure(run: Callable[[], bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="Rows per list response")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    # from_orm (ruta anterior) avisa de que está obsoleto en cada llamada
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    lotes = make_lotes(args.rows)
+    garden = make_plantings(args.rows, EstadoPlantacion.CRECIMIENTO)
+    seedlings = make_plantings(args.rows, EstadoPlantacion.SEMBRADA)
+    guide = make_guide(args.rows)
+
+    routes = [
+        ("list_lotes", legacy(LoteSemillasResponse, lambda: [LoteSemillasResponse.from_orm(lote) for lote in lotes]),
+         lambda: json_list_response(LoteSemillasResponse, lotes).body),
+        ("list_garden_plantings", plantings_legacy(PlantingResponse, garden, False),
+         plantings_fast(PlantingResponse, garden, False)),
+        ("list_seedlings", plantings_legacy(SeedlingResponse, seedlings, True),
+         plantings_fast(SeedlingResponse, seedlings, True)),
+        ("get_planting_guide", legacy(PlantingGuideResponse, lambda: [PlantingGuideResponse(**row) for row in guide]),
+         lambda: json_list_response(PlantingGuideResponse, guide).body),
+    ]
+
+    print(f"{args.rows} rows per response, median of {args.repeat}")
+    print(f"{'route':<24} {'previous':>11} {'fast path':>11} {'speedup':>8} {'size':>10}")
+    for name, previous, fast in routes:
+        body = fast()
+        if json.loads(previous()) != json.loads(body):
+            print(f"{name}: outputs differ")
+            continue
+        previous_ms = measure(previous, args.repeat)
+        fast_ms = measure(fast, args.repeat)
+        print(f"{name:<24} {previous_ms:8.1f} ms {fast_ms:8.1f} ms {previous_ms / fast_ms:7.1f}x {len(body) // 1024:7d} KB")
+
+
+if __name__ == "__main__":
+    main()
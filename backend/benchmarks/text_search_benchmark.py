@@ -0,0 +1,178 @@
+"""
+Inventory text search benchmark (PostgreSQL, migration 030 applied).
+
+Loads a synthetic `lotes_semillas` of --lotes rows (default one million)
+spread over --users users and compares, for a few search terms, the legacy
+`ILIKE '%term%'` filter with the indexed search of TextSearchService
+(search_vector + pg_trgm). Each query returns the 50 best matches, both
+across the whole table and within the inventory of one user. The plan of
+the indexed query is printed so index usage can be checked.
+
+Usage (from backend/):
+    python -m benchmarks.text_search_benchmark
+    python -m benchmarks.text_search_benchmark --lotes 200000 --users 100
+
+The synthetic users and catalog rows are deleted when the run finishes.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from sqlalchemy import create_engine, insert, delete, select, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.infrastructure.database.models import User, Especie, Variedad, LoteSemillas  # noqa: E402
+from app.application.services.text_search_service import text_search_service  # noqa: E402
+
+
+ESPECIES = [
+    "Tomate", "Pimiento", "Lechuga", "Calabacín", "Berenjena", "Pepino", "Judía",
+    "Guisante", "Haba", "Cebolla", "Puerro", "Zanahoria", "Remolacha", "Acelga",
+    "Espinaca", "Calabaza", "Melón", "Sandía", "Maíz", "Rábano",
+]
+VARIEDADES = [
+    "Corazón de Buey", "Rosa de Barbastro", "Cherry", "Marmande", "Negro de Crimea",
+    "Italiano", "Morrón", "Piquillo", "Gernika", "Romana", "Hoja de Roble", "Trocadero",
+    "Redondo", "Largo", "Blanco", "Morado", "Temprano", "Tardío", "Enano", "Trepador",
+    "Gorria", "Baztan", "Tolosa", "Ezpeleta", "Arabako",
+]
+MARCAS = [
+    "Batlle", "Fitó", "Rocalba", "Semillas Silvestres", "Vilmorin", "La Semilla Inquieta",
+    "Biogarden", "Intercampo", "Hazi Etxea", "Baserri Haziak", "Sativa", "Zollinger",
+]
+
+# (label, term) - palabras, formas flexionadas, sin acentos y subcadenas
+TERMS = [
+    ("word", "Barbastro"),
+    ("stem", "tomates"),
+    ("no accent", "calabacin"),
+    ("basque", "gorria"),
+    ("brand", "hazi etxea"),
+    ("substring", "trocad"),
+]
+
+TOP = 50
+
+
+def seed(session, num_lotes: int, num_users: int) -> tuple[list[int], list[int]]:
+    """Create `num_users` users and `num_lotes` lotes with realistic names"""
+    tag = f"bench-{int(time.time())}"
+    user_ids = [
+        row.id for row in session.execute(
+            insert(User).returning(User.id),
+            [{"email": f"{tag}-{i}@lorapp.local", "name": "Benchmark"} for i in range(num_users)]
+        )
+    ]
+    especie = Especie(nombre_comun=f"{tag} especie")
+    session.add(especie)
+    session.flush()
+    variedad = Variedad(especie_id=especie.id, nombre_variedad=f"{tag} variedad")
+    session.add(variedad)
+    session.flush()
+
+    # Nombres generados en el servidor: mucho más rápido que enviar un millón de filas
+    session.execute(text("""
+        INSERT INTO lotes_semillas (usuario_id, variedad_id, nombre_comercial, marca, estado)
+        SELECT
+            (:user_ids)[1 + (n % :num_users)],
+            :variedad_id,
+            (:especies)[1 + (n * 7 % array_length(CAST(:especies AS text[]), 1))] || ' ' ||
+            (:variedades)[1 + (n * 13 % array_length(CAST(:variedades AS text[]), 1))] || ' ' || n,
+            (:marcas)[1 + (n * 31 % array_length(CAST(:marcas AS text[]), 1))],
+            'ACTIVO'
+        FROM generate_series(1, :num_lotes) AS n
+    """), {
+        "user_ids": user_ids,
+        "num_users": num_users,
+        "variedad_id": variedad.id,
+        "especies": ESPECIES,
+        "variedades": VARIEDADES,
+        "marcas": MARCAS,
+        "num_lotes": num_lotes,
+    })
+    session.commit()
+    session.execute(text("ANALYZE lotes_semillas"))
+    session.commit()
+    return user_ids, [especie.id]
+
+
+def legacy_query(term: str, user_id: int = None):
+    """Previous filter: leading-wildcard ILIKE on the name (sequential scan)"""
+    query = select(LoteSemillas.id).where(LoteSemillas.nombre_comercial.ilike(f"%{term}%"))
+    if user_id is not None:
+        query = query.where(LoteSemillas.usuario_id == user_id)
+    return query.order_by(LoteSemillas.created_at.desc()).limit(TOP)
+
+
+def indexed_query(term: str, user_id: int = None):
+    """Current filter: search_vector / trigram indexes, ranked"""
+    condition, rank = text_search_service.lote_search(term)
+    query = select(LoteSemillas.id).where(condition)
+    if user_id is not None:
+        query = query.where(LoteSemillas.usuario_id == user_id)
+    return query.order_by(rank.desc()).limit(TOP)
+
+
+def measure(session, query, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = session.execute(query).all()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--lotes", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--explain", action="store_true", help="Print the plan of each indexed query")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    setup = session_factory()
+    started = time.perf_counter()
+    user_ids, especie_ids = seed(setup, args.lotes, args.users)
+    setup.close()
+    print(f"Seeded {args.lotes} lotes for {args.users} users in {time.perf_counter() - started:.1f} s")
+
+    session = session_factory()
+    try:
+        print(f"{'term':<22} {'scope':<6} {'legacy ILIKE':>14} {'indexed':>12} {'rows':>6}")
+        for label, term in TERMS:
+            for scope, user_id in (("all", None), ("user", user_ids[0])):
+                legacy_ms, _ = measure(session, legacy_query(term, user_id), args.repeat)
+                indexed_ms, rows = measure(session, indexed_query(term, user_id), args.repeat)
+                print(f"{label + ': ' + term:<22} {scope:<6} {legacy_ms:11.1f} ms {indexed_ms:9.1f} ms {rows:>6}")
+                if args.explain:
+                    compiled = indexed_query(term, user_id).compile(
+                        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    for (line,) in session.execute(text(f"EXPLAIN ANALYZE {compiled}")):
+                        print(f"    {line}")
+    finally:
+        session.close()
+        cleanup = session_factory()
+        cleanup.execute(delete(LoteSemillas).where(LoteSemillas.usuario_id.in_(user_ids)))
+        cleanup.execute(delete(Variedad).where(Variedad.especie_id.in_(especie_ids)))
+        cleanup.execute(delete(Especie).where(Especie.id.in_(especie_ids)))
+        cleanup.execute(delete(User).where(User.id.in_(user_ids)))
+        cleanup.commit()
+        cleanup.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ from typing import Dict, Iterable, Optional, Tuple
 
 from app.infrastructure.database.base import SessionLocal
 from app.infrastructure.database.models import Especie, Variedad
+from app.application.services.sowing_window_service import sowing_window_service
+from app.application.services.inventory_version_service import inventory_version_service
 
 
 MonthList = Optional[list[int]]
@@ -94,6 +96,7 @@ def update_variedades(
     matched_csv_names: set[str] = set()
     unmatched_db_names: set[str] = set()
 
+    updated_ids: set[int] = set()
     db = SessionLocal()
     try:
         for especie in especies:
@@ -114,8 +117,12 @@ def update_variedades(
                 if exterior is not None or overwrite_empty:
                     variedad.meses_siembra_exterior = exterior or []
                 updated_variedades += 1
+                updated_ids.add(variedad.id)
 
+        inventory_version_service.bump_catalog(db)
         db.commit()
+        # Ventanas de siembra con los nuevos meses
+        sowing_window_service.rebuild(db, updated_ids)
     finally:
         db.close()
 
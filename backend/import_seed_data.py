@@ -28,6 +28,8 @@ from app.core.config import settings
 from app.infrastructure.database.models import (
     User, Especie, Variedad, LoteSemillas, EstadoLoteSemillas
 )
+from app.application.services.sowing_window_service import sowing_window_service
+from app.application.services.inventory_version_service import inventory_version_service
 
 
 # ============================================================================
@@ -109,6 +111,7 @@ def clean_database(session):
     session.query(LoteSemillas).delete()
     session.query(Variedad).delete()
     session.query(Especie).delete()
+    inventory_version_service.bump_catalog(session)
     
     session.commit()
     print("✅ Base de datos limpiada")
@@ -226,8 +229,13 @@ def import_variedades(session, csv_path):
             session.add(variedad)
             variedades_data[variedad.id] = variedad
     
+    inventory_version_service.bump_catalog(session)
     session.commit()
     print(f"✅ {len(variedades_data)} variedades importadas")
+    
+    # Ventanas de siembra de las nuevas variedades
+    windows = sowing_window_service.rebuild(session, list(variedades_data))
+    print(f"✅ {windows} ventanas de siembra calculadas")
     return variedades_data
 
 
@@ -300,6 +308,7 @@ def import_lotes_semillas(session, csv_path, usuario_id):
             session.add(lote)
             lotes_count += 1
     
+    inventory_version_service.bump(session, usuario_id)
     session.commit()
     print(f"✅ {lotes_count} lotes de semillas importados")
     return lotes_count
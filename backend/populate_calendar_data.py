@@ -11,6 +11,8 @@ sys.path.insert(0, os.path.dirname(__file__))
 from sqlalchemy.orm import Session
 from app.infrastructure.database.base import SessionLocal
 from app.infrastructure.database.models import Variedad, Especie
+from app.application.services.sowing_window_service import sowing_window_service
+from app.application.services.inventory_version_service import inventory_version_service
 import json
 
 def populate_calendar_data():
@@ -154,9 +156,14 @@ def populate_calendar_data():
                     updated_count += 1
                     print(f"✓ Updated: {especie.nombre_comun} - {variedad.nombre_variedad}")
         
+        inventory_version_service.bump_catalog(db)
         db.commit()
         print(f"\n✓ Successfully updated {updated_count} varieties with calendar data")
         
+        # Ventanas de siembra con los nuevos meses
+        windows = sowing_window_service.rebuild(db)
+        print(f"✓ Rebuilt {windows} sowing windows")
+        
     except Exception as e:
         print(f"✗ Error: {str(e)}")
         db.rollback()
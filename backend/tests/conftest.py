@@ -0,0 +1,10 @@
+"""
+Shared pytest configuration.
+Tests run from backend/ without a database; the ones that need PostgreSQL
+are skipped unless TEST_DATABASE_URL points to an empty database.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
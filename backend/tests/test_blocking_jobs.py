@@ -0,0 +1,86 @@
+"""Database work of the outbox, digest and leadership jobs runs off the event loop"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.application.services import notification_outbox_service as outbox_module
+from app.application.services import notification_scheduler as scheduler_module
+from app.application.services.notification_outbox_service import notification_outbox_service
+
+
+class FakeSession:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_drain_claims_and_records_in_worker_threads(monkeypatch):
+    threads = {}
+    batches = [["message"], []]
+
+    def claim_batch(db, limit):
+        threads["claim"] = threading.get_ident()
+        return batches.pop(0)
+
+    def record_results(db, results):
+        threads["record"] = threading.get_ident()
+        return {"delivered": len(results), "retried": 0, "failed": 0}
+
+    async def send_batch(messages):
+        threads["send"] = threading.get_ident()
+        return SimpleNamespace(results=messages)
+
+    monkeypatch.setattr(outbox_module, "SessionLocal", FakeSession)
+    monkeypatch.setattr(notification_outbox_service, "claim_batch", claim_batch)
+    monkeypatch.setattr(notification_outbox_service, "record_results", record_results)
+    monkeypatch.setattr(outbox_module.push_service, "send_batch", send_batch)
+
+    totals = asyncio.run(notification_outbox_service.drain())
+
+    assert totals["delivered"] == 1
+    loop_thread = threads["send"]
+    assert threads["claim"] != loop_thread
+    assert threads["record"] != loop_thread
+
+
+def test_daily_digest_queues_in_a_worker_thread(monkeypatch):
+    threads = {}
+    scheduler = scheduler_module.NotificationScheduler()
+    monkeypatch.setattr(type(scheduler.leader), "is_leader", property(lambda self: True))
+    monkeypatch.setattr(scheduler_module, "SessionLocal", FakeSession)
+    monkeypatch.setattr(settings, "SCHEDULER_SHARDS", 1)
+
+    def queue_digests(db, shard, shard_count, run_key):
+        threads["queue"] = threading.get_ident()
+
+    async def run():
+        threads["loop"] = threading.get_ident()
+        await scheduler.send_daily_digest()
+
+    monkeypatch.setattr(scheduler, "_queue_digests", queue_digests)
+    asyncio.run(run())
+    assert threads["queue"] != threads["loop"]
+
+
+def test_leadership_check_runs_in_a_worker_thread(monkeypatch):
+    threads = {}
+    scheduler = scheduler_module.NotificationScheduler()
+
+    def check():
+        threads["check"] = threading.get_ident()
+        return False
+
+    async def run():
+        threads["loop"] = threading.get_ident()
+        await scheduler.check_leadership()
+
+    monkeypatch.setattr(scheduler.leader, "check", check)
+    asyncio.run(run())
+    assert threads["check"] != threads["loop"]
@@ -0,0 +1,119 @@
+"""The dry-run validator must reject exactly the rows the import rejects"""
+
+import csv
+
+import pytest
+
+from app.application.services.csv_import_service import csv_import_service, RowError
+from app.application.services.csv_validation_service import csv_validation_service
+from app.infrastructure.database.models import EstadoLoteSemillas
+
+KNOWN_VARIEDADES = {1, 2}
+
+HEADER = [
+    "ID_Variedad", "Nombre Comercial", "Marca", "Cantidad Estimada", "Año Producción",
+    "Humedad Relativa (%)", "Estado", "Notas",
+]
+
+ROWS = [
+    ["1", "Tomate Cherry", "Latanina", "100", "2024", "45.5", "activo", ""],  # 2 ok
+    ["2", " Lechuga ", "", "", "", "", "AGOTADO", "sobre abierto"],  # 3 ok
+    ["", "Sin variedad", "", "", "", "", "", ""],  # 4 falta el id
+    ["1", "", "", "", "", "", "", ""],  # 5 falta el nombre
+    ["x1", "Id raro", "", "", "", "", "", ""],  # 6 id no entero
+    ["99", "Desconocida", "", "", "", "", "", ""],  # 7 variedad no existe
+    ["1", "Cantidad decimal", "", "1.5", "", "", "", ""],  # 8
+    ["1", "Cantidad negativa", "", "-3", "", "", "", ""],  # 9
+    ["1", "Año antiguo", "", "", "1850", "", "", ""],  # 10
+    ["1", "Año futuro", "", "", "3000", "", "", ""],  # 11
+    ["1", "Humedad", "", "", "", "120", "", ""],  # 12
+    ["1", "Humedad texto", "", "", "", "alta", "", ""],  # 13
+    ["1", "Estado raro", "", "", "", "", "perdido", ""],  # 14
+    ["1", "N" * 501, "", "", "", "", "", ""],  # 15 nombre demasiado largo
+    ["1", "Marca larga", "M" * 300, "", "", "", "", ""],  # 16
+    ["+2", "Con signo", "", "+7", "", "1e1", "Activo", ""],  # 17 ok
+    ["1", "Valor de más", "", "", "", "", "", "", "sobra"],  # 18 ok: se ignora, como en DictReader
+    ["1", "Corta", "", "1_000"],  # 19 ok: int() admite "_"
+    ["1", "Humedad nan", "", "", "", "nan", "", ""],  # 20
+    ["1", "Humedad infinita", "", "", "", "1e400", "", ""],  # 21
+    ["1", "Cifras árabes", "", "١٢", "", "", "", ""],  # 22
+]
+VALID_ROWS = {2, 3, 17, 18, 19}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "lotes.csv"
+    with open(path, "w", encoding="utf-8-sig", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(HEADER)
+        writer.writerows(ROWS)
+    return str(path)
+
+
+def _import_outcome(path):
+    columns = csv_import_service.map_columns(csv_import_service.read_header(path))
+    accepted, rejected = {}, set()
+    for row_num, row in csv_import_service._rows(path):
+        try:
+            accepted[row_num] = csv_import_service.parse_row(row, columns, 1, KNOWN_VARIEDADES)
+        except RowError:
+            rejected.add(row_num)
+    return accepted, rejected
+
+
+def _validate(monkeypatch, path):
+    monkeypatch.setattr(
+        csv_validation_service, "_known_variedades", lambda db, ids: {int(i) for i in ids} & KNOWN_VARIEDADES
+    )
+    return csv_validation_service.validate(None, path)
+
+
+def test_import_rules(csv_path):
+    accepted, rejected = _import_outcome(csv_path)
+
+    assert set(accepted) == VALID_ROWS
+    assert rejected == {row_num for row_num in range(2, len(ROWS) + 2)} - VALID_ROWS
+    assert accepted[3]["nombre_comercial"] == "Lechuga"
+    assert accepted[3]["marca"] is None
+    assert accepted[3]["estado"] == EstadoLoteSemillas.AGOTADO
+    assert accepted[17]["cantidad_estimada"] == 7
+    assert accepted[17]["humedad_relativa"] == 10.0
+    assert accepted[18]["notas"] is None
+    assert accepted[19]["cantidad_estimada"] == 1000
+
+
+def test_validation_matches_the_import(monkeypatch, csv_path):
+    _, rejected = _import_outcome(csv_path)
+
+    report = _validate(monkeypatch, csv_path)
+
+    flagged = {row for issues in report["columns"].values() for issue in issues for row in issue["rows"]}
+    assert flagged == rejected
+    assert report["total_rows"] == len(ROWS)
+    assert report["invalid_rows"] == len(rejected)
+    assert report["valid_rows"] == len(VALID_ROWS)
+    assert not report["success"]
+
+
+def test_validation_report_by_column(monkeypatch, csv_path):
+    report = _validate(monkeypatch, csv_path)
+
+    checks = {column: {issue["check"]: issue["rows"] for issue in issues} for column, issues in report["columns"].items()}
+    assert checks["ID_Variedad"] == {"required": [4], "integer": [6], "unknown_variedad": [7]}
+    assert checks["Nombre Comercial"] == {"required": [5], "length": [15]}
+    assert checks["Cantidad Estimada"] == {"integer": [8, 22], "range": [9]}
+    assert checks["Año Producción"] == {"range": [10, 11]}
+    assert checks["Humedad Relativa (%)"] == {"number": [13, 20, 21], "range": [12]}
+    assert checks["Estado"] == {"enum": [14]}
+    assert checks["Marca"] == {"length": [16]}
+    assert report["ignored_columns"] == []
+
+
+@pytest.mark.parametrize("value", ["nan", "NaN", "inf", "-Infinity", "1e400"])
+def test_import_rejects_non_finite_numbers(value):
+    columns = csv_import_service.map_columns(HEADER)
+    row = dict(zip(HEADER, ["1", "Humedad rara", "", "", "", value, "", ""]))
+
+    with pytest.raises(RowError, match="valor inválido"):
+        csv_import_service.parse_row(row, columns, 1, KNOWN_VARIEDADES)
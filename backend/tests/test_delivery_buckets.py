@@ -0,0 +1,48 @@
+"""Spread slots and scheduler shards split the users independently"""
+
+import pytest
+from sqlalchemy import and_, create_engine, insert, select
+
+from app.core.config import settings
+from app.infrastructure.database.models import User
+from app.application.services.delivery_bucket_service import delivery_bucket_service
+
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    with engine.connect() as connection:
+        connection.execute(insert(User), [
+            {"id": user_id, "email": f"user{user_id}@example.com", "name": f"User {user_id}"}
+            for user_id in range(1, 481)
+        ])
+        yield connection
+
+
+@pytest.mark.parametrize("shard_count", [2, 3, 4, 8])
+def test_every_shard_gets_users_of_every_slot(connection, monkeypatch, shard_count):
+    monkeypatch.setattr(settings, "NOTIFICATION_DIGEST_SPREAD_MINUTES", 60)
+    monkeypatch.setattr(settings, "NOTIFICATION_BUCKET_MINUTES", 15)
+    slots = delivery_bucket_service.slot_count()
+    assert slots == 4
+
+    for slot in range(slots):
+        sizes = [
+            len(connection.execute(select(User.id).where(and_(
+                delivery_bucket_service.slot_condition(slot),
+                delivery_bucket_service.shard_condition(shard, shard_count)
+            ))).all())
+            for shard in range(shard_count)
+        ]
+        assert sum(sizes) == 480 // slots
+        assert max(sizes) - min(sizes) <= 1
+
+
+def test_shards_partition_the_users(connection):
+    ids = [
+        set(connection.scalars(select(User.id).where(delivery_bucket_service.shard_condition(shard, 3))))
+        for shard in range(3)
+    ]
+    assert set().union(*ids) == set(range(1, 481))
+    assert sum(len(shard_ids) for shard_ids in ids) == 480
@@ -0,0 +1,81 @@
+"""Sparse fieldsets and expansions (fields= / expand=)"""
+
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.api.fieldsets import FieldSet, expansions, parse_fieldset, partial_model, scalar_fields
+
+
+class EspecieOut(BaseModel):
+    id: int
+    nombre_comun: str
+
+
+class VariedadOut(BaseModel):
+    id: int
+    nombre: str
+    especie: Optional[EspecieOut] = None
+
+
+class LoteOut(BaseModel):
+    id: int
+    marca: Optional[str] = None
+    cantidad: int
+    variedad: Optional[VariedadOut] = None
+
+
+def test_model_introspection():
+    assert scalar_fields(LoteOut) == ["id", "marca", "cantidad"]
+    assert expansions(LoteOut) == ["variedad", "variedad.especie"]
+
+
+def test_no_parameters_is_the_full_response():
+    assert parse_fieldset(LoteOut, None, None) is None
+
+
+def test_fields_always_include_id():
+    assert parse_fieldset(LoteOut, "marca, cantidad", None) == FieldSet(
+        frozenset({"id", "marca", "cantidad"}), frozenset()
+    )
+
+
+def test_expand_alone_keeps_every_field_and_adds_parents():
+    fieldset = parse_fieldset(LoteOut, None, "variedad.especie")
+
+    assert fieldset.fields == frozenset({"id", "marca", "cantidad"})
+    assert fieldset.expand == frozenset({"variedad", "variedad.especie"})
+
+
+@pytest.mark.parametrize("fields, expand", [("precio", None), (None, "especie"), ("variedad", None)])
+def test_unknown_names_are_a_bad_request(fields, expand):
+    with pytest.raises(HTTPException) as error:
+        parse_fieldset(LoteOut, fields, expand)
+
+    assert error.value.status_code == 400
+    assert "Unknown fields or expansions" in error.value.detail
+
+
+def test_partial_model_only_reads_the_selection():
+    fieldset = parse_fieldset(LoteOut, "marca", "variedad.especie")
+    model = partial_model(LoteOut, fieldset.fields, fieldset.expand)
+    # Sin cantidad: leerla fallaría
+    row = SimpleNamespace(
+        id=1, marca="Latanina",
+        variedad=SimpleNamespace(id=2, nombre="Cherry", especie=SimpleNamespace(id=3, nombre_comun="Tomate")),
+    )
+
+    assert model.model_validate(row).model_dump() == {
+        "id": 1, "marca": "Latanina",
+        "variedad": {"id": 2, "nombre": "Cherry", "especie": {"id": 3, "nombre_comun": "Tomate"}},
+    }
+    assert partial_model(LoteOut, fieldset.fields, fieldset.expand) is model
+
+
+def test_partial_model_without_expansion_drops_relationships():
+    model = partial_model(LoteOut, None, frozenset())
+
+    assert set(model.model_fields) == {"id", "marca", "cantidad"}
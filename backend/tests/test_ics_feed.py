@@ -0,0 +1,101 @@
+"""ICS feed versioning and conditional GET"""
+
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import calendar
+from app.core.security import create_access_token
+from app.application.services import ics_feed_service as ics_module
+from app.application.services.ics_feed_service import ics_feed_service
+from app.application.services.inventory_version_service import InventoryVersion
+
+CHANGED_AT = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+VERSION = InventoryVersion(tag="abc123", changed_at=CHANGED_AT)
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+def version_for(monkeypatch, inventory_version, today=date(2026, 10, 19)):
+    monkeypatch.setattr(ics_module, "SessionLocal", FakeSession)
+    monkeypatch.setattr(ics_module.inventory_version_service, "get", lambda db, user_id: inventory_version)
+    return ics_feed_service.current_version(1, today)
+
+
+def test_version_follows_the_inventory_version_and_date(monkeypatch):
+    version = version_for(monkeypatch, VERSION)
+
+    assert version.tag == "abc123.20261019"
+    assert version.changed_at == CHANGED_AT
+    assert version_for(monkeypatch, InventoryVersion(tag="abc124", changed_at=CHANGED_AT)).tag != version.tag
+    # El horizonte del feed avanza cada día
+    tomorrow = version_for(monkeypatch, VERSION, today=date(2026, 10, 20))
+    assert tomorrow.tag != version.tag
+    assert tomorrow.changed_at == datetime(2026, 10, 20, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = {"cache": 0, "stream": 0}
+
+    def get_cached(user_id, version):
+        calls["cache"] += 1
+        return None
+
+    def stream(user_id, version):
+        calls["stream"] += 1
+        yield b"BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n"
+
+    monkeypatch.setattr(ics_feed_service, "current_version", lambda user_id: VERSION)
+    monkeypatch.setattr(ics_feed_service, "get_cached", get_cached)
+    monkeypatch.setattr(ics_feed_service, "stream", stream)
+    app = FastAPI()
+    app.include_router(calendar.router)
+    client = TestClient(app)
+    client.calls = calls
+    client.url = "/calendar/feed/{}.ics".format(create_access_token(
+        {"sub": "1", "scope": calendar.ICS_TOKEN_SCOPE}, expires_delta=timedelta(days=1)
+    ))
+    return client
+
+
+def test_full_response_carries_validators(client):
+    response = client.get(client.url)
+    assert response.status_code == 200
+    assert response.headers["etag"] == 'W/"abc123"'
+    assert response.headers["last-modified"] == format_datetime(CHANGED_AT, usegmt=True)
+    assert response.text.startswith("BEGIN:VCALENDAR")
+    assert client.calls == {"cache": 1, "stream": 1}
+
+
+@pytest.mark.parametrize("headers", [
+    {"If-None-Match": 'W/"abc123"'},
+    {"If-None-Match": '"other", "abc123"'},
+    {"If-Modified-Since": format_datetime(CHANGED_AT, usegmt=True)},
+    {"If-Modified-Since": format_datetime(CHANGED_AT + timedelta(hours=1), usegmt=True)},
+])
+def test_not_modified_is_answered_before_the_cache(client, headers):
+    response = client.get(client.url, headers=headers)
+    assert response.status_code == 304
+    assert response.headers["etag"] == 'W/"abc123"'
+    assert client.calls == {"cache": 0, "stream": 0}
+
+
+@pytest.mark.parametrize("headers", [
+    {"If-None-Match": 'W/"stale"'},
+    {"If-Modified-Since": format_datetime(CHANGED_AT - timedelta(seconds=1), usegmt=True)},
+    # If-None-Match manda sobre If-Modified-Since
+    {"If-None-Match": 'W/"stale"', "If-Modified-Since": format_datetime(CHANGED_AT, usegmt=True)},
+])
+def test_changed_feed_is_sent_again(client, headers):
+    assert client.get(client.url, headers=headers).status_code == 200
+
+
+def test_invalid_token_is_not_found(client):
+    assert client.get("/calendar/feed/nope.ics").status_code == 404
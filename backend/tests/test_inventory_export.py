@@ -0,0 +1,83 @@
+"""Columnar (Parquet / Arrow IPC) inventory exports"""
+
+import io
+from datetime import date, datetime, timezone
+
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+
+from app.application.services import inventory_export_service as export_module
+from app.application.services.inventory_export_service import (
+    inventory_export_service, EXPORTS, ESTADO_INDEX, FORMAT_ARROW, FORMAT_PARQUET
+)
+from app.infrastructure.database.models import EstadoLoteSemillas, LoteSemillas
+
+CREATED_AT = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+
+LOTE_ROWS = [
+    (1, "Tomate Cherry", "Tomate", "Cherry", "Solanaceae", "Latanina", 2024, date(2027, 12, 31),
+     EstadoLoteSemillas.ACTIVO, 100, 80, "Nevera", "Compra", "F1", None, CREATED_AT),
+    (2, "Lechuga", None, None, None, None, None, None,
+     None, None, None, None, None, None, "sin variedad", CREATED_AT),
+]
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def partitions(self):
+        yield from (self.rows[i:i + 1] for i in range(len(self.rows)))
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, statement):
+        return FakeResult(self.rows)
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("export_type", sorted(EXPORTS))
+def test_statement_matches_schema(export_type):
+    spec = EXPORTS[export_type]
+    statement = spec.statement(7)
+
+    if spec.orm_entities:
+        assert statement.column_descriptions[0]["entity"] is not None
+    else:
+        assert len(statement.selected_columns) == len(spec.schema)
+
+
+@pytest.mark.parametrize("export_type, offset", [("lotes", 3), ("all", 0)])
+def test_estado_position(export_type, offset):
+    statement = EXPORTS[export_type].statement(7)
+
+    assert statement.selected_columns[ESTADO_INDEX + offset].key == LoteSemillas.estado.key
+    assert EXPORTS[export_type].schema.field(ESTADO_INDEX + offset).name == "estado"
+
+
+def _read(data: bytes, file_format: str):
+    if file_format == FORMAT_PARQUET:
+        return pq.read_table(io.BytesIO(data))
+    return ipc.open_stream(data).read_all()
+
+
+@pytest.mark.parametrize("file_format", [FORMAT_PARQUET, FORMAT_ARROW])
+def test_stream_round_trip(monkeypatch, file_format):
+    monkeypatch.setattr(export_module, "SessionLocal", lambda: FakeSession(LOTE_ROWS))
+
+    chunks = list(inventory_export_service.stream("lotes", file_format, 7))
+    table = _read(b"".join(chunks), file_format)
+
+    # Un row group / record batch por lote leído, más el cierre
+    assert len(chunks) == len(LOTE_ROWS) + 1
+    assert table.schema.equals(EXPORTS["lotes"].schema, check_metadata=False)
+    assert table.column("estado").to_pylist() == ["activo", None]
+    assert table.column("fecha_vencimiento").to_pylist() == [date(2027, 12, 31), None]
+    assert table.column("created_at").to_pylist() == [CREATED_AT, CREATED_AT]
+    assert table.column("notas").to_pylist() == [None, "sin variedad"]
@@ -0,0 +1,55 @@
+"""Facet counts cache, validated against the persisted inventory version"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.models import InventoryVersionRecord
+from app.application.services.inventory_facets_service import InventoryFacetsService, LoteFilters
+from app.application.services.inventory_version_service import inventory_version_service
+
+
+@pytest.fixture
+def factory():
+    engine = create_engine("sqlite://")
+    InventoryVersionRecord.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def worker(monkeypatch):
+    """A worker process: its own in-memory cache"""
+    service = InventoryFacetsService()
+    service.computed = 0
+
+    def compute(db, user_id, filters):
+        service.computed += 1
+        return {"total": service.computed, "facets": {}}
+
+    monkeypatch.setattr(service, "compute", compute)
+    return service
+
+
+def facets(service, factory, filters=LoteFilters()):
+    db = factory()
+    try:
+        return service.get(db, 7, filters, inventory_version_service.get(db, 7))
+    finally:
+        db.close()
+
+
+def test_change_in_another_worker_invalidates_the_cache(monkeypatch, factory):
+    worker_a, worker_b = worker(monkeypatch), worker(monkeypatch)
+
+    assert facets(worker_a, factory)["total"] == 1
+    assert facets(worker_a, factory)["total"] == 1  # Desde la caché
+    assert facets(worker_a, factory, LoteFilters(estado="activo"))["total"] == 2
+
+    # Otro worker atiende un cambio y sube la versión (el upsert de bump)
+    db = factory()
+    db.add(InventoryVersionRecord(usuario_id=7, version=1))
+    db.commit()
+    db.close()
+
+    assert facets(worker_a, factory)["total"] == 3
+    assert facets(worker_b, factory)["total"] == 1
+    assert worker_a.computed == 3
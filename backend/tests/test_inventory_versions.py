@@ -0,0 +1,84 @@
+"""Persistent inventory versions shared by every worker"""
+
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.models import InventoryVersionRecord
+from app.application.services.inventory_version_service import (
+    inventory_version_service, CATALOG_SCOPE, NEVER_CHANGED
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+LOTE_CHANGE = datetime(2026, 10, 19, 9, 15, 42, 123456, tzinfo=timezone.utc)
+CATALOG_CHANGE = datetime(2026, 10, 18, 7, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    InventoryVersionRecord.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_missing_rows_are_version_zero(db):
+    version = inventory_version_service.get(db, 7)
+
+    assert version.tag == "0.0"
+    assert version.changed_at == NEVER_CHANGED
+
+
+def test_version_combines_user_and_catalog(db):
+    db.add_all([
+        InventoryVersionRecord(usuario_id=7, version=3, changed_at=LOTE_CHANGE),
+        InventoryVersionRecord(usuario_id=8, version=9, changed_at=LOTE_CHANGE),
+        InventoryVersionRecord(usuario_id=CATALOG_SCOPE, version=2, changed_at=CATALOG_CHANGE),
+    ])
+    db.commit()
+
+    version = inventory_version_service.get(db, 7)
+
+    assert version.tag == "2.3"
+    assert version.changed_at == LOTE_CHANGE.replace(microsecond=0)
+    assert inventory_version_service.get(db, 8).tag == "2.9"
+
+
+def test_bump_is_one_upsert():
+    sql = str(inventory_version_service._bump_statement(7).compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (usuario_id) DO UPDATE" in sql
+    assert "version = (inventory_versions.version +" in sql
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+def test_bumps_are_seen_by_other_sessions():
+    engine = create_engine(TEST_DATABASE_URL)
+    InventoryVersionRecord.__table__.drop(engine, checkfirst=True)
+    InventoryVersionRecord.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    try:
+        writer, reader = factory(), factory()
+        inventory_version_service.bump(writer, 7)
+        # Sin commit, otra sesión (otro worker) aún ve la versión anterior
+        assert inventory_version_service.get(reader, 7).tag == "0.0"
+        writer.commit()
+        reader.rollback()
+        assert inventory_version_service.get(reader, 7).tag == "0.1"
+
+        inventory_version_service.bump(writer, 7)
+        inventory_version_service.bump_catalog(writer)
+        writer.commit()
+        reader.rollback()
+        assert inventory_version_service.get(reader, 7).tag == "1.2"
+        writer.close()
+        reader.close()
+    finally:
+        InventoryVersionRecord.__table__.drop(engine)
+        engine.dispose()
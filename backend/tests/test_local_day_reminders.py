@@ -0,0 +1,86 @@
+"""Digest reminders use the local date of the users, not the server clock"""
+
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.application.services import calendar_service as calendar_module
+from app.application.services import notification_scheduler as scheduler_module
+from app.application.services.calendar_service import (
+    calendar_service, LoteCalendarRow, PlantacionCalendarRow
+)
+from app.infrastructure.database.models import EstadoLoteSemillas, EstadoPlantacion
+
+USER = SimpleNamespace(id=1, latitude=43.3, notifications_enabled=True)
+
+# Día 1 en Tokio mientras el servidor (UTC) sigue en el mes anterior
+LOCAL_TODAY = date(2026, 11, 1)
+
+
+def lote(lote_id, months):
+    return LoteCalendarRow(
+        lote_id=lote_id, nombre_comercial=f"Lote {lote_id}", estado=EstadoLoteSemillas.ACTIVO,
+        cantidad_estimada=10, cantidad_restante=None, fecha_viabilidad_hasta=None, variedad_nombre="Var",
+        meses_siembra_interior=months, meses_siembra_exterior=[], dias_germinacion_min=None,
+        dias_germinacion_max=None, especie_nombre="Especie",
+        ventana_meses_interior=months, ventana_meses_exterior=[],
+    )
+
+
+def plantacion(plantacion_id, fecha_siembra, dias_hasta_trasplante):
+    return PlantacionCalendarRow(
+        plantacion_id=plantacion_id, nombre_plantacion=f"Plantación {plantacion_id}",
+        estado=EstadoPlantacion.GERMINADA, fecha_siembra=fecha_siembra, fecha_cosecha_estimada=None,
+        variedad_nombre="Var", dias_hasta_trasplante=dias_hasta_trasplante, especie_nombre="Especie",
+        fecha_germinacion=None, fecha_trasplante=None, dias_germinacion_min=None, dias_germinacion_max=None,
+        dias_hasta_cosecha_min=None, dias_hasta_cosecha_max=None,
+    )
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(
+        calendar_service, "load_lote_rows",
+        lambda user_id, db, active_only=True, user_latitude=None: [lote(1, [10]), lote(2, [11])]
+    )
+    monkeypatch.setattr(
+        calendar_service, "load_plantacion_rows",
+        lambda user_id, estados, db: [
+            # Trasplante a medianoche del día local: cuenta como "hoy"
+            plantacion(1, datetime(2026, 10, 2), 30),
+            plantacion(2, datetime(2026, 10, 3, 18, 30), 30),
+            plantacion(3, datetime(2026, 9, 1), 30),
+        ]
+    )
+    return scheduler_module.NotificationScheduler()
+
+
+def test_monthly_planting_uses_the_local_month(scheduler):
+    pending = scheduler.collect_monthly_planting_reminders(None, [USER], LOCAL_TODAY)
+
+    assert [r["lote_id"] for r in pending[0].data["recommendations"]] == [2]
+    assert pending[0].key == "monthly_planting:1:2026-11"
+    assert pending[0].data["url"] == "/calendar/mes/2026/11"
+
+
+def test_transplants_are_counted_in_local_days(scheduler):
+    pending = scheduler.collect_transplant_reminders(None, [USER], LOCAL_TODAY)
+
+    assert [(n.data["seed"]["plantacion_id"], n.data["seed"]["days_until"]) for n in pending] == [(1, 0), (2, 1)]
+    assert pending[0].body == "Hoy toca trasplantar Plantación 1"
+
+
+def test_calendar_helpers_default_to_the_server_date(monkeypatch):
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return cls(2026, 10, 31)
+
+    monkeypatch.setattr(calendar_module, "date", FixedDate)
+    monkeypatch.setattr(
+        calendar_service, "load_lote_rows",
+        lambda user_id, db, active_only=True, user_latitude=None: [lote(1, [10]), lote(2, [11])]
+    )
+
+    assert [r["lote_id"] for r in calendar_service.get_current_month_recommendations(USER, None)] == [1]
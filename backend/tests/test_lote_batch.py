@@ -0,0 +1,107 @@
+"""Batch update/delete of lotes: validation, grouping and result mapping"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_current_user, get_db
+from app.api.routes import seeds
+from app.application.services.lote_batch_service import (
+    lote_batch_service, BATCH_UPDATED, BATCH_UNCHANGED, BATCH_DELETED, BATCH_NOT_FOUND
+)
+from app.infrastructure.database.models import EstadoLoteSemillas
+
+
+class FakeSession:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    app = FastAPI()
+    app.include_router(seeds.router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=7)
+    app.dependency_overrides[get_db] = FakeSession
+    monkeypatch.setattr(seeds.inventory_version_service, "bump", lambda db, user_id: None)
+    return TestClient(app)
+
+
+def test_update_many_groups_identical_changes(monkeypatch):
+    monkeypatch.setattr(lote_batch_service, "_owned_ids", staticmethod(lambda db, user_id, ids: {1, 2, 3, 4}))
+    db = FakeSession()
+    results = lote_batch_service.update_many(db, 7, [
+        (1, {"estado": "agotado"}),
+        (2, {"estado": "agotado"}),
+        (3, {"marca": "Latanina"}),
+        (4, {}),
+        (9, {"marca": "X"}),
+    ])
+
+    assert results == {1: BATCH_UPDATED, 2: BATCH_UPDATED, 3: BATCH_UPDATED, 4: BATCH_UNCHANGED, 9: BATCH_NOT_FOUND}
+    grouped, by_primary_key = db.executed
+    assert grouped[0].compile().params["estado"] == EstadoLoteSemillas.AGOTADO
+    assert by_primary_key[1] == [{"id": 3, "marca": "Latanina"}]
+
+
+def test_batch_update_maps_results_in_request_order(client, monkeypatch):
+    received = {}
+
+    def update_many(db, user_id, updates):
+        received["updates"] = updates
+        return {3: BATCH_UPDATED, 1: BATCH_NOT_FOUND, 2: BATCH_UNCHANGED}
+
+    monkeypatch.setattr(seeds.lote_batch_service, "update_many", update_many)
+    response = client.patch("/seeds/batch", json={"items": [
+        {"id": 3, "estado": "agotado"}, {"id": 1, "notas": None}, {"id": 2},
+    ]})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "succeeded": 2,
+        "not_found": 1,
+        "results": [
+            {"id": 3, "status": "updated"}, {"id": 1, "status": "not_found"}, {"id": 2, "status": "unchanged"},
+        ],
+    }
+    # Solo los campos enviados (notas=null sí se envía y borra las notas)
+    assert received["updates"] == [(3, {"estado": "agotado"}), (1, {"notas": None}), (2, {})]
+
+
+def test_batch_update_rejects_null_estado(client, monkeypatch):
+    monkeypatch.setattr(seeds.lote_batch_service, "update_many", pytest.fail)
+    response = client.patch("/seeds/batch", json={"items": [{"id": 1, "estado": None}]})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("method, body", [
+    ("PATCH", {"items": [{"id": 1}, {"id": 1}]}),
+    ("DELETE", {"ids": [5, 6, 5]}),
+])
+def test_duplicate_ids_are_rejected(client, method, body):
+    response = client.request(method, "/seeds/batch", json=body)
+    assert response.status_code == 400
+    assert "Duplicate" in response.json()["detail"]
+
+
+def test_batch_delete_maps_results(client, monkeypatch):
+    monkeypatch.setattr(
+        seeds.lote_batch_service, "delete_many",
+        lambda db, user_id, ids: {lote_id: BATCH_DELETED if lote_id != 6 else BATCH_NOT_FOUND for lote_id in ids}
+    )
+    monkeypatch.setattr(seeds, "delete_lote_photo_folder", lambda *args: None, raising=False)
+    response = client.request("DELETE", "/seeds/batch", json={"ids": [5, 6]})
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 1
+    assert response.json()["results"][1] == {"id": 6, "status": "not_found"}
@@ -0,0 +1,159 @@
+"""Generated fecha_viabilidad_hasta column and the expiring lotes range query"""
+
+import importlib.util
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, create_mock_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.dependencies import get_current_user, get_db
+from app.api.routes import calendar
+from app.application.services.calendar_service import calendar_service
+from app.infrastructure.database.base import Base
+from app.infrastructure.database import models
+from app.infrastructure.database.models import (
+    EstadoLoteSemillas, Especie, LoteSemillas, User, Variedad
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+TODAY = date(2026, 10, 19)
+MIGRATION = Path(__file__).resolve().parent.parent / "alembic" / "versions" / "023_add_fecha_viabilidad_hasta.py"
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("migration_023", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _sql(statement):
+    return " ".join(str(statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )).split())
+
+
+def test_migration_and_model_share_the_expression():
+    assert _migration().FECHA_VIABILIDAD_HASTA_SQL == models.FECHA_VIABILIDAD_HASTA_SQL
+
+
+def test_column_is_generated_and_stored():
+    statements = []
+    engine = create_mock_engine(
+        "postgresql+psycopg2://",
+        lambda sql, *args, **kwargs: statements.append(str(sql.compile(dialect=engine.dialect)))
+    )
+    LoteSemillas.__table__.create(engine, checkfirst=False)
+
+    create_table = next(
+        " ".join(sql.split()) for sql in statements if sql.strip().startswith("CREATE TABLE lotes_semillas")
+    )
+    assert (
+        f"fecha_viabilidad_hasta DATE GENERATED ALWAYS AS ({models.FECHA_VIABILIDAD_HASTA_SQL}) STORED"
+        in create_table
+    )
+
+
+def test_expiring_query_is_a_closed_range_on_the_column():
+    sql = _sql(calendar_service._expiring_query(Session(), 30, TODAY).statement)
+
+    assert "lotes_semillas.fecha_viabilidad_hasta >= '2026-10-19'" in sql
+    assert "lotes_semillas.fecha_viabilidad_hasta <= '2026-11-18'" in sql
+    assert "lotes_semillas.estado = 'ACTIVO'" in sql
+    assert sql.endswith("ORDER BY lotes_semillas.fecha_viabilidad_hasta")
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *conditions):
+        return self
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+def test_api_returns_the_expiration_date_as_iso(monkeypatch):
+    fecha = date.today() + timedelta(days=14)
+    rows = [(1, 10, "Tomate Cherry", fecha, "Cherry")]
+    monkeypatch.setattr(calendar_service, "_expiring_query", lambda db, days_ahead, today: FakeQuery(rows))
+    app = FastAPI()
+    app.include_router(calendar.router)
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="a@b.c", name="Ane")
+    app.dependency_overrides[get_db] = lambda: None
+
+    response = TestClient(app).get("/calendar/expiring-seeds?days=30")
+
+    assert response.status_code == 200
+    assert response.json() == [{
+        "lote_id": 10,
+        "nombre": "Tomate Cherry",
+        "variedad": "Cherry",
+        "expiration_date": fecha.isoformat(),
+        "days_until": 14
+    }]
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+def test_generated_column_and_expiring_query_on_postgres():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user = User(email="expiring@test.lorapp", name="Ane")
+        especie = Especie(nombre_comun="Tomate")
+        db.add_all([user, especie])
+        db.flush()
+        variedad = Variedad(especie_id=especie.id, nombre_variedad="Cherry")
+        db.add(variedad)
+        db.flush()
+
+        def lote(nombre, **fields):
+            fields.setdefault("estado", EstadoLoteSemillas.ACTIVO)
+            return LoteSemillas(usuario_id=user.id, variedad_id=variedad.id, nombre_comercial=nombre, **fields)
+
+        lotes = {
+            # Fecha de adquisición + años de viabilidad
+            "adquirido": lote("adquirido", fecha_adquisicion=datetime(2024, 10, 25, 18, 30), anos_viabilidad_semilla=2),
+            # Sin adquisición: 1 de enero del año de producción
+            "producido": lote("producido", anno_produccion=2023, anos_viabilidad_semilla=4),
+            # 29 de febrero + 1 año -> 28 de febrero
+            "bisiesto": lote("bisiesto", fecha_adquisicion=datetime(2024, 2, 29), anos_viabilidad_semilla=1),
+            "sin_viabilidad": lote("sin_viabilidad", fecha_adquisicion=datetime(2024, 10, 25)),
+            "caducado": lote("caducado", fecha_adquisicion=datetime(2024, 10, 18), anos_viabilidad_semilla=2),
+            "en_el_limite": lote("en_el_limite", fecha_adquisicion=datetime(2024, 11, 18), anos_viabilidad_semilla=2),
+            "fuera": lote("fuera", fecha_adquisicion=datetime(2024, 11, 19), anos_viabilidad_semilla=2),
+            "hoy": lote("hoy", fecha_adquisicion=datetime(2024, 10, 19), anos_viabilidad_semilla=2),
+            "agotado": lote("agotado", fecha_adquisicion=datetime(2024, 10, 25), anos_viabilidad_semilla=2,
+                            estado=EstadoLoteSemillas.AGOTADO),
+        }
+        db.add_all(lotes.values())
+        db.commit()
+        for item in lotes.values():
+            db.refresh(item)
+
+        assert lotes["adquirido"].fecha_viabilidad_hasta == date(2026, 10, 25)
+        assert lotes["producido"].fecha_viabilidad_hasta == date(2027, 1, 1)
+        assert lotes["bisiesto"].fecha_viabilidad_hasta == date(2025, 2, 28)
+        assert lotes["sin_viabilidad"].fecha_viabilidad_hasta is None
+
+        expiring = calendar_service._expiring_query(db, 30, TODAY).filter(
+            LoteSemillas.usuario_id == user.id
+        ).all()
+        assert [row.nombre_comercial for row in expiring] == ["hoy", "adquirido", "en_el_limite"]
+
+        by_user = calendar_service.get_expiring_lotes_by_user(30, db, user_ids=[user.id], today=TODAY)
+        assert by_user[user.id][0]["expiration_date"] == "2026-10-19"
+        assert by_user[user.id][0]["days_until"] == 0
+    finally:
+        db.close()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
@@ -0,0 +1,141 @@
+"""Prometheus text rendering of the in-process metrics"""
+
+import json
+import os
+
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, Registry, _Metric
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("lorapp_test", "Abstract")
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    runs = registry.register(Counter("lorapp_runs_total", "Runs", ["job", "status"]))
+    lag = registry.register(Gauge("lorapp_lag_seconds", "Lag"))
+    runs.inc(job="digest", status="ok")
+    runs.inc(2, job="digest", status="ok")
+    runs.inc(job='say "hi"', status="error")
+    lag.set(1.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP lorapp_runs_total Runs",
+        "# TYPE lorapp_runs_total counter",
+        'lorapp_runs_total{job="digest",status="ok"} 3',
+        'lorapp_runs_total{job="say \\"hi\\"",status="error"} 1',
+        "# HELP lorapp_lag_seconds Lag",
+        "# TYPE lorapp_lag_seconds gauge",
+        "lorapp_lag_seconds 1.5",
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("lorapp_latency_seconds", "Latency", ["host"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, host="fcm")
+
+    assert histogram.count(host="fcm") == 4
+    assert histogram.render()[2:] == [
+        'lorapp_latency_seconds_bucket{host="fcm",le="0.1"} 2',
+        'lorapp_latency_seconds_bucket{host="fcm",le="1"} 3',
+        'lorapp_latency_seconds_bucket{host="fcm",le="+Inf"} 4',
+        'lorapp_latency_seconds_sum{host="fcm"} 3.65',
+        'lorapp_latency_seconds_count{host="fcm"} 4',
+    ]
+
+
+def test_labels_must_match():
+    counter = Counter("lorapp_runs_total", "Runs", ["job"])
+    with pytest.raises(ValueError):
+        counter.inc(host="fcm")
+
+
+def test_gauge_is_not_a_counter():
+    gauge = Gauge("lorapp_lag_seconds", "Lag", ["job"])
+    assert not isinstance(gauge, Counter)
+
+    gauge.set(5, job="digest")
+    gauge.set(2, job="digest")
+    assert gauge.value(job="digest") == 2
+    assert not hasattr(gauge, "inc")
+
+
+def _worker(tmp_path):
+    registry = Registry(str(tmp_path))
+    runs = registry.register(Counter("lorapp_runs_total", "Runs", ["job"]))
+    lag = registry.register(Gauge("lorapp_lag_seconds", "Lag"))
+    latency = registry.register(Histogram("lorapp_latency_seconds", "Latency", buckets=(1.0,)))
+    return registry, runs, lag, latency
+
+
+def _publish_as(tmp_path, registry, pid):
+    """Snapshot written by another worker process"""
+    (tmp_path / f"metrics_{pid}.json").write_text(json.dumps(registry.snapshot()))
+
+
+def test_render_merges_the_snapshots_of_other_workers(tmp_path, monkeypatch):
+    other, other_runs, other_lag, other_latency = _worker(tmp_path)
+    other_runs.inc(2, job="digest")
+    other_runs.inc(job="outbox")
+    other_latency.observe(3.0)
+    # Gauge puesto por el otro worker antes que el propio
+    monkeypatch.setattr(other_lag, "_values", {(): (7.0, 100.0)})
+    _publish_as(tmp_path, other, 4242)
+
+    registry, runs, lag, latency = _worker(tmp_path)
+    runs.inc(job="digest")
+    lag.set(1.5)
+    latency.observe(0.5)
+    monkeypatch.setattr("app.core.metrics._process_alive", lambda pid: pid == 4242)
+
+    lines = registry.render().splitlines()
+    assert 'lorapp_runs_total{job="digest"} 3' in lines
+    assert 'lorapp_runs_total{job="outbox"} 1' in lines
+    # Gauge: el valor más reciente, no la suma
+    assert "lorapp_lag_seconds 1.5" in lines
+    assert 'lorapp_latency_seconds_bucket{le="1"} 1' in lines
+    assert 'lorapp_latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "lorapp_latency_seconds_sum 3.5" in lines
+    # Los valores propios no cambian al renderizar
+    assert runs.value(job="digest") == 1
+
+
+def test_snapshots_of_dead_workers_are_ignored(tmp_path, monkeypatch):
+    other, other_runs, _, _ = _worker(tmp_path)
+    other_runs.inc(5, job="digest")
+    _publish_as(tmp_path, other, 4242)
+    (tmp_path / "metrics_4243.json").write_text("{not json")
+
+    registry, runs, _, _ = _worker(tmp_path)
+    runs.inc(job="digest")
+    monkeypatch.setattr("app.core.metrics._process_alive", lambda pid: pid == 4243)
+
+    assert 'lorapp_runs_total{job="digest"} 1' in registry.render().splitlines()
+
+
+def test_write_snapshot_round_trips(tmp_path):
+    registry, runs, lag, latency = _worker(tmp_path)
+    runs.inc(job="digest")
+    lag.set(2.0)
+    latency.observe(0.5)
+
+    registry.write_snapshot()
+
+    path = tmp_path / f"metrics_{os.getpid()}.json"
+    assert os.listdir(tmp_path) == [path.name]
+    snapshot = json.loads(path.read_text())
+    assert runs.load(snapshot["lorapp_runs_total"]) == {("digest",): 1}
+    assert latency.load(snapshot["lorapp_latency_seconds"]) == {(): ([1, 0], 0.5)}
+    # El archivo propio no se suma dos veces
+    assert 'lorapp_runs_total{job="digest"} 1' in registry.render().splitlines()
+
+
+def test_without_directory_nothing_is_written(tmp_path):
+    registry = Registry()
+    registry.register(Counter("lorapp_runs_total", "Runs")).inc()
+    registry.write_snapshot()
+    assert registry.render().splitlines()[-1] == "lorapp_runs_total 1"
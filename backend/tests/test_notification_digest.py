@@ -0,0 +1,79 @@
+"""Merging of a user's reminders into one daily digest"""
+
+from collections import Counter
+
+from app.application.services.notification_digest_service import (
+    notification_digest_service, DIGEST_TYPE, DIGEST_MAX_ITEMS
+)
+from app.application.services.notification_outbox_service import PendingNotification
+
+WINDOW = "2026-10-19"
+
+
+def _pending(user_id, notification_type, n, url=None):
+    return PendingNotification(
+        user_id=user_id,
+        notification_type=notification_type,
+        title=f"{notification_type} {n}",
+        body="...",
+        key=f"{notification_type}:{user_id}:{n}:{WINDOW}",
+        data={"url": url} if url else None,
+    )
+
+
+def test_single_notification_is_kept_as_is():
+    alone = _pending(1, "transplant", 1, "/my-seedling/4")
+
+    assert notification_digest_service.merge([alone], WINDOW) == [alone]
+
+
+def test_one_digest_per_user_keyed_by_window():
+    pending = [
+        _pending(1, "transplant", 1, "/my-seedling/4"),
+        _pending(2, "monthly_planting", 1),
+        _pending(1, "transplant", 2, "/my-seedling/5"),
+        _pending(1, "monthly_planting", 1),
+    ]
+
+    merged = notification_digest_service.merge(pending, WINDOW)
+
+    assert [n.user_id for n in merged] == [1, 2]
+    digest = merged[0]
+    assert digest.notification_type == DIGEST_TYPE
+    assert digest.key == f"{DIGEST_TYPE}:1:{WINDOW}"
+    assert digest.body == "2 trasplantes pendientes · siembras del mes"
+    assert digest.data["counts"] == {"transplant": 2, "monthly_planting": 1}
+    # Tipos mezclados: el enlace va al calendario
+    assert digest.data["url"] == "/calendar"
+    assert merged[1] is pending[1]
+
+
+def test_same_type_links_to_its_listing():
+    merged = notification_digest_service.merge(
+        [_pending(1, "expiration_urgent", n, f"/inventory/{n}") for n in range(2)], WINDOW
+    )
+
+    assert merged[0].data["url"] == "/inventory"
+    assert merged[0].body == "2 semillas a punto de caducar"
+
+
+def test_same_url_is_kept():
+    merged = notification_digest_service.merge(
+        [_pending(1, "transplant", 1, "/my-seedling"), _pending(1, "expiration_urgent", 1, "/my-seedling")], WINDOW
+    )
+
+    assert merged[0].data["url"] == "/my-seedling"
+
+
+def test_items_are_capped():
+    pending = [_pending(1, "transplant", n) for n in range(DIGEST_MAX_ITEMS + 3)]
+
+    data = notification_digest_service.merge(pending, WINDOW)[0].data
+
+    assert len(data["items"]) == DIGEST_MAX_ITEMS
+    assert data["more"] == 3
+    assert data["items"][0] == {"type": "transplant", "title": "transplant 0", "body": "...", "url": None}
+
+
+def test_summary_of_unknown_types():
+    assert notification_digest_service.summary(Counter({"custom": 1, "other": 4})) == "1 aviso · 4 avisos"
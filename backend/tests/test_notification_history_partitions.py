@@ -0,0 +1,114 @@
+"""Monthly partitions of notification_history and its DEFAULT partition"""
+
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.application.services import notification_history_service as history_module
+from app.application.services.notification_history_service import (
+    notification_history_service, partition_name, DEFAULT_PARTITION, TABLE
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+TODAY = date(2026, 10, 19)
+
+
+class FakeResult:
+    rowcount = 0
+
+
+class RecordingSession:
+    """Records SQL; answers the partition listing with ``existing``"""
+
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if "FROM pg_inherits" in sql:
+            return [(name,) for name in self.existing]
+        return FakeResult()
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fixed_today(monkeypatch):
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return TODAY
+    monkeypatch.setattr(history_module, "date", FixedDate)
+
+
+def test_new_partition_takes_its_rows_from_the_default_partition():
+    existing = [partition_name(date(2026, 10, 1)), DEFAULT_PARTITION]
+    db = RecordingSession(existing)
+
+    assert notification_history_service.ensure_partitions(db, months_ahead=1) == ["notification_history_y2026m11"]
+    name = "notification_history_y2026m11"
+    sql = [s for s in db.statements if "pg_inherits" not in s and "advisory" not in s]
+    assert sql[0] == f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"
+    assert sql[1].startswith(f"CREATE TABLE {name} (LIKE {TABLE}")
+    assert sql[2].startswith(f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION}")
+    assert sql[3] == (
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')"
+    )
+    assert not any("PARTITION OF" in s for s in sql)
+
+
+def test_first_run_creates_partitions_then_default():
+    db = RecordingSession([])
+    notification_history_service.ensure_partitions(db, months_ahead=0)
+    sql = [s for s in db.statements if "pg_inherits" not in s and "advisory" not in s]
+    assert sql == [
+        f"CREATE TABLE notification_history_y2026m10 PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')",
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT",
+    ]
+
+
+def test_retention_covers_the_default_partition():
+    existing = [partition_name(date(2025, 9, 1)), partition_name(date(2026, 10, 1)), DEFAULT_PARTITION]
+    db = RecordingSession(existing)
+    assert notification_history_service.drop_expired(db, retention_months=12) == ["notification_history_y2025m09"]
+    assert f"DELETE FROM {DEFAULT_PARTITION} WHERE sent_at < :oldest_kept" in db.statements
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+def test_rows_in_the_default_partition_are_moved(monkeypatch):
+    from app.infrastructure.database.base import Base
+    from app.infrastructure.database import models  # noqa: F401
+
+    monkeypatch.undo()  # fecha real: las particiones se crean a partir de hoy
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        notification_history_service.ensure_partitions(db, months_ahead=0)
+        user_id = db.execute(text(
+            "INSERT INTO users (email, name) VALUES ('history@example.com', 'History') RETURNING id"
+        )).scalar()
+        next_month = history_module._add_months(date.today().replace(day=1), 1)
+        sent_at = datetime(next_month.year, next_month.month, 2, tzinfo=timezone.utc)
+        db.execute(text(
+            "INSERT INTO notification_history (usuario_id, notification_type, title, body, sent_at) "
+            "VALUES (:user_id, 'test', 't', 'b', :sent_at)"
+        ), {"user_id": user_id, "sent_at": sent_at})
+        db.commit()
+
+        created = notification_history_service.ensure_partitions(db, months_ahead=1)
+        assert created == [partition_name(sent_at.date().replace(day=1))]
+        assert db.execute(text(f"SELECT count(*) FROM {created[0]}")).scalar() == 1
+        assert db.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar() == 0
+    finally:
+        db.close()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
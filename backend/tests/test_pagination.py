@@ -0,0 +1,28 @@
+"""Keyset pagination cursors"""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import encode_cursor, decode_cursor
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2026, 10, 19, 8, 30, 15, 123456),
+    datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc),
+])
+def test_cursor_round_trip(created_at):
+    cursor = encode_cursor(created_at, 4217)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 4217)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm8tcGlwZQ", "MjAyNi0xMC0xOXxhYmM", "//8"])
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid cursor"
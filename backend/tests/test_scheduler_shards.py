@@ -0,0 +1,108 @@
+"""Shard processing: retries, failure after max attempts and retention"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.infrastructure.database.models import SchedulerShard
+from app.application.services import scheduler_coordination
+from app.application.services.scheduler_coordination import (
+    SchedulerLeader, ShardCoordinator, SHARD_DONE, SHARD_FAILED, SHARD_PENDING
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://")
+    SchedulerShard.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(scheduler_coordination, "SessionLocal", factory)
+    monkeypatch.setattr(settings, "SCHEDULER_SHARD_MAX_ATTEMPTS", 3)
+    return factory
+
+
+def add_shards(factory, count, created_at=None):
+    db = factory()
+    for shard in range(count):
+        db.add(SchedulerShard(
+            job_id="daily_digest", run_key="20261019T0600", shard=shard, shard_count=count,
+            status=SHARD_PENDING, created_at=created_at or datetime.now(timezone.utc)
+        ))
+    db.commit()
+    db.close()
+
+
+def shards(factory):
+    db = factory()
+    try:
+        return {row.shard: row for row in db.query(SchedulerShard)}
+    finally:
+        db.close()
+
+
+def test_poison_shard_fails_after_max_attempts_without_blocking_others(session_factory):
+    add_shards(session_factory, 3)
+    calls = []
+
+    def handler(db, shard, shard_count, run_key):
+        calls.append(shard)
+        if shard == 1:
+            raise RuntimeError("boom")
+
+    coordinator = ShardCoordinator()
+    coordinator.register("daily_digest", handler)
+
+    assert coordinator.process_pending() == 2
+    assert calls == [0, 1, 2]  # El shard que falla no se reintenta en la misma pasada
+    poison = shards(session_factory)[1]
+    assert (poison.status, poison.attempts, poison.last_error) == (SHARD_PENDING, 1, "RuntimeError: boom")
+
+    assert coordinator.process_pending() == 0
+    assert coordinator.process_pending() == 0
+    result = shards(session_factory)
+    assert result[1].status == SHARD_FAILED and result[1].attempts == 3
+    assert result[0].status == result[2].status == SHARD_DONE
+
+    # Ya no se reclama
+    calls.clear()
+    assert coordinator.process_pending() == 0
+    assert calls == []
+
+
+def test_purge_deletes_old_shards_only(session_factory):
+    add_shards(session_factory, 2, created_at=datetime.now(timezone.utc) - timedelta(days=10))
+    db = session_factory()
+    db.add(SchedulerShard(
+        job_id="daily_digest", run_key="20261019T0615", shard=0, shard_count=1,
+        status=SHARD_PENDING, created_at=datetime.now(timezone.utc)
+    ))
+    db.commit()
+
+    assert ShardCoordinator.purge(db, older_than_days=7) == 2
+    assert [row.run_key for row in db.query(SchedulerShard)] == ["20261019T0615"]
+    db.close()
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+def test_leader_lock_connection_is_not_left_in_a_transaction(monkeypatch):
+    engine = create_engine(TEST_DATABASE_URL)
+    monkeypatch.setattr(scheduler_coordination, "engine", engine)
+    leader = SchedulerLeader(lock_key=0x54455354)
+    try:
+        assert leader.check()
+        assert leader.check()  # Ping
+        with engine.connect() as connection:
+            states = connection.execute(text(
+                "SELECT a.state FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid "
+                "WHERE l.locktype = 'advisory' AND l.objid = :key"
+            ), {"key": 0x54455354}).scalars().all()
+        assert states == ["idle"]
+    finally:
+        leader.release()
+        engine.dispose()
@@ -0,0 +1,76 @@
+"""Sowing windows: one per variedad and hemisphere, built once by the leader"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.models import Especie, Variedad, SowingWindow
+from app.application.services import notification_scheduler as scheduler_module
+from app.application.services.calendar_service import CalendarService
+from app.application.services.geolocation_service import HEMISPHERE_NORTH, HEMISPHERE_SOUTH
+from app.application.services.sowing_window_service import sowing_window_service
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (Especie, Variedad, SowingWindow):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Especie(id=1, nombre_comun="Tomate"))
+    session.add_all([
+        Variedad(id=1, especie_id=1, nombre_variedad="Corazón de buey",
+                 meses_siembra_interior=[2, 3], meses_siembra_exterior=[4, 5]),
+        Variedad(id=2, especie_id=1, nombre_variedad="Sin calendario"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_rebuild_writes_one_window_per_hemisphere(db):
+    assert sowing_window_service.rebuild(db) == 4
+    windows = {
+        (row.variedad_id, row.hemisphere): (row.meses_siembra_interior, row.meses_siembra_exterior)
+        for row in db.query(SowingWindow)
+    }
+    assert windows[(1, HEMISPHERE_NORTH)] == ([2, 3], [4, 5])
+    assert windows[(1, HEMISPHERE_SOUTH)] == ([8, 9], [10, 11])
+    assert windows[(2, HEMISPHERE_SOUTH)] == ([], [])
+
+
+def test_window_months_match_the_fallback_for_any_climate_zone():
+    for climate_zone in (None, "tropical", "polar"):
+        assert CalendarService.adjust_planting_months([4, 5], -40.0, climate_zone) == \
+            CalendarService.window_months([4, 5], HEMISPHERE_SOUTH)
+
+
+def test_rebuild_missing_only_builds_new_variedades(db):
+    sowing_window_service.rebuild(db, [1])
+    assert sowing_window_service.rebuild_missing(db) == 2
+    assert sowing_window_service.rebuild_missing(db) == 0
+
+
+def test_missing_windows_are_built_when_leadership_is_acquired(monkeypatch):
+    calls = []
+    scheduler = scheduler_module.NotificationScheduler()
+    monkeypatch.setattr(scheduler_module, "SessionLocal", lambda: type("Db", (), {"close": lambda self: None})())
+    monkeypatch.setattr(scheduler_module.sowing_window_service, "rebuild_missing", calls.append)
+
+    state = {"leader": False, "lock_free": False}
+
+    def check():
+        state["leader"] = state["leader"] or state["lock_free"]
+        return state["leader"]
+
+    monkeypatch.setattr(type(scheduler.leader), "is_leader", property(lambda self: state["leader"]))
+    monkeypatch.setattr(scheduler.leader, "check", check)
+
+    asyncio.run(scheduler.check_leadership())
+    assert calls == []
+    state["lock_free"] = True
+    asyncio.run(scheduler.check_leadership())
+    asyncio.run(scheduler.check_leadership())
+    assert len(calls) == 1
@@ -0,0 +1,81 @@
+"""Delivery health of push subscriptions"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.infrastructure.database.models import PushSubscription
+from app.application.services.subscription_health_service import subscription_health_service
+from app.infrastructure.notifications.web_push_service import PushMessage, PushResult
+
+MAX_FAILURES = 3
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(settings, "PUSH_SUBSCRIPTION_MAX_FAILURES", MAX_FAILURES)
+    engine = create_engine("sqlite://")
+    PushSubscription.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    for subscription_id in range(1, 5):
+        session.add(PushSubscription(
+            id=subscription_id, usuario_id=1, endpoint=f"https://fcm.googleapis.com/{subscription_id}",
+            p256dh="key", auth="auth", is_active=True, consecutive_failures=0
+        ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def result(subscription_id, status_code=None, success=False):
+    message = PushMessage(
+        subscription_id=subscription_id, endpoint=f"https://fcm.googleapis.com/{subscription_id}",
+        p256dh="key", auth="auth", payload={}
+    )
+    return PushResult(message=message, success=success, status_code=status_code)
+
+
+def state(db, subscription_id):
+    db.expire_all()
+    subscription = db.get(PushSubscription, subscription_id)
+    return subscription.is_active, subscription.consecutive_failures
+
+
+def test_transient_failures_never_deactivate(db):
+    # Una caída del servicio de push: reintentos con 503, 429 y errores de red
+    for _ in range(settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS):
+        deactivated = subscription_health_service.record(db, [result(1, 503), result(2, 429), result(3, None)])
+        db.commit()
+        assert deactivated == []
+
+    for subscription_id in (1, 2, 3):
+        assert state(db, subscription_id) == (True, 0)
+    assert db.get(PushSubscription, 1).last_checked_at is not None
+
+
+def test_gone_subscriptions_are_deactivated_at_once(db):
+    assert subscription_health_service.record(db, [result(1, 404), result(2, 410), result(3, success=True)]) == [1, 2]
+    db.commit()
+
+    assert state(db, 1) == (False, 0)
+    assert state(db, 2) == (False, 0)
+    assert state(db, 3) == (True, 0)
+
+
+def test_permanent_failures_deactivate_after_max(db):
+    for attempt in range(1, MAX_FAILURES + 1):
+        deactivated = subscription_health_service.record(db, [result(4, 403)])
+        db.commit()
+        assert deactivated == ([4] if attempt == MAX_FAILURES else [])
+
+    assert state(db, 4) == (False, MAX_FAILURES)
+
+
+def test_success_resets_the_failure_count(db):
+    subscription_health_service.record(db, [result(4, 400)])
+    subscription_health_service.record(db, [result(4, 400), result(4, success=True)])
+    db.commit()
+
+    assert state(db, 4) == (True, 0)
+    assert db.get(PushSubscription, 4).last_used_at is not None
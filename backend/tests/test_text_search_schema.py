@@ -0,0 +1,60 @@
+"""Fresh databases built by create_all get the text search functions first"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine, create_mock_engine, text
+
+from app.infrastructure.database.base import Base
+from app.infrastructure.database import models  # noqa: F401
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def _create_all_statements():
+    statements = []
+    engine = create_mock_engine(
+        "postgresql+psycopg2://",
+        lambda sql, *args, **kwargs: statements.append(str(sql.compile(dialect=engine.dialect)).strip())
+    )
+    Base.metadata.create_all(engine, checkfirst=False)
+    return statements
+
+
+def test_extensions_and_unaccent_wrapper_are_created_before_tables():
+    statements = _create_all_statements()
+    position = {
+        key: next(i for i, sql in enumerate(statements) if sql.startswith(key))
+        for key in (
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE EXTENSION IF NOT EXISTS unaccent",
+            "CREATE OR REPLACE FUNCTION lorapp_unaccent",
+            "CREATE TABLE lotes_semillas",
+        )
+    }
+    assert position["CREATE TABLE lotes_semillas"] > max(
+        value for key, value in position.items() if key != "CREATE TABLE lotes_semillas"
+    )
+
+
+def test_search_vector_uses_the_wrapper():
+    create_lotes = next(sql for sql in _create_all_statements() if sql.startswith("CREATE TABLE lotes_semillas"))
+    assert "GENERATED ALWAYS AS" in create_lotes
+    assert "lorapp_unaccent(" in create_lotes
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+def test_create_all_on_empty_database():
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        Base.metadata.create_all(engine)
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT lorapp_unaccent('Calabacín')")).scalar() == "Calabacin"
+            connection.execute(text(
+                "SELECT count(*) FROM lotes_semillas WHERE search_vector @@ websearch_to_tsquery('simple', 'x')"
+            ))
+        # Repetir create_all (cada arranque llama a init_db) no falla
+        Base.metadata.create_all(engine)
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
@@ -0,0 +1,145 @@
+"""Interval index of the plantation timeline and its per-user cache"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.application.services import timeline_service as timeline_module
+from app.application.services.inventory_version_service import InventoryVersion
+from app.application.services.timeline_service import (
+    IntervalIndex, PlantationTimeline, TimelineEvent, TimelineService, PHASE_HARVEST
+)
+from app.infrastructure.database.models import EstadoPlantacion
+
+D = date(2026, 10, 1)
+
+
+def day(offset):
+    return D + timedelta(days=offset)
+
+
+@pytest.fixture
+def index():
+    return IntervalIndex([
+        (day(10), day(20), "b"),
+        (day(0), day(5), "a"),
+        (day(5), day(5), "single"),
+        (day(15), day(40), "c"),
+        (day(30), day(31), "d"),
+    ])
+
+
+def test_overlapping_is_ordered_by_start(index):
+    assert len(index) == 5
+    assert index.overlapping(day(0), day(100)) == ["a", "single", "b", "c", "d"]
+    assert index.overlapping(day(18), day(30)) == ["b", "c", "d"]
+
+
+def test_boundaries_are_closed(index):
+    # Los extremos cuentan en los dos lados
+    assert index.at(day(5)) == ["a", "single"]
+    assert index.at(day(20)) == ["b", "c"]
+    assert index.at(day(10)) == ["b"]
+    assert index.overlapping(day(21), day(29)) == ["c"]
+    assert index.overlapping(day(-10), day(-1)) == []
+    assert index.overlapping(day(41), day(50)) == []
+    assert index.overlapping(day(-1), day(0)) == ["a"]
+    assert index.overlapping(day(40), day(41)) == ["c"]
+
+
+def test_empty_index():
+    index = IntervalIndex([])
+    assert len(index) == 0
+    assert index.overlapping(day(0), day(10)) == []
+
+
+def test_matches_a_linear_scan():
+    rng = random.Random(7)
+    intervals = []
+    for payload in range(300):
+        start = rng.randint(0, 365)
+        intervals.append((day(start), day(start + rng.randint(0, 60)), payload))
+    index = IntervalIndex(intervals)
+    ordered = sorted(intervals, key=lambda item: (item[0], item[1]))
+
+    for _ in range(200):
+        start = rng.randint(-30, 420)
+        query = (day(start), day(start + rng.randint(0, 45)))
+        expected = [payload for s, e, payload in ordered if s <= query[1] and e >= query[0]]
+        assert index.overlapping(*query) == expected
+
+
+def event(plantacion_id, start, end):
+    return TimelineEvent(
+        plantacion_id=plantacion_id, nombre_plantacion="Tomates", variedad_nombre="Cherry",
+        especie_nombre="Tomate", estado=EstadoPlantacion.CRECIMIENTO, phase=PHASE_HARVEST,
+        start=start, end=end
+    )
+
+
+def test_by_day_is_clipped_to_the_range():
+    long, short = event(1, day(0), day(10)), event(2, day(3), day(3))
+    timeline = PlantationTimeline([long, short])
+
+    days = timeline.by_day(day(2), day(4))
+
+    assert list(days) == [day(2), day(3), day(4)]
+    assert days[day(3)] == [long, short]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = TimelineService()
+    loads, versions = [], {1: "1.1", 2: "1.1"}
+
+    def load(user_id, db):
+        loads.append(user_id)
+        return PlantationTimeline([event(user_id, day(0), day(1))])
+
+    monkeypatch.setattr(service, "_load", load)
+    monkeypatch.setattr(
+        timeline_module.inventory_version_service, "get",
+        lambda db, user_id: InventoryVersion(tag=versions[user_id], changed_at=None)
+    )
+    service.loads, service.versions = loads, versions
+    return service
+
+
+def test_timeline_is_reused_until_the_inventory_changes(service):
+    first = service.build(1, None)
+    assert service.build(1, None) is first
+    assert service.loads == [1]
+
+    # Un cambio de plantación sube la versión del usuario
+    service.versions[1] = "1.2"
+    assert service.build(1, None) is not first
+    assert service.loads == [1, 1]
+
+
+def test_timelines_are_cached_per_user(service):
+    service.build(1, None)
+    service.build(2, None)
+    service.versions[2] = "1.2"
+    service.build(1, None)
+    service.build(2, None)
+    assert service.loads == [1, 2, 2]
+
+
+def test_cached_timeline_expires(service, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(timeline_module.time, "monotonic", lambda: clock[0])
+    service.build(1, None)
+
+    clock[0] += settings.TIMELINE_CACHE_SECONDS + 1
+    service.build(1, None)
+    assert service.loads == [1, 1]
+
+
+def test_cache_is_bounded(service, monkeypatch):
+    monkeypatch.setattr(timeline_module, "MAX_CACHED_TIMELINES", 1)
+    service.build(1, None)
+    service.build(2, None)
+    service.build(1, None)
+    assert service.loads == [1, 2, 1]
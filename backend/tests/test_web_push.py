@@ -0,0 +1,204 @@
+"""Concurrent Web Push delivery against a mocked push service, and VAPID header caching"""
+
+import asyncio
+import os
+from base64 import urlsafe_b64encode
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.core.config import settings
+from app.infrastructure.notifications import web_push_service as web_push_module
+from app.infrastructure.notifications.web_push_service import PushMessage, WebPushService
+
+
+def message(subscription_id, endpoint):
+    return PushMessage(
+        subscription_id=subscription_id, endpoint=endpoint,
+        p256dh="key", auth="secret", payload={"title": "Riego"}
+    )
+
+
+@pytest.fixture
+def push(monkeypatch):
+    """WebPushService whose clients talk to ``push.handler`` instead of the network"""
+    service = WebPushService()
+    service.clients = []
+    service.handler = lambda request: httpx.Response(201)
+    real_client = httpx.AsyncClient
+
+    def client_factory(**kwargs):
+        client = real_client(transport=httpx.MockTransport(lambda request: service.handler(request)), **kwargs)
+        service.clients.append((client, kwargs))
+        return client
+
+    monkeypatch.setattr(web_push_module.httpx, "AsyncClient", client_factory)
+    # Sin cifrado ni firma: se prueba el transporte
+    monkeypatch.setattr(service, "_prepare", lambda msg: ({"TTL": str(msg.ttl)}, b"cipher"))
+    return service
+
+
+def test_one_pooled_client_per_host(push):
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        return httpx.Response(201)
+
+    push.handler = handler
+    messages = [
+        message(1, "https://fcm.googleapis.com/fcm/send/a"),
+        message(2, "https://updates.push.services.mozilla.com/wpush/v2/b"),
+        message(3, "https://fcm.googleapis.com/fcm/send/c"),
+    ]
+
+    report = asyncio.run(push.send_batch(messages))
+
+    assert report.successful == 3
+    assert sorted(hosts) == ["fcm.googleapis.com", "fcm.googleapis.com", "updates.push.services.mozilla.com"]
+    assert len(push.clients) == 2
+    limit = settings.WEB_PUSH_MAX_CONNECTIONS_PER_HOST
+    for client, kwargs in push.clients:
+        assert kwargs["limits"].max_connections == limit
+        # Los clientes se cierran al terminar el lote
+        assert client.is_closed
+    assert report.by_host() == {
+        "fcm.googleapis.com": {"sent": 2, "failed": 0},
+        "updates.push.services.mozilla.com": {"sent": 1, "failed": 0},
+    }
+
+
+def test_concurrency_limit(push):
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(201)
+
+    push.handler = handler
+    messages = [message(i, f"https://fcm.googleapis.com/fcm/send/{i}") for i in range(20)]
+
+    report = asyncio.run(push.send_batch(messages, concurrency=4))
+
+    assert report.successful == 20
+    assert in_flight["max"] == 4
+
+
+def test_outcomes(push):
+    def handler(request):
+        token = request.url.path.rsplit("/", 1)[-1]
+        if token == "down":
+            raise httpx.ConnectError("connection refused", request=request)
+        status, headers = {
+            "ok": (201, {}),
+            "gone": (410, {}),
+            "busy": (429, {"Retry-After": "30"}),
+            "bad": (400, {}),
+        }[token]
+        return httpx.Response(status, headers=headers)
+
+    push.handler = handler
+    tokens = ["ok", "gone", "busy", "bad", "down"]
+    messages = [message(i, f"https://fcm.googleapis.com/fcm/send/{token}") for i, token in enumerate(tokens)]
+
+    report = asyncio.run(push.send_batch(messages))
+
+    results = {token: result for token, result in zip(tokens, report.results)}
+    assert {token: result.outcome for token, result in results.items()} == {
+        "ok": "delivered", "gone": "invalid", "busy": "retryable", "bad": "failed", "down": "retryable",
+    }
+    assert results["busy"].retry_after == 30.0
+    assert results["down"].status_code is None
+    assert report.invalid_subscription_ids == [1]
+
+
+def test_empty_batch_opens_no_client(push):
+    report = asyncio.run(push.send_batch([]))
+    assert report.results == []
+    assert push.clients == []
+
+
+class FakeVapid:
+    """Records the claims it signs"""
+
+    def __init__(self):
+        self.signed = []
+
+    def sign(self, claims):
+        self.signed.append(dict(claims))
+        return {"Authorization": f"vapid t=jwt{len(self.signed)}, k=public"}
+
+
+@pytest.fixture
+def vapid(monkeypatch):
+    service = WebPushService()
+    key = FakeVapid()
+    clock = [1_800_000_000.0]
+    monkeypatch.setattr(service, "_vapid_key", lambda: key)
+    monkeypatch.setattr(web_push_module.time, "time", lambda: clock[0])
+    service.key, service.clock = key, clock
+    return service
+
+
+def test_vapid_headers_are_cached_per_audience(vapid):
+    first = vapid._vapid_headers("https://fcm.googleapis.com/fcm/send/a")
+    # Otra suscripción del mismo push service reutiliza la firma
+    assert vapid._vapid_headers("https://fcm.googleapis.com/fcm/send/b") is first
+    vapid._vapid_headers("https://updates.push.services.mozilla.com/wpush/v2/c")
+
+    assert [claims["aud"] for claims in vapid.key.signed] == [
+        "https://fcm.googleapis.com", "https://updates.push.services.mozilla.com",
+    ]
+    assert vapid.key.signed[0]["exp"] == int(vapid.clock[0]) + web_push_module.VAPID_EXPIRATION_SECONDS
+    assert vapid.key.signed[0]["sub"] == settings.VAPID_CLAIM_EMAIL
+
+
+def test_vapid_headers_are_signed_again_near_expiry(vapid):
+    endpoint = "https://fcm.googleapis.com/fcm/send/a"
+    first = vapid._vapid_headers(endpoint)
+    expires = vapid.key.signed[0]["exp"]
+
+    # Fuera del margen: se sigue usando la firma
+    vapid.clock[0] = expires - web_push_module.VAPID_REFRESH_MARGIN_SECONDS - 1
+    assert vapid._vapid_headers(endpoint) is first
+
+    # Dentro del margen: se firma de nuevo con una caducidad nueva
+    vapid.clock[0] = expires - web_push_module.VAPID_REFRESH_MARGIN_SECONDS
+    second = vapid._vapid_headers(endpoint)
+    assert second is not first
+    assert vapid.key.signed[1]["exp"] == int(vapid.clock[0]) + web_push_module.VAPID_EXPIRATION_SECONDS
+    assert vapid._vapid_headers(endpoint) is second
+
+
+def test_reset_vapid_cache(vapid):
+    endpoint = "https://fcm.googleapis.com/fcm/send/a"
+    vapid._vapid_headers(endpoint)
+    vapid.reset_vapid_cache()
+    vapid._vapid_headers(endpoint)
+    assert len(vapid.key.signed) == 2
+
+
+def test_prepared_headers_do_not_change_the_cache(vapid):
+    def b64(data):
+        return urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    browser_key = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    msg = PushMessage(
+        subscription_id=1, endpoint="https://fcm.googleapis.com/fcm/send/a",
+        p256dh=b64(browser_key), auth=b64(os.urandom(16)), payload={"title": "Riego"}, ttl=3600
+    )
+
+    headers, body = vapid._prepare(msg)
+
+    assert headers["Authorization"] == "vapid t=jwt1, k=public"
+    assert headers["TTL"] == "3600"
+    assert headers["Content-Encoding"] == "aes128gcm"
+    assert body
+    assert vapid._vapid_headers(msg.endpoint) == {"Authorization": "vapid t=jwt1, k=public"}
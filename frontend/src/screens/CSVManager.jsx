@@ -114,15 +114,33 @@ export function CSVManager() {
             const formData = new FormData();
             formData.append('file', file);
 
+            // La importación se ejecuta en segundo plano: consultar su progreso
             const response = await api.post('/seeds/import/csv', formData, {
                 headers: {
                     'Content-Type': 'multipart/form-data',
                 },
+                params: { background: true },
             });
 
-            console.log('Import response:', response.data);
+            let job = response.data;
+            while (job.status === 'pending' || job.status === 'running') {
+                if (job.total_rows) {
+                    setMessage({
+                        type: 'info',
+                        text: `Importando... ${job.processed_rows} / ${job.total_rows} filas`
+                    });
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                job = (await api.get(`/seeds/import/jobs/${job.id}`)).data;
+            }
+
+            console.log('Import job:', job);
+
+            if (job.status === 'failed') {
+                throw new Error(job.message || 'Error desconocido al importar');
+            }
 
-            const { imported = 0, total_errors = 0, errors = [], message: apiMessage = 'Importación completada' } = response.data || {};
+            const { imported = 0, total_errors = 0, errors = [], message: apiMessage = 'Importación completada' } = job;
             
             if (total_errors > 0) {
                 // Mostrar resumen con errores